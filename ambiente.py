@@ -0,0 +1,480 @@
+import numpy as np
+from constantes import ACAO_CORRER, ACAO_PULAR, ACAO_AGACHAR
+
+"""Dimensões da tela e posições fixas usadas pelas regras do jogo"""
+LARGURA_TELA = 1000
+ALTURA_TELA = 600
+
+DINO_X = 50
+DINO_LARGURA = 35
+DINO_ALTURA_EM_PE = 43
+DINO_ALTURA_AGACHADO = 26
+DINO_Y_INICIAL = ALTURA_TELA - 15
+
+CACTO_Y_INICIAL = ALTURA_TELA - 10
+PTEROSSAURO_Y_INICIAL = ALTURA_TELA - 15
+PTEROSSAURO_TAMANHO = (42, 36)
+
+"""Tamanho do retângulo de colisão de cada uma das 5 imagens do cacto"""
+TAMANHOS_CACTO = np.array([(15,33), (32,33), (49,33), (22,47), (73,47)])
+
+VELOCIDADE_INICIAL = 5
+VELOCIDADE_MAXIMA = 15
+PONTOS_POR_VELOCIDADE = 250
+
+
+TIPO_CACTO = 0
+TIPO_PTEROSSAURO = 1
+
+"""Quantidade de obstáculos na tela e de obstáculos esperando (pterossauros no início de cada jogo)"""
+OBSTACULOS_TELA = 4
+OBSTACULOS_ESPERA = 2
+
+"""Campos sorteados a cada novo obstáculo"""
+SORTEIO_TIPO = 0
+SORTEIO_CACTO = 1
+SORTEIO_PTEROSSAURO = 2
+SORTEIO_DISTANCIA = 3
+
+def mistura(x:np.ndarray) -> np.ndarray:
+    """Função de mistura splitmix64, usada para sortear números a partir de (semente, contador)
+    sem depender da ordem em que os jogos pedem números aleatórios."""
+    x = np.asarray(x, dtype=np.uint64) + np.uint64(0x9E3779B97F4A7C15)
+    x = (x ^ (x >> np.uint64(30))) * np.uint64(0xBF58476D1CE4E5B9)
+    x = (x ^ (x >> np.uint64(27))) * np.uint64(0x94D049BB133111EB)
+    return x ^ (x >> np.uint64(31))
+
+def sorteia(sementes:np.ndarray, contadores:np.ndarray, campo:int, quantidade:int) -> np.ndarray:
+    """Sorteia um inteiro em [0, quantidade) para cada jogo. O mesmo (semente, contador, campo)
+    sempre gera o mesmo número, então cada pista depende apenas da sua semente."""
+    chave = np.asarray(contadores, dtype=np.uint64) * np.uint64(4) + np.uint64(campo)
+    return (mistura(np.asarray(sementes, dtype=np.uint64) ^ mistura(chave)) % np.uint64(quantidade)).astype(np.int64)
+
+def acoes_da_saida(saida:np.ndarray) -> np.ndarray:
+    """Converte a camada de saída da rede (uma linha por dino) nas ações: agacha se a segunda saída
+    for maior, pula se a primeira for maior e corre se forem iguais."""
+    saida = np.atleast_2d(saida)
+    return np.where(saida[:,0] < saida[:,1], ACAO_AGACHAR, np.where(saida[:,0] > saida[:,1], ACAO_PULAR, ACAO_CORRER))
+
+def arredonda_rect(valor:np.ndarray) -> np.ndarray:
+    """Arredonda como o pygame.Rect faz ao receber um float (metade para cima)."""
+    return np.floor(valor + 0.5).astype(np.int64)
+
+class DinoVecEnv:
+    """Ambiente vetorizado no estilo Gym com N jogos independentes, cada um com um dino e sua própria pista.
+    Segue as regras de dino_IA.py (sensores, ações, gravidade, colisão, aumento de velocidade e reciclagem
+    dos obstáculos), mas guarda todo o estado em arrays do NumPy e não precisa de tela."""
+    def __init__(self, num_envs:int, sementes=None, auto_reset:bool=True, max_passos:int=None,
+                 pontos_por_velocidade:int=PONTOS_POR_VELOCIDADE, velocidade_maxima:int=VELOCIDADE_MAXIMA):
+        """Inicializa os arrays de estado dos N jogos. Se auto_reset for True, um jogo que termina é
+        reiniciado na hora com uma nova pista; max_passos limita o tamanho de cada jogo. A velocidade do
+        cenário aumenta 1 a cada pontos_por_velocidade pontos, até velocidade_maxima."""
+        self.num_envs = num_envs
+        self.auto_reset = auto_reset
+        self.max_passos = max_passos
+        self.pontos_por_velocidade = pontos_por_velocidade
+        self.velocidade_maxima = velocidade_maxima
+        self.indices = np.arange(num_envs)
+
+        self.sementes = np.zeros(num_envs, dtype=np.uint64)
+        self.contadores = np.zeros(num_envs, dtype=np.int64)
+
+        """Estado do dino"""
+        self.dino_y = np.zeros(num_envs, dtype=np.int64)
+        self.dino_altura = np.zeros(num_envs, dtype=np.int64)
+        self.velocidade_y = np.zeros(num_envs)
+        self.passando_obstaculo = np.zeros(num_envs, dtype=bool)
+        self.vivo = np.zeros(num_envs, dtype=bool)
+        self.fitness = np.zeros(num_envs, dtype=np.int64)
+
+        """Estado do cenário"""
+        self.pontos = np.zeros(num_envs, dtype=np.int64)
+        self.cenario_velocidade = np.zeros(num_envs, dtype=np.int64)
+
+        """Obstáculos na tela em um buffer circular: a posição 'inicio' é o primeiro obstáculo (obstaculos[0] no GerenciadorObstaculos)"""
+        self.inicio = np.zeros(num_envs, dtype=np.int64)
+        self.obstaculo_x = np.zeros((num_envs, OBSTACULOS_TELA), dtype=np.int64)
+        self.obstaculo_largura = np.zeros((num_envs, OBSTACULOS_TELA), dtype=np.int64)
+        self.obstaculo_altura = np.zeros((num_envs, OBSTACULOS_TELA), dtype=np.int64)
+        self.obstaculo_base = np.zeros((num_envs, OBSTACULOS_TELA), dtype=np.int64)
+        self.obstaculo_tipo = np.zeros((num_envs, OBSTACULOS_TELA), dtype=np.int64)
+        self.pterossauros_espera = np.zeros(num_envs, dtype=np.int64)
+
+        self.observacoes = np.zeros((num_envs, 6))
+        self.reset(sementes)
+
+    def reset(self, sementes=None) -> np.ndarray:
+        """Reinicia todos os jogos. As sementes podem ser um inteiro (pistas semente, semente+1, ...),
+        um array com uma semente por jogo ou None para pistas aleatórias. Retorna a matriz (N, 6) de sensores."""
+        if sementes is None:
+            sementes = np.random.default_rng().integers(0, 2**63, size=self.num_envs, dtype=np.uint64)
+        elif np.isscalar(sementes):
+            sementes = np.arange(self.num_envs, dtype=np.uint64) + np.uint64(sementes)
+
+        self.sementes[:] = np.asarray(sementes, dtype=np.uint64)
+        self.reinicia(np.ones(self.num_envs, dtype=bool))
+        return self.observa()
+
+    def reinicia(self, mascara:np.ndarray):
+        """Reinicia os jogos marcados na máscara, como o bloco 'Renicia o jogo' do dino_IA.py:
+        dino em pé no chão, velocidade 5, quatro cactos na tela e os dois pterossauros esperando."""
+        self.contadores[mascara] = 0
+        self.dino_y[mascara] = DINO_Y_INICIAL - DINO_ALTURA_EM_PE
+        self.dino_altura[mascara] = DINO_ALTURA_EM_PE
+        self.velocidade_y[mascara] = 0
+        self.passando_obstaculo[mascara] = False
+        self.vivo[mascara] = True
+        self.fitness[mascara] = 0
+        self.pontos[mascara] = 0
+        self.cenario_velocidade[mascara] = VELOCIDADE_INICIAL
+        self.inicio[mascara] = 0
+        self.pterossauros_espera[mascara] = OBSTACULOS_ESPERA
+
+        self.obstaculo_tipo[mascara] = TIPO_CACTO
+        self.obstaculo_base[mascara] = CACTO_Y_INICIAL
+
+        # O primeiro cacto sempre é o maior e começa na borda direita da tela
+        self.obstaculo_x[mascara, 0] = LARGURA_TELA
+        self.obstaculo_largura[mascara, 0], self.obstaculo_altura[mascara, 0] = TAMANHOS_CACTO[4]
+
+        jogos = self.indices[mascara]
+        for posicao in range(1, OBSTACULOS_TELA):
+            tamanho = TAMANHOS_CACTO[sorteia(self.sementes[jogos], self.contadores[jogos], SORTEIO_CACTO, 5)]
+            distancia = 400 + sorteia(self.sementes[jogos], self.contadores[jogos], SORTEIO_DISTANCIA, 201)
+            self.obstaculo_largura[jogos, posicao] = tamanho[:,0]
+            self.obstaculo_altura[jogos, posicao] = tamanho[:,1]
+            self.obstaculo_x[jogos, posicao] = self.obstaculo_x[jogos, posicao-1] + distancia
+            self.contadores[jogos] += 1
+
+    def obstaculo_frente(self) -> np.ndarray:
+        """Retorna a posição no buffer do obstáculo mais próximo à frente do dino de cada jogo."""
+        primeiro = self.inicio
+        segundo = (self.inicio + 1) % OBSTACULOS_TELA
+        direita_primeiro = self.obstaculo_x[self.indices, primeiro] + self.obstaculo_largura[self.indices, primeiro]
+        return np.where(direita_primeiro > DINO_X, primeiro, segundo)
+
+    def observa(self) -> np.ndarray:
+        """Preenche e retorna a matriz (N, 6) de sensores, na mesma ordem de RedeNeural.descricao.
+        A matriz é reaproveitada a cada passo; copie-a se precisar guardar os valores."""
+        frente = self.obstaculo_frente()
+        x = self.obstaculo_x[self.indices, frente]
+        topo = self.obstaculo_base[self.indices, frente] - self.obstaculo_altura[self.indices, frente]
+        dino_direita = DINO_X + DINO_LARGURA
+
+        self.observacoes[:,0] = x - dino_direita                                            # obstaculo_distacia
+        self.observacoes[:,1] = x + self.obstaculo_largura[self.indices, frente] - dino_direita  # obstaculo_largura
+        self.observacoes[:,2] = ALTURA_TELA - topo                                          # obstaculo_altura
+        self.observacoes[:,3] = ALTURA_TELA - self.obstaculo_base[self.indices, frente]     # obstaculo_comprimento
+        self.observacoes[:,4] = self.cenario_velocidade                                     # cenario_velocidade
+        self.observacoes[:,5] = ALTURA_TELA - self.dino_y                                   # dino_altura
+        return self.observacoes
+
+    def step(self, acoes, ativos:np.ndarray=None) -> tuple:
+        """Avança um frame em todos os jogos com as ações (ACAO_CORRER, ACAO_PULAR ou ACAO_AGACHAR).
+        Retorna (observacoes, recompensas, terminados, info): a recompensa é 1 por frame sobrevivido e
+        info traz os pontos e o fitness (passagens por baixo do pterossauro) de cada jogo ao terminar.
+        Com a máscara 'ativos' só esses jogos avançam; os outros ficam parados neste passo."""
+        acoes = np.asarray(acoes)
+        vivo = self.vivo.copy() if ativos is None else self.vivo & ativos
+
+        self.aplica_acoes(acoes, vivo)
+        colidiu = self.colisoes() & vivo
+        self.vivo &= ~colidiu
+
+        self.avanca_cenario(vivo)
+
+        truncado = np.zeros(self.num_envs, dtype=bool)
+        if self.max_passos is not None:
+            truncado = self.vivo & vivo & (self.pontos >= self.max_passos)
+        terminados = colidiu | truncado
+
+        recompensas = (vivo & ~colidiu).astype(np.float64)
+        info = {
+            "pontos": self.pontos.copy(),
+            "fitness": self.fitness.copy(),
+            "truncados": truncado,
+        }
+
+        if self.auto_reset and terminados.any():
+            # Cada jogo reiniciado ganha uma pista nova, derivada da semente anterior
+            self.sementes[terminados] = mistura(self.sementes[terminados])
+            self.reinicia(terminados)
+        elif truncado.any():
+            self.vivo &= ~truncado
+
+        return self.observa(), recompensas, terminados, info
+
+    def aplica_acoes(self, acoes:np.ndarray, vivo:np.ndarray):
+        """Soma o fitness de quem passa por baixo do pterossauro e aplica as ações de correr, pular e agachar,
+        reproduzindo os ramos de saída da rede neural do loop principal."""
+        frente = self.obstaculo_frente()
+        frente_x = self.obstaculo_x[self.indices, frente]
+        frente_base = self.obstaculo_base[self.indices, frente]
+
+        """Adiciona um ponto ao fitness do dino se ele passar por baixo do pterossauro"""
+        passando = frente_x <= DINO_X + DINO_LARGURA
+        ganhou = passando & (self.dino_y > frente_base) & ~self.passando_obstaculo & vivo
+        self.fitness += ganhou
+        self.passando_obstaculo = np.where(vivo, passando, self.passando_obstaculo)
+
+        no_chao = self.dino_y + self.dino_altura == DINO_Y_INICIAL
+
+        """Agachar: no chão abaixa o dino, no ar acelera a queda"""
+        agachar = vivo & (acoes == ACAO_AGACHAR)
+        agacha_chao = agachar & no_chao
+        self.dino_altura[agacha_chao] = DINO_ALTURA_AGACHADO
+        self.dino_y[agacha_chao] = DINO_Y_INICIAL - DINO_ALTURA_AGACHADO
+        self.velocidade_y[agachar & ~no_chao] += 1
+
+        """Pular: volta para a altura em pé (mantendo o topo) e só pula se a base estiver no chão"""
+        pular = vivo & (acoes == ACAO_PULAR)
+        self.dino_altura[pular] = DINO_ALTURA_EM_PE
+        pula_chao = pular & (self.dino_y + self.dino_altura == DINO_Y_INICIAL)
+        self.velocidade_y[pula_chao] = -10
+        self.dino_y[pula_chao] -= 10
+        self.velocidade_y[pular & ~pula_chao] -= 0.5
+
+        """Correr: só tem efeito no chão, levantando o dino"""
+        corre_chao = vivo & (acoes == ACAO_CORRER) & no_chao
+        self.dino_altura[corre_chao] = DINO_ALTURA_EM_PE
+        self.dino_y[corre_chao] = DINO_Y_INICIAL - DINO_ALTURA_EM_PE
+
+    def colisoes(self) -> np.ndarray:
+        """Verifica a colisão do retângulo de cada dino com os obstáculos da tela, com a mesma regra do Rect.colliderect."""
+        x = self.obstaculo_x
+        topo = self.obstaculo_base - self.obstaculo_altura
+        dino_y = self.dino_y[:,None]
+
+        colide = (
+            (DINO_X < x + self.obstaculo_largura) & (x < DINO_X + DINO_LARGURA) &
+            (dino_y < self.obstaculo_base) & (topo < dino_y + self.dino_altura[:,None])
+        )
+        return colide.any(axis=1)
+
+    def avanca_cenario(self, vivo:np.ndarray):
+        """Conta os pontos, aumenta a velocidade a cada 250 pontos (padrão), recicla o primeiro obstáculo quando ele sai
+        da tela e aplica a gravidade no dino e o movimento nos obstáculos, nesta ordem, como no loop principal."""
+        self.pontos += vivo
+
+        aumenta = vivo & (self.pontos % self.pontos_por_velocidade == 0) & (self.cenario_velocidade < self.velocidade_maxima)
+        self.cenario_velocidade += aumenta
+
+        primeiro = self.inicio
+        saiu = vivo & (self.obstaculo_x[self.indices, primeiro] + self.obstaculo_largura[self.indices, primeiro] <= 0)
+        if saiu.any():
+            self.novo_obstaculo(self.indices[saiu])
+
+        """Gravidade do dino (Dino.update)"""
+        no_chao = self.dino_y + self.dino_altura == DINO_Y_INICIAL
+        no_ar = vivo & ~no_chao
+        self.velocidade_y[vivo & no_chao] = 0
+        self.velocidade_y[no_ar] += 1
+
+        passa_do_chao = no_ar & (self.dino_y + self.dino_altura + self.velocidade_y > DINO_Y_INICIAL)
+        cai = no_ar & ~passa_do_chao
+        self.dino_y[passa_do_chao] = DINO_Y_INICIAL - self.dino_altura[passa_do_chao]
+        self.dino_y[cai] = arredonda_rect(self.dino_y[cai] + self.velocidade_y[cai])
+
+        """Movimento dos obstáculos que ainda estão na tela"""
+        move = vivo[:,None] & (self.obstaculo_x + self.obstaculo_largura > 0)
+        self.obstaculo_x -= move * self.cenario_velocidade[:,None]
+
+    def trajetoria_calma(self, acoes:np.ndarray, limite:int) -> dict:
+        """Frames em que cada jogo pode avançar repetindo a ação sem nenhum evento que exija o passo normal: o
+        primeiro obstáculo não sai da tela (a reciclagem sorteia um obstáculo novo), a velocidade não aumenta,
+        o jogo não chega a max_passos, o dino não colide e fica no chão na mesma postura ou segue no ar até pousar
+        (o pouso é o último frame). Como um obstáculo novo entra pelo menos 400 pixels depois do anterior, só o
+        primeiro obstáculo pode chegar ao dino nesse intervalo; a passagem por ele e o fitness são contados frame
+        a frame pela trajetória. Retorna um dicionário com os jogos que têm pelo menos um frame calmo, o
+        horizonte de cada um (até 'limite') e a trajetória (jogo, frame) usada por sensores_calmos e salta."""
+        velocidade = self.cenario_velocidade
+        primeiro = self.inicio
+        no_chao = self.dino_y + self.dino_altura == DINO_Y_INICIAL
+
+        direita_primeiro = self.obstaculo_x[self.indices, primeiro] + self.obstaculo_largura[self.indices, primeiro]
+        horizonte = np.where(direita_primeiro > 0, (direita_primeiro - 1) // velocidade + 1, 0)
+
+        """O frame que aumenta a velocidade ou chega a max_passos fica fora"""
+        resto = self.pontos_por_velocidade - self.pontos % self.pontos_por_velocidade - 1
+        horizonte = np.minimum(horizonte, np.where(velocidade < self.velocidade_maxima, resto, limite))
+        if self.max_passos is not None:
+            horizonte = np.minimum(horizonte, self.max_passos - self.pontos - 1)
+
+        """No chão a ação só pode manter a postura; no ar pular só desacelera a queda se o dino já estiver em pé"""
+        postura = np.where(acoes == ACAO_AGACHAR, DINO_ALTURA_AGACHADO, DINO_ALTURA_EM_PE)
+        firme = np.where(no_chao, (acoes != ACAO_PULAR) & (self.dino_altura == postura),
+                         (acoes != ACAO_PULAR) | (self.dino_altura == DINO_ALTURA_EM_PE))
+        horizonte = np.where(self.vivo & firme, np.minimum(horizonte, limite), 0)
+
+        jogos = np.flatnonzero(horizonte > 0)
+        horizonte = horizonte[jogos]
+        if not len(jogos):
+            return {"jogos": jogos, "horizonte": horizonte}
+        passos = int(horizonte.max())
+        frames = np.arange(passos)[None,:]
+
+        """Altura e velocidade vertical do dino no fim de cada frame (no chão nada muda e a velocidade zera)"""
+        dino_y = np.repeat(self.dino_y[jogos,None], passos, axis=1)
+        velocidade_y = np.zeros((len(jogos), passos))
+        no_ar = ~no_chao[jogos]
+        if no_ar.any():
+            dino_y[no_ar], velocidade_y[no_ar], pouso = self.queda(jogos[no_ar], acoes[jogos[no_ar]], passos)
+            horizonte[no_ar] = np.minimum(horizonte[no_ar], pouso)
+        alturas = np.concatenate([self.dino_y[jogos,None], dino_y[:,:-1]], axis=1)
+        altura = self.dino_altura[jogos,None]
+
+        """Primeiro obstáculo no começo de cada frame: a colisão encerra o horizonte antes do frame"""
+        indice_primeiro = primeiro[jogos]
+        x = self.obstaculo_x[jogos, indice_primeiro][:,None] - frames * velocidade[jogos,None]
+        base = self.obstaculo_base[jogos, indice_primeiro][:,None]
+        topo = base - self.obstaculo_altura[jogos, indice_primeiro][:,None]
+        frente_primeiro = x + self.obstaculo_largura[jogos, indice_primeiro][:,None] > DINO_X
+        colide = frente_primeiro & (x < DINO_X + DINO_LARGURA) & (alturas < base) & (topo < alturas + altura)
+        horizonte = np.minimum(horizonte, np.where(colide.any(axis=1), colide.argmax(axis=1), passos))
+
+        """Passagem pelo primeiro obstáculo e fitness acumulado até cada frame, como em aplica_acoes"""
+        passando = frente_primeiro & (x <= DINO_X + DINO_LARGURA)
+        anterior = np.concatenate([self.passando_obstaculo[jogos,None], passando[:,:-1]], axis=1)
+        ganhos = np.cumsum(passando & (alturas > base) & ~anterior, axis=1)
+
+        calmos = horizonte > 0
+        return {
+            "jogos": jogos[calmos], "horizonte": horizonte[calmos], "alturas": alturas[calmos],
+            "dino_y": dino_y[calmos], "velocidade_y": velocidade_y[calmos], "frente_primeiro": frente_primeiro[calmos],
+            "passando": passando[calmos], "ganhos": ganhos[calmos],
+        }
+
+    def queda(self, jogos:np.ndarray, acoes:np.ndarray, passos:int) -> tuple:
+        """Trajetória do dino no ar dos jogos indicados nos próximos 'passos' frames repetindo a ação, pela física
+        do Dino.update: a velocidade aumenta 1 por frame, mais 1 agachando e 0.5 a menos pulando, e a posição
+        é arredondada como no pygame.Rect. Retorna a altura e a velocidade depois de cada frame (jogo, frame) e o
+        frame em que cada dino pousa, passando do chão ou caindo exatamente nele (contando de 1; 'passos' + 1 se
+        não pousar)."""
+        altura = self.dino_altura[jogos,None]
+        aceleracao = np.select([acoes == ACAO_AGACHAR, acoes == ACAO_PULAR], [2, 0.5], 1)
+
+        velocidade_y = self.velocidade_y[jogos,None] + aceleracao[:,None] * np.arange(1, passos + 1)
+        dino_y = self.dino_y[jogos,None] + np.cumsum(np.floor(velocidade_y + 0.5).astype(np.int64), axis=1)
+        anterior = np.concatenate([self.dino_y[jogos,None], dino_y[:,:-1]], axis=1)
+        passou = (anterior + altura + velocidade_y > DINO_Y_INICIAL) | (dino_y + altura == DINO_Y_INICIAL)
+        pouso = np.where(passou.any(axis=1), passou.argmax(axis=1) + 1, passos + 1)
+
+        """No frame do pouso o dino fica na base (a velocidade só zera no frame seguinte)"""
+        frames = np.arange(1, passos + 1)[None,:]
+        dino_y = np.where(frames == pouso[:,None], DINO_Y_INICIAL - altura, dino_y)
+        return dino_y, velocidade_y, pouso
+
+    def sensores_calmos(self, trajetoria:dict, linhas:np.ndarray, inicio:int, fim:int) -> np.ndarray:
+        """Sensores (jogo, frame, sensor) dos frames de 'inicio' a 'fim' (o frame atual é o 0) das linhas indicadas
+        da trajetória: os obstáculos andam 'cenario_velocidade' pixels por frame, o da frente passa a ser o segundo
+        quando o primeiro fica para trás e o dino segue as alturas da trajetória."""
+        jogos = trajetoria["jogos"][linhas]
+        frente = np.where(trajetoria["frente_primeiro"][linhas, inicio:fim], self.inicio[jogos,None],
+                          (self.inicio[jogos,None] + 1) % OBSTACULOS_TELA)
+        x = self.obstaculo_x[jogos[:,None], frente] - np.arange(inicio, fim)[None,:] * self.cenario_velocidade[jogos,None]
+        base = self.obstaculo_base[jogos[:,None], frente]
+        dino_direita = DINO_X + DINO_LARGURA
+
+        sensores = np.empty((len(jogos), fim - inicio, self.observacoes.shape[1]))
+        sensores[:,:,0] = x - dino_direita
+        sensores[:,:,1] = x + self.obstaculo_largura[jogos[:,None], frente] - dino_direita
+        sensores[:,:,2] = ALTURA_TELA - (base - self.obstaculo_altura[jogos[:,None], frente])
+        sensores[:,:,3] = ALTURA_TELA - base
+        sensores[:,:,4] = self.cenario_velocidade[jogos,None]
+        sensores[:,:,5] = ALTURA_TELA - trajetoria["alturas"][linhas, inicio:fim]
+        return sensores
+
+    def salta(self, trajetoria:dict, frames:np.ndarray):
+        """Avança de uma vez 'frames' frames calmos de cada jogo da trajetória (veja trajetoria_calma), deixando o
+        estado igual ao de avançar frame a frame."""
+        jogos = trajetoria["jogos"]
+        linhas = np.arange(len(jogos))
+        ultimo = frames - 1
+        self.dino_y[jogos] = trajetoria["dino_y"][linhas, ultimo]
+        self.velocidade_y[jogos] = trajetoria["velocidade_y"][linhas, ultimo]
+        self.passando_obstaculo[jogos] = trajetoria["passando"][linhas, ultimo]
+        self.fitness[jogos] += trajetoria["ganhos"][linhas, ultimo]
+        self.pontos[jogos] += frames
+        self.obstaculo_x[jogos] -= (frames * self.cenario_velocidade[jogos])[:,None]
+
+    def passo_por_eventos(self, acoes:np.ndarray, decide, limite:int=64, bloco:int=8) -> tuple:
+        """Passo orientado a eventos: os jogos que têm frames calmos pela frente e cuja política mantém a ação
+        neles avançam todos esses frames de uma vez; os outros dão um passo normal. 'decide(jogos, sensores)'
+        recebe os sensores (jogo, frame, sensor) dos frames calmos e retorna as ações (jogo, frame); os frames
+        são conferidos em blocos, só para os jogos que mantiveram a ação no bloco anterior.
+        O resultado é idêntico ao de step frame a frame. Retorna as observações e quantos frames cada jogo
+        avançou, para somar aos frames simulados."""
+        avancados = self.vivo.astype(np.int64)
+        trajetoria = self.trajetoria_calma(acoes, limite)
+        jogos, horizonte = trajetoria["jogos"], trajetoria["horizonte"]
+        if len(jogos):
+            """O primeiro frame é o atual, com a ação já decidida; conta os frames seguidos com a mesma ação"""
+            frames = np.ones(len(jogos), dtype=np.int64)
+            pendentes = np.flatnonzero(horizonte > 1)
+            inicio = 1
+            while len(pendentes):
+                fim = min(inicio + bloco, int(horizonte[pendentes].max()))
+                sensores = self.sensores_calmos(trajetoria, pendentes, inicio, fim)
+                iguais = decide(jogos[pendentes], sensores) == acoes[jogos[pendentes],None]
+                iguais &= np.arange(inicio, fim)[None,:] < horizonte[pendentes,None]
+                mantem = iguais.all(axis=1)
+                frames[pendentes] = np.where(mantem, fim, inicio + iguais.argmin(axis=1))
+                pendentes = pendentes[mantem & (horizonte[pendentes] > fim)]
+                inicio = fim
+
+            self.salta(trajetoria, frames)
+            avancados[jogos] = frames
+
+        ativos = np.ones(self.num_envs, dtype=bool)
+        ativos[jogos] = False
+        observacoes, _, _, _ = self.step(acoes, ativos)
+        return observacoes, avancados
+
+    def novo_obstaculo(self, jogos:np.ndarray):
+        """Recicla o primeiro obstáculo dos jogos indicados, como o GerenciadorObstaculos.recicla: sorteia um pterossauro (20%)
+        ou um cacto, usa um obstáculo em espera desse tipo se houver, ou reaproveita o próprio obstáculo que saiu."""
+        sementes = self.sementes[jogos]
+        contadores = self.contadores[jogos]
+        primeiro = self.inicio[jogos]
+        ultimo = (primeiro + OBSTACULOS_TELA - 1) % OBSTACULOS_TELA
+
+        quer_pterossauro = sorteia(sementes, contadores, SORTEIO_TIPO, 5) == 0
+        espera = self.pterossauros_espera[jogos]
+        tem_espera = np.where(quer_pterossauro, espera > 0, espera < OBSTACULOS_ESPERA)
+
+        tipo_saiu = self.obstaculo_tipo[jogos, primeiro]
+        tipo_novo = np.where(tem_espera, quer_pterossauro, tipo_saiu)
+        self.pterossauros_espera[jogos] += np.where(tem_espera, tipo_saiu - quer_pterossauro, 0)
+
+        tamanho = TAMANHOS_CACTO[sorteia(sementes, contadores, SORTEIO_CACTO, 5)]
+        altura_pterossauro = PTEROSSAURO_Y_INICIAL - 60 + 30 * sorteia(sementes, contadores, SORTEIO_PTEROSSAURO, 3)
+        pterossauro = tipo_novo == TIPO_PTEROSSAURO
+
+        self.obstaculo_tipo[jogos, primeiro] = tipo_novo
+        self.obstaculo_largura[jogos, primeiro] = np.where(pterossauro, PTEROSSAURO_TAMANHO[0], tamanho[:,0])
+        self.obstaculo_altura[jogos, primeiro] = np.where(pterossauro, PTEROSSAURO_TAMANHO[1], tamanho[:,1])
+        self.obstaculo_base[jogos, primeiro] = np.where(pterossauro, altura_pterossauro, CACTO_Y_INICIAL)
+        self.obstaculo_x[jogos, primeiro] = self.obstaculo_x[jogos, ultimo] + 400 + sorteia(sementes, contadores, SORTEIO_DISTANCIA, 201)
+
+        # O obstáculo novo entra no fim da fila e o segundo passa a ser o primeiro
+        self.inicio[jogos] = (primeiro + 1) % OBSTACULOS_TELA
+        self.contadores[jogos] += 1
+
+if __name__ == "__main__":
+    import argparse, time
+
+    parser = argparse.ArgumentParser(description="Mede a vazão do DinoVecEnv com uma política aleatória.")
+    parser.add_argument("--jogos", type=int, default=4096)
+    parser.add_argument("--passos", type=int, default=1000)
+    args = parser.parse_args()
+
+    env = DinoVecEnv(args.jogos, sementes=0)
+    rng = np.random.default_rng(0)
+    acoes = rng.choice([ACAO_CORRER, ACAO_PULAR, ACAO_AGACHAR], p=[0.9, 0.05, 0.05], size=(args.passos, args.jogos))
+
+    inicio = time.perf_counter()
+    for passo in range(args.passos):
+        observacoes, recompensas, terminados, info = env.step(acoes[passo])
+    tempo = time.perf_counter() - inicio
+
+    print(f"{args.jogos * args.passos / tempo:,.0f} frames simulados por segundo ({args.jogos} jogos, {args.passos} passos)")
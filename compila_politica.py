@@ -0,0 +1,130 @@
+"""Compila um dino treinado em uma tabela de decisões (politica.bin) para o modo jogador vs IA.
+
+Todas as entradas da rede são inteiros em pixels com poucos valores possíveis: o obstáculo da frente
+é um dos 5 cactos ou uma das 3 alturas de pterossauro, a velocidade vai de 5 a 15 e a distância e a
+altura do dino ficam em intervalos pequenos. A rede é avaliada uma única vez em todas essas combinações
+e as ações são gravadas com 2 bits cada. Depois a tabela é conferida contra a rede original.
+"""
+import argparse, struct, sys, numpy as np
+from dino_IA import carrega_modelo
+from ambiente import (DinoVecEnv, TAMANHOS_CACTO, CACTO_Y_INICIAL, PTEROSSAURO_Y_INICIAL, PTEROSSAURO_TAMANHO,
+                      ALTURA_TELA, VELOCIDADE_INICIAL, VELOCIDADE_MAXIMA)
+from tabela_politica import TabelaPolitica, MAGICO_TABELA, FORMATO_CABECALHO, FORMATO_OBSTACULO, crc_arquivo
+
+"""Intervalos compilados: o obstáculo da frente nunca começa além de x = 1000 e o dino não sobe além de 256 pixels"""
+DISTANCIA_MIN = -128
+DISTANCIAS = 1152
+ALTURA_MIN = 0
+ALTURAS = 256
+
+def tipos_obstaculo() -> list:
+    """Retorna (largura, obstaculo_altura, obstaculo_comprimento) de cada obstáculo possível."""
+    obstaculos = [(int(largura), ALTURA_TELA - (CACTO_Y_INICIAL - int(altura)), ALTURA_TELA - CACTO_Y_INICIAL)
+                  for largura, altura in TAMANHOS_CACTO]
+
+    for base in range(PTEROSSAURO_Y_INICIAL - 60, PTEROSSAURO_Y_INICIAL + 30, 30):
+        largura, altura = PTEROSSAURO_TAMANHO
+        obstaculos.append((largura, ALTURA_TELA - (base - altura), ALTURA_TELA - base))
+
+    return obstaculos
+
+def compila(rede, individuo, obstaculos:list) -> np.ndarray:
+    """Avalia a rede em todas as combinações de (obstáculo, velocidade, distância, altura do dino)
+    e retorna as ações empacotadas com 4 ações por byte."""
+    velocidades = VELOCIDADE_MAXIMA - VELOCIDADE_INICIAL + 1
+    distancia, dino_altura = np.meshgrid(
+        np.arange(DISTANCIA_MIN, DISTANCIA_MIN + DISTANCIAS),
+        np.arange(ALTURA_MIN, ALTURA_MIN + ALTURAS),
+        indexing="ij"
+    )
+
+    entradas = np.zeros((DISTANCIAS * ALTURAS, 6))
+    entradas[:,0] = distancia.ravel()
+    entradas[:,5] = dino_altura.ravel()
+
+    acoes = np.zeros((len(obstaculos), velocidades, DISTANCIAS * ALTURAS), dtype=np.uint8)
+    for indice_obstaculo, (largura, altura, comprimento) in enumerate(obstaculos):
+        entradas[:,1] = entradas[:,0] + largura
+        entradas[:,2] = altura
+        entradas[:,3] = comprimento
+        for indice_velocidade in range(velocidades):
+            entradas[:,4] = VELOCIDADE_INICIAL + indice_velocidade
+            acoes[indice_obstaculo, indice_velocidade] = rede.acoes(rede.forward(entradas, individuo)[-1])
+
+    acoes = acoes.ravel()
+    acoes = np.concatenate([acoes, np.zeros(-len(acoes) % 4, dtype=np.uint8)]).reshape(-1, 4)
+    return (acoes[:,0] | (acoes[:,1] << 2) | (acoes[:,2] << 4) | (acoes[:,3] << 6)).astype(np.uint8)
+
+def salva_tabela(caminho:str, checkpoint:str, obstaculos:list, acoes_empacotadas:np.ndarray):
+    """Grava o cabeçalho, os tipos de obstáculo e as ações empacotadas em um arquivo binário."""
+    with open(caminho, "wb") as arquivo:
+        arquivo.write(MAGICO_TABELA)
+        arquivo.write(struct.pack(
+            FORMATO_CABECALHO, crc_arquivo(checkpoint), DISTANCIA_MIN, DISTANCIAS, ALTURA_MIN, ALTURAS,
+            VELOCIDADE_INICIAL, VELOCIDADE_MAXIMA - VELOCIDADE_INICIAL + 1, len(obstaculos)
+        ))
+        for obstaculo in obstaculos:
+            arquivo.write(struct.pack(FORMATO_OBSTACULO, *obstaculo))
+        arquivo.write(acoes_empacotadas.tobytes())
+
+def verifica(tabela:TabelaPolitica, rede, individuo, amostras:int=20000, jogos:int=256, passos:int=3000) -> dict:
+    """Confere a tabela contra a rede original em duas etapas: pontos sorteados da grade compilada e
+    sensores reais de jogos simulados no DinoVecEnv com o dino controlado pela própria rede."""
+    rng = np.random.default_rng(0)
+    obstaculos = np.array(tabela.obstaculos)
+
+    escolhidos = obstaculos[rng.integers(0, len(obstaculos), amostras)]
+    entradas = np.zeros((amostras, 6))
+    entradas[:,0] = rng.integers(DISTANCIA_MIN, DISTANCIA_MIN + DISTANCIAS, amostras)
+    entradas[:,1] = entradas[:,0] + escolhidos[:,0]
+    entradas[:,2] = escolhidos[:,1]
+    entradas[:,3] = escolhidos[:,2]
+    entradas[:,4] = rng.integers(VELOCIDADE_INICIAL, VELOCIDADE_MAXIMA + 1, amostras)
+    entradas[:,5] = rng.integers(ALTURA_MIN, ALTURA_MIN + ALTURAS, amostras)
+
+    esperado = rede.acoes(rede.forward(entradas, individuo)[-1])
+    iguais_grade = sum(tabela.acao(linha) == acao for linha, acao in zip(entradas.tolist(), esperado))
+
+    env = DinoVecEnv(jogos, sementes=0)
+    iguais_jogo = 0
+    total_jogo = 0
+    fora_da_grade = 0
+    for _ in range(passos):
+        observacoes = env.observacoes
+        acoes = rede.acoes(rede.forward(observacoes, individuo)[-1])
+        for linha, acao in zip(observacoes[::16].tolist(), acoes[::16]):
+            fora_da_grade += not (DISTANCIA_MIN <= linha[0] < DISTANCIA_MIN + DISTANCIAS and ALTURA_MIN <= linha[5] < ALTURA_MIN + ALTURAS)
+            iguais_jogo += tabela.acao(linha) == acao
+            total_jogo += 1
+        env.step(acoes)
+
+    return {
+        "grade": f"{iguais_grade}/{amostras}",
+        "jogo": f"{iguais_jogo}/{total_jogo}",
+        "fora_da_grade": fora_da_grade,
+        "exata": iguais_grade == amostras and iguais_jogo == total_jogo,
+    }
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compila um dino treinado em uma tabela de decisões.")
+    parser.add_argument("--checkpoint", default="save.json")
+    parser.add_argument("--saida", default="politica.bin")
+    args = parser.parse_args()
+
+    try:
+        rede, individuo = carrega_modelo(args.checkpoint)
+    except FileNotFoundError as erro:
+        print(erro)
+        sys.exit(1)
+
+    obstaculos = tipos_obstaculo()
+    acoes_empacotadas = compila(rede, individuo, obstaculos)
+    salva_tabela(args.saida, args.checkpoint, obstaculos, acoes_empacotadas)
+    print(f"Tabela salva em {args.saida} ({len(acoes_empacotadas) / 1024 / 1024:.1f} MB)")
+
+    tabela = TabelaPolitica.carrega(args.saida, args.checkpoint)
+    resultado = verifica(tabela, rede, individuo)
+    print(f"Conferencia com a rede original: grade {resultado['grade']}, jogo {resultado['jogo']}, "
+          f"fora da grade {resultado['fora_da_grade']}, exata: {resultado['exata']}")
+    if not resultado["exata"]:
+        sys.exit(1)
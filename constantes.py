@@ -0,0 +1,5 @@
+"""Ações que o dino pode tomar a partir da saída da rede neural"""
+ACAO_CORRER = 0
+ACAO_PULAR = 1
+ACAO_AGACHAR = 2
+NOMES_ACOES = ["correr", "pular", "agachar"]
@@ -0,0 +1,197 @@
+"""Canal de controle do treino com tela (dino_IA.py --controle): um socket Unix lido pelo loop principal sem
+bloquear, para pausar, ajustar e salvar um treino rodando sem fechar a janela e perder a geração.
+
+    python dino_IA.py --controle                  # abre o socket dino_IA.sock
+    python controle.py pausa                      # e "continua"
+    python controle.py mutacao 0.2 0.3            # fixa taxa e escala de mutação a partir da próxima geração
+    python controle.py mutacao auto               # volta ao cronograma normal de mutação
+    python controle.py velocidade 4               # 4x o limite de 60 frames por segundo (0 = sem limite)
+    python controle.py checkpoint                 # salva o save.json agora, como ao fechar o jogo
+    python controle.py metricas
+    python controle.py render minimo              # completo | minimo (sem o desenho da rede) | nenhum
+
+Protocolo (uma linha por mensagem, como o servidor_inferencia.py): o cliente manda o comando e os argumentos
+separados por espaço e o jogo responde com uma linha JSON com o estado do treino ou com "erro: ...".
+O socket só é consultado a cada poucos frames e com select sem espera, então o canal não pesa no loop.
+"""
+import argparse, json, math, os, select, socket
+
+CAMINHO_CONTROLE = "dino_IA.sock"
+MODOS_RENDER = ["completo", "minimo", "nenhum"]
+TAMANHO_MAXIMO_LINHA = 1024
+
+def interpreta(palavras:list) -> tuple:
+    """Confere um comando recebido e retorna (comando, valor). Levanta ValueError com a mensagem para o cliente."""
+    if not palavras:
+        raise ValueError("comando vazio")
+    comando, argumentos = palavras[0], palavras[1:]
+
+    if comando in ("pausa", "continua", "checkpoint", "metricas"):
+        if argumentos:
+            raise ValueError(f"{comando} não recebe argumentos")
+        return comando, None
+
+    if comando == "mutacao":
+        if argumentos == ["auto"]:
+            return comando, None
+        if len(argumentos) not in (1, 2):
+            raise ValueError("uso: mutacao TAXA [ESCALA] | mutacao auto")
+        try:
+            taxa = float(argumentos[0])
+            escala = float(argumentos[-1])
+        except ValueError:
+            raise ValueError("taxa e escala de mutação devem ser números")
+        if not (math.isfinite(taxa) and math.isfinite(escala)):
+            raise ValueError("taxa e escala de mutação devem ser números finitos")
+        if taxa < 0 or escala < 0:
+            raise ValueError("taxa e escala de mutação não podem ser negativas")
+        return comando, (taxa, escala)
+
+    if comando == "velocidade":
+        try:
+            multiplicador = float(argumentos[0]) if len(argumentos) == 1 else -1
+        except ValueError:
+            multiplicador = -1
+        if multiplicador < 0 or not math.isfinite(multiplicador):
+            raise ValueError("uso: velocidade MULTIPLICADOR (0 = sem limite de frames)")
+        return comando, multiplicador
+
+    if comando == "render":
+        if len(argumentos) != 1 or argumentos[0] not in MODOS_RENDER:
+            raise ValueError(f"uso: render {'|'.join(MODOS_RENDER)}")
+        return comando, argumentos[0]
+
+    raise ValueError(f"comando desconhecido: {comando}")
+
+class CanalControle:
+    """Servidor do socket Unix sem bloqueio: o loop do jogo chama comandos() a cada frame e recebe as linhas
+    completas que chegaram; só a cada 'intervalo' frames o socket é de fato consultado."""
+    def __init__(self, caminho:str=CAMINHO_CONTROLE, intervalo:int=10):
+        """Abre o socket no caminho, removendo um arquivo antigo que não tenha mais ninguém escutando."""
+        if not hasattr(socket, "AF_UNIX"):
+            raise OSError("socket Unix não disponível neste sistema")
+
+        if os.path.exists(caminho):
+            teste = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            try:
+                teste.connect(caminho)
+            except (ConnectionRefusedError, FileNotFoundError):
+                os.unlink(caminho)
+            else:
+                raise OSError(f"outro treino já usa o canal de controle {caminho}")
+            finally:
+                teste.close()
+
+        self.caminho = caminho
+        self.intervalo = intervalo
+        self.frames = 0
+        self.servidor = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.servidor.bind(caminho)
+        self.servidor.listen()
+        self.servidor.setblocking(False)
+        self.conexoes = {}
+
+    def comandos(self, sempre:bool=False) -> list:
+        """Retorna os comandos que chegaram como (conexão, palavras). Com sempre=True (jogo pausado) o socket
+        é consultado neste frame mesmo fora do intervalo."""
+        self.frames += 1
+        if not sempre and self.frames % self.intervalo:
+            return []
+
+        prontos, _, _ = select.select([self.servidor, *self.conexoes], [], [], 0)
+        recebidos = []
+        for pronto in prontos:
+            if pronto is self.servidor:
+                try:
+                    conexao, _ = self.servidor.accept()
+                except BlockingIOError:
+                    continue
+                conexao.setblocking(False)
+                self.conexoes[conexao] = bytearray()
+                continue
+
+            try:
+                dados = pronto.recv(4096)
+            except (BlockingIOError, InterruptedError):
+                continue
+            except OSError:
+                dados = b""
+            if not dados:
+                self.desconecta(pronto)
+                continue
+
+            buffer = self.conexoes[pronto]
+            buffer += dados
+            while b"\n" in buffer:
+                linha, _, resto = bytes(buffer).partition(b"\n")
+                buffer[:] = resto
+                palavras = linha.decode("utf-8", errors="replace").split()
+                if palavras:
+                    recebidos.append((pronto, palavras))
+
+            """Um cliente que nunca manda o fim da linha não pode fazer o buffer crescer sem limite"""
+            if len(buffer) > TAMANHO_MAXIMO_LINHA:
+                self.responde(pronto, f"erro: linha maior que {TAMANHO_MAXIMO_LINHA} bytes")
+                self.desconecta(pronto)
+        return recebidos
+
+    def responde(self, conexao:socket.socket, resposta):
+        """Manda uma linha para o cliente: o dicionário em JSON ou o texto como está."""
+        texto = resposta if isinstance(resposta, str) else json.dumps(resposta, ensure_ascii=False)
+        try:
+            conexao.sendall(f"{texto}\n".encode("utf-8"))
+        except OSError:
+            self.desconecta(conexao)
+
+    def desconecta(self, conexao:socket.socket):
+        """Fecha uma conexão de cliente."""
+        self.conexoes.pop(conexao, None)
+        conexao.close()
+
+    def fecha(self):
+        """Fecha as conexões e o socket e remove o arquivo."""
+        for conexao in list(self.conexoes):
+            self.desconecta(conexao)
+        self.servidor.close()
+        if os.path.exists(self.caminho):
+            os.unlink(self.caminho)
+
+def envia(comando:list, caminho:str=CAMINHO_CONTROLE, tempo_limite:float=5.0) -> str:
+    """Cliente: manda um comando para o jogo e retorna a linha de resposta."""
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as conexao:
+        conexao.settimeout(tempo_limite)
+        conexao.connect(caminho)
+        conexao.sendall((" ".join(comando) + "\n").encode("utf-8"))
+
+        resposta = bytearray()
+        while not resposta.endswith(b"\n"):
+            dados = conexao.recv(4096)
+            if not dados:
+                break
+            resposta += dados
+    return resposta.decode("utf-8").strip()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Controla um dino_IA.py rodando com --controle.")
+    parser.add_argument("comando", nargs="+", help="pausa | continua | mutacao TAXA [ESCALA] | mutacao auto | "
+                                                   "velocidade N | checkpoint | metricas | render MODO")
+    parser.add_argument("--socket", default=CAMINHO_CONTROLE, help="caminho do socket aberto pelo jogo")
+    args = parser.parse_args()
+
+    try:
+        interpreta(args.comando)
+        resposta = envia(args.comando, args.socket)
+    except ValueError as erro:
+        raise SystemExit(f"erro: {erro}")
+    except (FileNotFoundError, ConnectionRefusedError):
+        raise SystemExit(f"nenhum treino escutando em {args.socket} (rode o dino_IA.py com --controle)")
+    except socket.timeout:
+        raise SystemExit("o jogo não respondeu")
+
+    if resposta.startswith("erro:"):
+        raise SystemExit(resposta)
+    try:
+        for chave, valor in json.loads(resposta).items():
+            print(f"{chave}: {valor}")
+    except json.JSONDecodeError:
+        print(resposta)
@@ -0,0 +1,81 @@
+"""Demonstrações do jogador: pares (sensores, ação) gravados a cada passo do player_vs_IA.py, usados pelo
+imitacao.py para treinar a rede neural imitando o jogador.
+
+Formato do arquivo: um cabeçalho "<4sBB" (mágico, versão, quantidade de sensores) seguido de um registro
+"<6hB" por passo (os 6 sensores em int16 e a ação em um byte). Gravar de novo no mesmo arquivo acrescenta
+registros, então várias partidas podem ficar juntas.
+"""
+import os, struct
+from constantes import ACAO_PULAR
+
+MAGICO_DEMONSTRACOES = b"DDEM"
+VERSAO_DEMONSTRACOES = 1
+SENSORES = 6
+
+FORMATO_CABECALHO = "<4sBB"
+TAMANHO_CABECALHO = struct.calcsize(FORMATO_CABECALHO)
+FORMATO_REGISTRO = f"<{SENSORES}hB"
+TAMANHO_REGISTRO = struct.calcsize(FORMATO_REGISTRO)
+
+"""Sensor dino_altura (ALTURA_TELA - rect.y) do dino em pé no chão: 600 - (600 - 15 - 43)"""
+DINO_ALTURA_NO_CHAO = 58
+
+class GravadorDemonstracoes:
+    """Acumula os registros em memória e grava em blocos, para não escrever no disco a cada passo do jogo."""
+    def __init__(self, caminho:str, registros_por_bloco:int=600):
+        """Abre o arquivo para acrescentar registros, escrevendo o cabeçalho se ele for novo."""
+        novo = not os.path.exists(caminho) or os.path.getsize(caminho) == 0
+        if not novo:
+            with open(caminho, "rb") as arquivo:
+                confere_cabecalho(arquivo.read(TAMANHO_CABECALHO))
+
+        self.arquivo = open(caminho, "ab")
+        if novo:
+            self.arquivo.write(struct.pack(FORMATO_CABECALHO, MAGICO_DEMONSTRACOES, VERSAO_DEMONSTRACOES, SENSORES))
+        self.bloco = bytearray()
+        self.registros_por_bloco = registros_por_bloco
+        self.registros = 0
+
+    def grava(self, entradas:list, acao:int):
+        """Acrescenta um passo: os sensores (limitados ao intervalo do int16) e a ação do jogador."""
+        self.bloco += struct.pack(FORMATO_REGISTRO, *(max(-32768, min(32767, int(valor))) for valor in entradas), acao)
+        self.registros += 1
+        if len(self.bloco) >= self.registros_por_bloco * TAMANHO_REGISTRO:
+            self.descarrega()
+
+    def descarrega(self):
+        """Grava no arquivo os registros acumulados."""
+        self.arquivo.write(self.bloco)
+        self.arquivo.flush()
+        self.bloco.clear()
+
+    def fecha(self):
+        """Grava o que falta e fecha o arquivo."""
+        self.descarrega()
+        self.arquivo.close()
+
+def confere_cabecalho(cabecalho:bytes):
+    """Levanta ValueError se o cabeçalho não for de um arquivo de demonstrações desta versão."""
+    if len(cabecalho) < TAMANHO_CABECALHO:
+        raise ValueError("arquivo de demonstrações inválido")
+    magico, versao, sensores = struct.unpack(FORMATO_CABECALHO, cabecalho)
+    if magico != MAGICO_DEMONSTRACOES or versao != VERSAO_DEMONSTRACOES or sensores != SENSORES:
+        raise ValueError("arquivo de demonstrações inválido ou de outra versão")
+
+def le_demonstracoes(caminho:str) -> tuple:
+    """Lê o arquivo inteiro e retorna (entradas, ações) como arrays do NumPy (N, 6) e (N,). Um registro
+    incompleto no fim (jogo fechado no meio de uma gravação) é ignorado."""
+    import numpy as np
+
+    with open(caminho, "rb") as arquivo:
+        confere_cabecalho(arquivo.read(TAMANHO_CABECALHO))
+        dados = arquivo.read()
+
+    registros = np.frombuffer(dados[:len(dados) - len(dados) % TAMANHO_REGISTRO],
+                              dtype=np.dtype([("entradas", "<i2", (SENSORES,)), ("acao", "u1")]))
+    return registros["entradas"].astype(np.float64), registros["acao"].astype(np.int64)
+
+def pulos_no_chao(entradas, acoes) -> int:
+    """Quantos registros de pular têm o dino em pé no chão, que são os que ensinam quando sair do chão.
+    Se há pulos e nenhum no chão, os sensores foram lidos depois de o pulo já ter movido o dino."""
+    return int(((acoes == ACAO_PULAR) & (entradas[:,SENSORES - 1] == DINO_ALTURA_NO_CHAO)).sum())
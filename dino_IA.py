@@ -1,5 +1,21 @@
-import pygame, sys, os, copy, json, numpy as np
+import pygame, sys, os, copy, json, argparse, time, random, numpy as np
 from random import randint, randrange
+from recursos import GerenciadorRecursos, resource_path, cor_aleatoria
+from ambiente import acoes_da_saida
+from constantes import ACAO_PULAR, ACAO_AGACHAR
+from metricas import ExportadorMetricas, diversidade
+from obstaculos import GerenciadorObstaculos
+from perfil_alocacoes import PerfilAlocacoes
+
+"""Descrição dos sensores que formam a camada de entrada da rede neural"""
+DESCRICAO_SENSORES = [
+    "obstaculo_distacia:",
+    "obstaculo_largura:",
+    "obstaculo_altura:",
+    "obstaculo_comprimento:",
+    "cenario_velocidade:",
+    "dino_altura:",
+]
 
 class Individuo:
     """Representa um indivíduo (ou solução) em um algoritmo evolutivo, com pesos e biases que 
@@ -32,6 +48,8 @@ class RedeNeural:
             self.lista_neuronios.append(camada)
         self.lista_neuronios.append(self.camada_saida)
 
+        self.buffers_ativacao = {}
+
     def relu(self, x) -> np.ndarray:
         """Aplica a função de ativação ReLU (Rectified Linear Unit), que retorna o valor de entrada 
         se for positivo e 0 se for negativo."""
@@ -83,26 +101,67 @@ class RedeNeural:
 
         return Individuo(pesos, bias)
 
-    def forward(self, entradas:list, individuo:Individuo) -> list:
+    def buffers(self, linhas:int) -> list:
+        """Retorna os buffers de ativação de cada camada (escondidas e saída) para entradas com esse número
+        de linhas (None para um único vetor, ("lote", n) para o forward_lote), criando-os apenas na primeira vez."""
+        buffers = self.buffers_ativacao.get(linhas)
+        if buffers is None:
+            if linhas is None:
+                buffers = [np.zeros(camada) for camada in self.lista_neuronios[1:]]
+            elif isinstance(linhas, tuple):
+                buffers = [np.zeros((linhas[1], 1, camada)) for camada in self.lista_neuronios[1:]]
+            else:
+                buffers = [np.zeros((linhas, camada)) for camada in self.lista_neuronios[1:]]
+            self.buffers_ativacao[linhas] = buffers
+        return buffers
+
+    def forward(self, entradas:list, individuo:Individuo, guarda_ativacoes:bool=False) -> list:
         """Realiza a propagação para frente (feedforward) na rede neural, calculando a saída da rede 
-        com base nas entradas e parâmetros (pesos e biases) do indivíduo."""
+        com base nas entradas e parâmetros (pesos e biases) do indivíduo. Cada camada é escrita no seu
+        buffer pré-alocado; os buffers são sobrescritos na próxima chamada, então use guarda_ativacoes
+        para receber uma cópia das ativações (usado apenas pelo dino desenhado na tela)."""
         pesos = individuo.pesos
         bias = individuo.bias
-        resultado = []
 
-        x = np.array(entradas)  # A entrada inicial
+        x = np.asarray(entradas, dtype=np.float64)  # A entrada inicial
+        resultado = self.buffers(None if x.ndim == 1 else x.shape[0])
 
-        # Passando pela primeira camada escondida até a última camada escondida
-        for i in range(len(self.camadas_escondida)):
-            x = self.neuronio(x, pesos[i], bias[i])  # Passa pela função de ativação
-            resultado.append(x)
+        # Passando por todas as camadas escondidas e pela camada de saída
+        for i, ativacao in enumerate(resultado):
+            np.dot(x, pesos[i], out=ativacao)
+            ativacao += bias[i]
+            np.maximum(ativacao, 0, out=ativacao)  # Passa pela função de ativação
+            x = ativacao
 
-        # Passando pela camada de saída
-        x = self.neuronio(x, pesos[-1], bias[-1])
-        resultado.append(x)
+        if guarda_ativacoes:
+            return [ativacao.copy() for ativacao in resultado]
 
         return resultado  # Retorna a saída da rede (previsão do indivíduo)
 
+    def empilha(self, individuos:list) -> tuple:
+        """Empilha os pesos e biases dos indivíduos em arrays (indivíduo, entrada, saída) por camada,
+        no formato usado pelo forward_lote."""
+        pesos = [np.stack([individuo.pesos[camada] for individuo in individuos]) for camada in range(len(self.lista_neuronios)-1)]
+        bias = [np.stack([individuo.bias[camada] for individuo in individuos])[:,None,:] for camada in range(len(self.lista_neuronios)-1)]
+        return pesos, bias
+
+    def forward_lote(self, entradas:np.ndarray, pesos:list, bias:list) -> np.ndarray:
+        """Calcula a camada de saída de cada indivíduo empilhado para a sua linha da matriz de entradas
+        (indivíduo, sensores), com um único produto de matrizes por camada para a população inteira."""
+        x = entradas[:,None,:]
+        resultado = self.buffers(("lote", entradas.shape[0]))
+        for i, ativacao in enumerate(resultado):
+            np.matmul(x, pesos[i], out=ativacao)
+            ativacao += bias[i]
+            np.maximum(ativacao, 0, out=ativacao)
+            x = ativacao
+        return x[:,0,:]
+
+    def acoes(self, saida:np.ndarray) -> np.ndarray:
+        """Converte a camada de saída (uma linha por conjunto de entradas) nas ações do dino:
+        agacha se a segunda saída for maior, pula se a primeira for maior e corre se forem iguais."""
+        return acoes_da_saida(saida)
+
     def draw(self, surface:pygame.surface.Surface, entradas:list, saidas:list, posicao:tuple):
         """Desenha a estrutura da rede neural (camadas de neurônios, entradas, saídas) em uma superfície 
         do Pygame, incluindo conexões entre neurônios com base nos valores das entradas e saídas."""
@@ -156,13 +215,16 @@ class RedeNeural:
 
         pygame.draw.rect(surface, lista_dinos[indice_dino].cor_dino, (ponto_x + 350, origem_y, 17, 17))
 
+        # As camadas são centralizadas na maior delas e o espaçamento diminui para caber redes maiores
         origem_y = 60
+        maior_camada = max(self.lista_neuronios)
+        espaco_y = min(50, 300 / maior_camada)
+        espaco_x = min(100, 280 / (len(self.lista_neuronios) - 1))
+        raio = max(2, min(10, int(espaco_y / 2) - 1))
+
         posicoes_xy = []
         for indice_camada, camada in enumerate(self.lista_neuronios):
-            if indice_camada == 0:
-                posicao_y = origem_y
-            else:
-                posicao_y = origem_y + ((self.lista_neuronios[0] - camada) * 25)
+            posicao_y = origem_y + ((maior_camada - camada) * espaco_y / 2)
 
             posicao_camada = []
             for neuronio in range(camada):
@@ -191,10 +253,10 @@ class RedeNeural:
                 else:
                     red *= 255
 
-                pygame.draw.circle(surface, (red,0,0), posicao_atual, 10)
+                pygame.draw.circle(surface, (red,0,0), posicao_atual, raio)
 
-                posicao_y += 50
-            posicao_x += 100
+                posicao_y += espaco_y
+            posicao_x += espaco_x
             posicoes_xy.append(posicao_camada)
 
 class Dino(pygame.sprite.Sprite):
@@ -205,6 +267,8 @@ class Dino(pygame.sprite.Sprite):
         cria a lista de sprites com a cor aleatória."""
         pygame.sprite.Sprite.__init__(self)
         self.individuo = Individuo([],[])
+        self.indice = 0
+        self.pontos = 0
         self.morreu = False
         self.passando_obstaculo = False
         self.y_inicial = y_inicial
@@ -219,18 +283,24 @@ class Dino(pygame.sprite.Sprite):
         self.rect = pygame.Rect(50, 0, 35, 43)
         self.rect.bottom = self.y_inicial
 
+    def reinicia(self):
+        """Volta o Dino ao estado de um Dino recém-criado (vivo, no chão e parado) no começo de uma geração,
+        mantendo o indivíduo e a cor."""
+        self.pontos = 0
+        self.morreu = False
+        self.passando_obstaculo = False
+        self.velocidade_y = 0
+        self.index_sprite = 0
+        self.image = self.sprite_list[1]
+        self.rect.update(50, 0, 35, 43)
+        self.rect.bottom = self.y_inicial
+
     def set_cor(self):
-        """Define uma cor aleatória para o Dino e adiciona as sprites a lista de sprites com base na
-        imagem de fundo (sheet_dino), aplicando a cor escolhida."""
-        self.cor_dino = (randint(0,200), randint(0,200), randint(0,200))
-        sheet = sheet_dino.copy()
-        sheet.fill(self.cor_dino, special_flags=pygame.BLEND_RGB_MULT)
+        """Define uma cor aleatória da paleta para o Dino e usa os frames já tingidos com essa cor,
+        compartilhados com os outros dinos da mesma cor."""
+        self.cor_dino = cor_aleatoria()
+        self.sprite_list = recursos.frames_dino(self.cor_dino)
 
-        self.sprite_list = []
-        for i in range(6):
-            img = sheet.subsurface((i * 64,0), (64,64))
-            self.sprite_list.append(img)
-        
     def run(self):
         """Define a animação de corrida do Dino, alternando entre os sprites de corrida com base
         em um índice de sprite ajustado ao longo do tempo."""
@@ -277,10 +347,7 @@ class Chao(pygame.sprite.Sprite):
         """Inicializa o Chão com uma lista de imagens de sprite e define sua posição inicial,
         com base na coordenada y fornecida como parametro."""
         pygame.sprite.Sprite.__init__(self)
-        self.sprite_list = []
-        for i in range(6):
-            img = sheet_chao.subsurface((i * 60,0), (60,12))
-            self.sprite_list.append(img)
+        self.sprite_list = recursos.frames("chao")
 
         self.image = self.sprite_list[randint(0,5)]
         self.rect = self.image.get_rect()
@@ -300,7 +367,7 @@ class Nuvem(pygame.sprite.Sprite):
     def __init__(self):
         """Inicializa a Nuvem com a imagem e define sua posição inicial fora da tela, à direita."""
         pygame.sprite.Sprite.__init__(self)
-        self.image = sprite_nuvem
+        self.image = recursos.frames("nuvem")[0]
         self.rect = self.image.get_rect()
         self.rect.right = 0
 
@@ -319,10 +386,7 @@ class Cacto(pygame.sprite.Sprite):
         pygame.sprite.Sprite.__init__(self)
         """Inicializa o Cacto com a posição y inicial, carrega as imagens de sprite e define a imagem inicial do Cacto."""
         self.y_inicial = y_inicial
-        self.sprite_list = []
-        for i in range(5):
-            img = sheet_cacto.subsurface((i * 73,0), (73,47))
-            self.sprite_list.append(img)
+        self.sprite_list = recursos.frames("cacto")
 
         self.rect = pygame.rect.Rect(0,0,0,0)
         self.image = None
@@ -346,6 +410,10 @@ class Cacto(pygame.sprite.Sprite):
 
         self.image = self.sprite_list[indice_img]
 
+    def prepara(self):
+        """Chamado pelo GerenciadorObstaculos quando o Cacto volta para a tela: sorteia uma nova imagem."""
+        self.set_image()
+
     def update(self):
         """Atualiza a posição do Cacto na tela, movendo-o horizontalmente com base na velocidade do cenário."""
         if self.rect.right > 0:
@@ -359,14 +427,15 @@ class Pterossauro(pygame.sprite.Sprite):
         pygame.sprite.Sprite.__init__(self)
         self.y_inicial = y_inicial
         self.index_sprite = 0
-        self.sprite_list = [
-            sheet_pterossauro.subsurface((0,0), (42,36)),
-            sheet_pterossauro.subsurface((42,0), (42,36))
-        ]
+        self.sprite_list = recursos.frames("pterossauro")
         self.image = self.sprite_list[0]
         self.rect = self.image.get_rect()
         self.rect.right = 0
 
+    def prepara(self):
+        """Chamado pelo GerenciadorObstaculos quando o Pterossauro volta para a tela: sorteia uma das 3 alturas."""
+        self.rect.bottom = randrange(self.y_inicial-60, self.y_inicial+30, 30)
+
     def update(self):
         """Atualiza a posição do Pterossauro na tela e altera a animação entre os sprites de voo."""
         if self.rect.right > 0:
@@ -378,48 +447,31 @@ class Pterossauro(pygame.sprite.Sprite):
             self.index_sprite += 0.15
             self.image = self.sprite_list[int(self.index_sprite)]
         
-def nome_da_classe(objeto) -> str:
-    """Retorna o nome da classe do objeto passado como argumento."""
-    return objeto.__class__.__name__
-
-def set_posicao_x(obstaculo):
-    """Define a posição horizontal do obstáculo com base na posição do último obstáculo visível na tela, 
-    adicionando uma distância aleatória entre 400 e 600 pixels."""
-    obstaculo.rect.x = lista_obstaculos_tela[-1].rect.x + randint(400,600)
-
-def set_novo_obstaculo():
-    """Define e posiciona um novo obstáculo na tela, escolhendo aleatoriamente entre um Pterossauro ou um Cacto,
-    ajustando sua posição vertical e adicionando-o à lista de obstáculos visíveis na tela."""
-    nome_classes_espera = list(map(nome_da_classe, lista_obstaculos_espera))
-    chance_pterossauro = randint(1,5) == 1 # 20%
-    
-    if chance_pterossauro:
-        nome_obstaculo = "Pterossauro"
-    else:
-        nome_obstaculo = "Cacto"
+def atualiza_sensores(entradas:np.ndarray, dinos_vivos:list) -> pygame.sprite.Sprite:
+    """Preenche a matriz de entradas da rede (uma linha por dino, na ordem da lista_dinos) e retorna o
+    obstáculo da frente. Todos os dinos vivos ficam em x = 50, então os sensores do obstáculo e a velocidade
+    são calculados uma vez por frame e copiados para todas as linhas; só a dino_altura é lida de cada dino."""
+    dino_rect = dinos_vivos[0].rect
 
-    if nome_obstaculo in nome_classes_espera:
-        if nome_classes_espera[0] == nome_obstaculo:
-            obstaculo_espera = lista_obstaculos_espera.pop(0)
-        else:
-            obstaculo_espera = lista_obstaculos_espera.pop(1)
-        lista_obstaculos_espera.append(lista_obstaculos_tela.pop(0))
-    else:
-        obstaculo_espera = lista_obstaculos_tela.pop(0)
+    """Referencia o obstáculo mais próximo dos dinos no array de estado dos obstáculos (atualizado no começo do frame)"""
+    frente = obstaculos.frente(dino_rect.x)
+    x, y, largura, altura, _ = obstaculos.estado[frente].tolist()
 
-    if nome_da_classe(obstaculo_espera) == "Pterossauro":
-        obstaculo_espera.rect.bottom = randrange(obstaculo_espera.y_inicial-60, obstaculo_espera.y_inicial+30, 30)
-    else:
-        obstaculo_espera.set_image()
+    entradas[:,0] = x - dino_rect.right                            # obstaculo_distacia
+    entradas[:,1] = x + largura - dino_rect.right                  # obstaculo_largura
+    entradas[:,2] = ALTURA_TELA - y                                # obstaculo_altura
+    entradas[:,3] = ALTURA_TELA - (y + altura)                     # obstaculo_comprimento
+    entradas[:,4] = cenario_velocidade                             # cenario_velocidade
 
-    set_posicao_x(obstaculo_espera)
-    lista_obstaculos_tela.append(obstaculo_espera)
+    for dino in dinos_vivos:
+        entradas[dino.indice,5] = ALTURA_TELA - dino.rect.y        # dino_altura
+
+    return obstaculos[frente]
 
 def mata_dino(dino:Dino):
     """Marca o dinossauro como morto, altera sua imagem e executa o som de morte, 
     ajustando a altura e posição do dinossauro caso ele tenha um tamanho ou posição específica."""
-    if som_ativo:
-        som_morte.play()
+    recursos.toca_som("morte")
 
     dino.morreu = True
     dino.image = dino.sprite_list[0]
@@ -428,16 +480,33 @@ def mata_dino(dino:Dino):
         dino.rect.height = 43
         dino.rect.bottom = dino.y_inicial
 
+def reinicia_cenario():
+    """Monta o cenário do começo de uma geração: os 4 cactos iniciais (o primeiro sempre o maior), o chão com
+    imagens sorteadas e as nuvens fora da tela."""
+    obstaculos.reinicia(["cacto"] * 4, LARGURA_TELA)
+
+    cacto = obstaculos[0]
+    cacto.rect.size = (73,47)
+    cacto.rect.bottom = cacto.y_inicial
+    cacto.image = cacto.sprite_list[4]
+
+    for indice, chao in enumerate(lista_chao):
+        chao.image = chao.sprite_list[randint(0,3)]
+        chao.rect.x = 60 * indice
+
+    for nuvem in lista_nuvem:
+        nuvem.rect.right = 0
+
 def exibe_mensagem(msg, tamanho:int, cor:tuple) -> pygame.surface.Surface:
     """Exibe uma mensagem formatada na tela com a fonte e cor especificadas"""
-    fonte = pygame.font.Font(diretorio_fonte, tamanho)
+    fonte = recursos.fonte(tamanho)
     texto_formatado = fonte.render(f"{msg}", True, cor)
     return texto_formatado
 
-def carrega_json() -> dict:
+def carrega_json(caminho:str="save.json") -> dict:
     """Carrega os dados da rede neural salvo no arquivo "save.json"."""
     try:
-        with open("save.json", "r", encoding="utf-8") as arquivo:
+        with open(caminho, "r", encoding="utf-8") as arquivo:
             dados = json.load(arquivo)
             for indice in range(len(dados["individuo"]["pesos"])):
                 dados["individuo"]["pesos"][indice] = np.array(dados["individuo"]["pesos"][indice])
@@ -446,75 +515,207 @@ def carrega_json() -> dict:
     except (FileNotFoundError, json.JSONDecodeError):
         return None
 
-def salva_json(rede:RedeNeural, individuo:Individuo):
+def neuronios_salvos(dados:dict) -> list:
+    """Retorna o número de neurônios de cada camada do checkpoint. Saves antigos não guardam a topologia,
+    então ela é deduzida do formato dos pesos."""
+    if "neuronios" in dados["rede"]:
+        return dados["rede"]["neuronios"]
+
+    pesos = dados["individuo"]["pesos"]
+    return [pesos[0].shape[0]] + [camada.shape[1] for camada in pesos]
+
+def carrega_modelo(caminho:str="save.json") -> tuple:
+    """Carrega o checkpoint e monta a rede neural com a topologia salva, retornando a rede e o indivíduo salvo."""
+    dados = carrega_json(caminho)
+    if dados is None:
+        raise FileNotFoundError(f"checkpoint não encontrado ou inválido: {caminho}")
+
+    neuronios = neuronios_salvos(dados)
+
+    rede = RedeNeural(
+        camada_entrada=neuronios[0],
+        camadas_escondida=neuronios[1:-1],
+        camada_saida=neuronios[-1],
+        descricao=DESCRICAO_SENSORES
+    )
+
+    return rede, Individuo(dados["individuo"]["pesos"], dados["individuo"]["bias"])
+
+def salva_json(rede:RedeNeural, individuo:Individuo, caminho:str="save.json"):
     """Salva o informações da rede neural."""
     dados = {
-        "rede": {"geracao": rede.geracao, "escala": rede.escala_grafico, "pontos": rede.lista_pontos},
+        "rede": {"geracao": rede.geracao, "escala": rede.escala_grafico, "pontos": rede.lista_pontos, "neuronios": rede.lista_neuronios},
         "individuo": {"pesos": individuo.pesos, "bias": individuo.bias, "fitness": individuo.fitness}
     }
 
-    with open("save.json", "w", encoding="utf-8") as arquivo:
+    with open(caminho, "w", encoding="utf-8") as arquivo:
         json.dump(dados, arquivo, ensure_ascii=False, indent=4, default=lambda x: x.tolist() if isinstance(x, np.ndarray) else x)
 
-def resource_path(*paths) -> str:
-    """Retorna o caminho correto, dependendo de estar rodando no executável ou no código fonte."""
-    if getattr(sys, "frozen", False):
-        # Quando estiver no executável (PyInstaller)
-        base_path = sys._MEIPASS
-    else:
-        # Quando estiver no código fonte
-        base_path = os.path.join(os.path.dirname(__file__), "assets")
+def caminho_populacao(caminho:str="save.json") -> str:
+    """Arquivo da população que acompanha o save (save.json -> save.populacao.npz)."""
+    return os.path.splitext(caminho)[0] + ".populacao.npz"
 
-    return os.path.join(base_path, *paths)
+def salva_populacao(rede:RedeNeural, individuos:list, elite:Individuo, caminho:str="save.json"):
+    """Salva, ao lado do save, a população inteira do começo da geração atual, o elite que a gerou, o contador
+    de gerações, o gráfico de pontos e o estado dos geradores aleatórios (random e np.random), para que o
+    treino possa continuar de onde parou. O arquivo é gravado em um temporário e renomeado."""
+    pesos, bias = rede.empilha(individuos)
+    estado_numpy = np.random.get_state()
+    estado_python = random.getstate()
+
+    dados = {
+        "geracao": rede.geracao,
+        "pontos": np.array(rede.lista_pontos, dtype=np.int64),
+        "escala": rede.escala_grafico,
+        "neuronios": np.array(rede.lista_neuronios),
+        "rng_numpy_chaves": estado_numpy[1],
+        "rng_numpy": np.array(estado_numpy[2:], dtype=np.float64),
+        "rng_python": np.array(estado_python[1], dtype=np.uint32),
+        "rng_python_gauss": np.nan if estado_python[2] is None else estado_python[2],
+    }
+    for camada in range(len(pesos)):
+        dados[f"pesos_{camada}"] = pesos[camada]
+        dados[f"bias_{camada}"] = bias[camada][:,0,:]
+        dados[f"elite_pesos_{camada}"] = np.asarray(elite.pesos[camada])
+        dados[f"elite_bias_{camada}"] = np.asarray(elite.bias[camada])
+
+    temporario = caminho_populacao(caminho) + ".tmp"
+    with open(temporario, "wb") as arquivo:
+        np.savez(arquivo, **dados)
+    os.replace(temporario, caminho_populacao(caminho))
+
+def carrega_populacao(elite:Individuo, neuronios:list, caminho:str="save.json") -> dict:
+    """Carrega a população salva ao lado do save. Retorna None se ela não existir, tiver outra topologia ou
+    tiver sido gerada por outro elite (o save foi trocado depois que a população foi salva)."""
+    try:
+        arquivo = np.load(caminho_populacao(caminho))
+    except (OSError, ValueError):
+        return None
+
+    with arquivo:
+        if arquivo["neuronios"].tolist() != list(neuronios):
+            return None
+
+        camadas = range(len(neuronios) - 1)
+        for camada in camadas:
+            if not (np.array_equal(arquivo[f"elite_pesos_{camada}"], elite.pesos[camada])
+                    and np.array_equal(arquivo[f"elite_bias_{camada}"], elite.bias[camada])):
+                return None
+
+        pesos = [arquivo[f"pesos_{camada}"] for camada in camadas]
+        bias = [arquivo[f"bias_{camada}"] for camada in camadas]
+        return {
+            "individuos": [Individuo([camada[indice] for camada in pesos], [camada[indice] for camada in bias])
+                           for indice in range(len(pesos[0]))],
+            "geracao": int(arquivo["geracao"]),
+            "pontos": arquivo["pontos"].tolist(),
+            "escala": float(arquivo["escala"]),
+            "rng_numpy": ("MT19937", arquivo["rng_numpy_chaves"], *(
+                int(valor) if indice < 2 else float(valor) for indice, valor in enumerate(arquivo["rng_numpy"])
+            )),
+            "rng_python": (3, tuple(int(valor) for valor in arquivo["rng_python"]),
+                           None if np.isnan(arquivo["rng_python_gauss"]) else float(arquivo["rng_python_gauss"])),
+        }
 
 
 if __name__ == "__main__":
 
+    parser = argparse.ArgumentParser(description="Dino I.A. - treinamento da rede neural")
+    parser.add_argument("--camadas", type=int, nargs="+", default=None,
+                        help="neurônios de cada camada escondida, por exemplo --camadas 32 32 (padrão: a do save ou 6)")
+    parser.add_argument("--metricas", default=None,
+                        help="arquivo .jsonl ou .csv onde as métricas de cada geração são acrescentadas")
+    parser.add_argument("--prometheus", default=None,
+                        help="arquivo .prom do textfile collector do Prometheus, reescrito a cada geração")
+    parser.add_argument("--hall-da-fama", default=None, metavar="ARQUIVO",
+                        help="arquivo SQLite onde os melhores de cada geração são guardados (veja hall_da_fama.py)")
+    parser.add_argument("--hall-k", type=int, default=10, help="quantos indivíduos de cada geração vão para o hall da fama")
+    parser.add_argument("--popula-do-hall", action="store_true",
+                        help="começa a população com os melhores indivíduos do hall da fama")
+    parser.add_argument("--mudo", action="store_true", help="treina sem som (sem tela o som já fica mudo)")
+    parser.add_argument("--perfil-alocacoes", action="store_true",
+                        help="mede as alocações de cada frame desde o início (F4 liga e desliga durante o jogo)")
+    parser.add_argument("--orcamento-alocacoes", type=int, default=None, metavar="BYTES",
+                        help="limite de bytes alocados por frame usado no relatório e no benchmark")
+    parser.add_argument("--benchmark-alocacoes", type=int, default=None, metavar="FRAMES",
+                        help="roda FRAMES frames com o perfil ligado, mostra o relatório e sai com erro se passar do orçamento")
+    parser.add_argument("--tempo-inicio", action="store_true", help="mostra o tempo entre o início do processo e o primeiro frame")
+    parser.add_argument("--retoma", choices=["populacao", "elite", "aleatoria"], default="populacao",
+                        help="como continuar um save: a população inteira salva (com a geração e o estado aleatório), "
+                             "mutações do elite salvo ou o elite com o resto da população aleatória (como antes)")
+    parser.add_argument("--controle", nargs="?", const="dino_IA.sock", default=None, metavar="SOCKET",
+                        help="abre um socket Unix para pausar, ajustar e salvar o treino rodando (veja controle.py)")
+    parser.add_argument("--selecao", choices=["fitness", "novidade", "map_elites"], default="fitness",
+                        help="de onde saem as mutações da próxima geração: do melhor por fitness, dos comportamentos "
+                             "mais novos ou dos elites da grade do MAP-Elites (veja novidade.py)")
+    parser.add_argument("--novidade-k", type=int, default=15, help="vizinhos usados na nota de novidade")
+    parser.add_argument("--grade", type=int, default=10, help="células por eixo da grade do MAP-Elites")
+    args = parser.parse_args()
+
+    dados = carrega_json()
+
+    """Usa a topologia do save, a não ser que outra tenha sido pedida; nesse caso o treino começa do zero"""
+    if dados and args.camadas and neuronios_salvos(dados)[1:-1] != args.camadas:
+        print(f"save.json tem as camadas {neuronios_salvos(dados)[1:-1]}, começando um treino novo com {args.camadas}")
+        dados = None
+
+    if dados:
+        camadas_escondida = neuronios_salvos(dados)[1:-1]
+    else:
+        camadas_escondida = args.camadas or [6]
+
     """Configura a rede neural"""
     rede_neural = RedeNeural(
-        camada_entrada=6,
-        camadas_escondida=[6],
+        camada_entrada=len(DESCRICAO_SENSORES),
+        camadas_escondida=camadas_escondida,
         camada_saida=2,
-        descricao=[
-            "obstaculo_distacia:",
-            "obstaculo_largura:",
-            "obstaculo_altura:",
-            "obstaculo_comprimento:",
-            "cenario_velocidade:",
-            "dino_altura:",
-        ]
+        descricao=DESCRICAO_SENSORES
     )
 
-    dados = carrega_json()
+    """Quantidade de dinos em cada geração"""
+    TAMANHO_POPULACAO = 500
 
+    populacao_salva = None
     if dados:
         rede_neural.geracao = dados["rede"]["geracao"]
         rede_neural.lista_pontos = dados["rede"]["pontos"]
         rede_neural.escala_grafico = dados["rede"]["escala"]
 
         primeiro_individuo = Individuo(dados["individuo"]["pesos"], dados["individuo"]["bias"])
+        fitness_elite = dados["individuo"]["fitness"]
 
-        if dados["individuo"]["fitness"] >= 100:
+        """Mesma regra do fim de geração, para a população regenerada do elite continuar o mesmo cronograma"""
+        if fitness_elite >= 90:
             taxa_mutacao = 0.1
         else:
             taxa_mutacao = round(1 - (rede_neural.geracao / 100), 1)
+
+        """Continua da população inteira salva no começo da geração, se ela for deste save"""
+        if args.retoma == "populacao":
+            populacao_salva = carrega_populacao(primeiro_individuo, rede_neural.lista_neuronios)
+            if populacao_salva and len(populacao_salva["individuos"]) == TAMANHO_POPULACAO:
+                rede_neural.geracao = populacao_salva["geracao"]
+                rede_neural.lista_pontos = populacao_salva["pontos"]
+                rede_neural.escala_grafico = populacao_salva["escala"]
+                print(f"Continuando a população salva da geração {rede_neural.geracao}")
+            else:
+                populacao_salva = None
+                print("População salva não encontrada (ou de outro save), recriando a população a partir do elite")
     else:
         rede_neural.escala_grafico = 5
 
         primeiro_individuo = rede_neural.individuo_random()
+        fitness_elite = 0
         taxa_mutacao = 2
     escala_mutacao = taxa_mutacao
+    individuo_elite = primeiro_individuo
 
     rede_neural.limite_grafico_y = rede_neural.escala_grafico * 300
 
     """Configura o pygame"""
-    pygame.init()
-
-    try:
-        pygame.mixer.init()
-        som_ativo = True
-    except:
-        som_ativo = False
+    # O mixer é inicializado junto com os sons pelo GerenciadorRecursos, fora da thread principal
+    pygame.display.init()
+    pygame.font.init()
 
     LARGURA_TELA = 1000
     ALTURA_TELA = 600
@@ -538,33 +739,27 @@ if __name__ == "__main__":
     segundos = 0
     minutos = 0
 
-    """Carrega a fonte as imagens e os sons do jogo"""
-    diretorio_fonte = resource_path("fonts", "Minecraft.ttf")
-
-    sheet_dino = pygame.image.load(resource_path("images", "dino.png")).convert_alpha()
-    sheet_chao = pygame.image.load(resource_path("images", "chao.png")).convert_alpha()
-    sprite_nuvem = pygame.image.load(resource_path("images", "nuvem.png")).convert_alpha()
-    sheet_cacto = pygame.image.load(resource_path("images", "cacto.png")).convert_alpha()
-    sheet_pterossauro = pygame.image.load(resource_path("images", "pterossauro.png")).convert_alpha()
-
-    if som_ativo:
-        som_pulo = pygame.mixer.Sound(resource_path("sounds", "jump_sound.wav"))
-        som_morte = pygame.mixer.Sound(resource_path("sounds", "death_sound.wav"))
-        som_ponto = pygame.mixer.Sound(resource_path("sounds", "score_sound.wav"))
+    """Carrega as imagens do jogo e inicia o carregamento dos sons em segundo plano"""
+    recursos = GerenciadorRecursos(mudo=True if args.mudo else None)
+    recursos.carrega()
+    recursos.inicia_sons()
 
     """Crias todas as sprites do jogo"""
     group_sprites = pygame.sprite.Group()
 
     dino = Dino(ALTURA_TELA-15)
-    dino.individuo = primeiro_individuo
+    dino.individuo = populacao_salva["individuos"][0] if populacao_salva else primeiro_individuo
 
     lista_dinos = [dino]
     group_sprites.add(dino)
 
-    for _ in range(499):
+    for indice in range(1, TAMANHO_POPULACAO):
         dino = Dino(ALTURA_TELA-15)
+        dino.indice = indice
         
-        if dados:
+        if populacao_salva:
+            dino.individuo = populacao_salva["individuos"][indice]
+        elif dados and args.retoma == "aleatoria":
             dino.individuo = rede_neural.individuo_random()
         else:
             dino.individuo = rede_neural.mutacao(primeiro_individuo, taxa_mutacao, escala_mutacao)
@@ -572,10 +767,30 @@ if __name__ == "__main__":
         lista_dinos.append(dino)
         group_sprites.add(dino)
 
+    """Guarda os melhores de cada geração no hall da fama e, se pedido, começa a população a partir dele"""
+    hall_da_fama = None
+    id_pai = None
+    if args.hall_da_fama:
+        from hall_da_fama import HallDaFama
+        hall_da_fama = HallDaFama(args.hall_da_fama)
+
+        if args.popula_do_hall:
+            arquivados = hall_da_fama.carrega_populacao(len(lista_dinos), rede_neural.lista_neuronios)
+            for dino, (id_individuo, individuo) in zip(lista_dinos, arquivados):
+                individuo.fitness = 0
+                dino.individuo = individuo
+            if arquivados:
+                id_pai = arquivados[0][0]
+            print(f"{len(arquivados)} indivíduos carregados do hall da fama")
+
     lista_dinos_vivos = lista_dinos.copy()
     len_lista_dinos = len(lista_dinos)
     vivos = len_lista_dinos
 
+    """Matriz de sensores (dino, entrada) preenchida uma vez por frame e os pesos da população empilhados"""
+    matriz_entradas = np.zeros((len_lista_dinos, len(DESCRICAO_SENSORES)))
+    pesos_populacao, bias_populacao = rede_neural.empilha([dino.individuo for dino in lista_dinos])
+
     lista_chao = []
 
     for i in range(18):
@@ -594,66 +809,160 @@ if __name__ == "__main__":
         lista_nuvem.append(nuvem)
         group_sprites.add(nuvem)
 
-    group_obstaculos = pygame.sprite.Group()
-
-    cacto = Cacto(ALTURA_TELA-10)
-    cacto.rect.x = LARGURA_TELA
-    group_obstaculos.add(cacto)
-    lista_obstaculos_tela = [cacto]
-
-    for _ in range(3):
-        cacto = Cacto(ALTURA_TELA-10)
-        set_posicao_x(cacto)
-        lista_obstaculos_tela.append(cacto)
-        group_obstaculos.add(cacto)
-
-    lista_obstaculos_espera = []
-
-    for _ in range(2):
-        pterossauro = Pterossauro(ALTURA_TELA-15)
-        lista_obstaculos_espera.append(pterossauro)
-        group_obstaculos.add(pterossauro)
+    """4 cactos e 2 pterossauros reaproveitados pelo gerenciador, com 20% de chance de o próximo ser um pterossauro"""
+    obstaculos = GerenciadorObstaculos({
+        "cacto": (lambda: Cacto(ALTURA_TELA-10), 4, 4),
+        "pterossauro": (lambda: Pterossauro(ALTURA_TELA-15), 2, 1),
+    })
+    obstaculos.reinicia(["cacto"] * 4, LARGURA_TELA)
+    group_obstaculos = pygame.sprite.Group(obstaculos.todos)
+
+
+    """Exporta as métricas de cada geração, se pedido; a escrita roda em outra thread"""
+    exportador = None
+    if args.metricas or args.prometheus:
+        exportador = ExportadorMetricas(args.metricas, args.prometheus)
+    inicio_geracao = time.perf_counter()
+    frames_geracao = 0
+
+    """Perfil de alocações de cada etapa do loop, ligado pela linha de comando ou pela tecla F4"""
+    perfil = PerfilAlocacoes(args.orcamento_alocacoes)
+    if args.perfil_alocacoes or args.benchmark_alocacoes:
+        perfil.liga()
+
+    """Canal de controle do treino rodando: pausa, mutação fixa, limite de frames, checkpoint e modo de desenho"""
+    controle = None
+    if args.controle:
+        from controle import CanalControle, interpreta
+        controle = CanalControle(args.controle)
+        print(f"Canal de controle em {args.controle}")
+    pausado = False
+    mutacao_fixa = None
+    multiplicador_velocidade = 1
+    modo_render = "completo"
+
+    """Seleção por comportamento: registra o que cada dino faz na geração para escolher os pais das mutações"""
+    comportamento = None
+    selecao = None
+    if args.selecao != "fitness":
+        from novidade import RegistroComportamento, ArquivoNovidade, GradeElites
+        comportamento = RegistroComportamento(len_lista_dinos)
+        selecao = ArquivoNovidade(args.novidade_k) if args.selecao == "novidade" else GradeElites(args.grade)
+
+    """Quem continua a população salva volta ao estado aleatório dela só aqui, depois que a criação das sprites
+    já sorteou, para a primeira geração começar do mesmo ponto em que a população foi salva"""
+    if populacao_salva:
+        np.random.set_state(populacao_salva["rng_numpy"])
+        random.setstate(populacao_salva["rng_python"])
+    nova_geracao = True
 
     """Loop principal do jogo"""
     while True:
-        tela.fill(BRANCO)
+        """Começo de uma geração: salva a população e só então sorteia o cenário, para quem continuar da população
+        salva sortear o mesmo cenário e jogar a geração igual"""
+        if nova_geracao:
+            salva_populacao(rede_neural, [dino.individuo for dino in lista_dinos], individuo_elite)
+            reinicia_cenario()
+            nova_geracao = False
+
+        perfil.etapa("eventos")
+        if modo_render != "nenhum":
+            tela.fill(BRANCO)
         for event in pygame.event.get():
             if event.type == pygame.QUIT:
-                """Salva json quando fechar o jogo"""
+                """Salva json quando fechar o jogo, com o elite que gerou a geração atual (a população
+                dessa geração já está salva ao lado do save desde que ela começou)"""
                 rede_neural.lista_pontos.append(0)
-                salva_json(rede_neural, lista_dinos_vivos[0].individuo)
+                elite = Individuo(individuo_elite.pesos, individuo_elite.bias)
+                elite.fitness = fitness_elite
+                salva_json(rede_neural, elite)
+                if exportador:
+                    exportador.fecha()
+                if hall_da_fama:
+                    hall_da_fama.fecha()
+                if controle:
+                    controle.fecha()
+                if perfil.ativo:
+                    print(perfil.relatorio())
                 pygame.quit()
                 sys.exit()
-            elif event.type == TIMER_EVENT:
+            elif event.type == TIMER_EVENT and not pausado:
                 segundos += 1
                 if segundos == 60:
                     segundos = 0
                     minutos += 1
-
+            elif event.type == pygame.KEYDOWN and event.key == pygame.K_F4:
+                if not perfil.alterna():
+                    print(perfil.relatorio())
+
+        if controle:
+            for conexao, palavras in controle.comandos(pausado):
+                try:
+                    comando, valor = interpreta(palavras)
+                except ValueError as erro:
+                    controle.responde(conexao, f"erro: {erro}")
+                    continue
+
+                if comando in ("pausa", "continua"):
+                    pausado = comando == "pausa"
+                elif comando == "mutacao":
+                    """Vale a partir da próxima geração; None volta ao cronograma normal"""
+                    mutacao_fixa = valor
+                elif comando == "velocidade":
+                    multiplicador_velocidade = valor
+                elif comando == "render":
+                    modo_render = valor
+                elif comando == "checkpoint":
+                    """Mesmo save do fechamento do jogo, sem mexer na lista de pontos da geração em andamento"""
+                    rede_checkpoint = copy.copy(rede_neural)
+                    rede_checkpoint.lista_pontos = rede_neural.lista_pontos + [0]
+                    elite = Individuo(individuo_elite.pesos, individuo_elite.bias)
+                    elite.fitness = fitness_elite
+                    salva_json(rede_checkpoint, elite)
+
+                tempo_geracao = time.perf_counter() - inicio_geracao
+                controle.responde(conexao, {
+                    "geracao": rede_neural.geracao,
+                    "pontos": rede_neural.lista_pontos[-1],
+                    "vivos": vivos,
+                    "fitness_elite": fitness_elite,
+                    "taxa_mutacao": taxa_mutacao,
+                    "escala_mutacao": escala_mutacao,
+                    "mutacao_fixa": mutacao_fixa is not None,
+                    "pausado": pausado,
+                    "velocidade": multiplicador_velocidade,
+                    "render": modo_render,
+                    "fps": round(relogio.get_fps(), 1),
+                    "frames_por_segundo": round(frames_geracao / tempo_geracao) if tempo_geracao > 0 else 0,
+                })
+
+        """Pausado: a tela mostra o último frame e o tempo parado não conta no tempo da geração"""
+        if pausado:
+            inicio_geracao += relogio.tick(15) / 1000
+            continue
+
+        frames_geracao += vivos
+
+        """Lê os sensores e calcula a saída da rede de todos os dinos de uma vez"""
+        perfil.etapa("sensores")
+        obstaculos.atualiza_estado()
+        obstaculo_frente = atualiza_sensores(matriz_entradas, lista_dinos_vivos)
+        perfil.etapa("rede")
+        acoes = rede_neural.acoes(rede_neural.forward_lote(matriz_entradas, pesos_populacao, bias_populacao))
+
+        """Guarda as entradas e as ativações do último dino vivo, o desenhado na tela"""
+        if modo_render == "completo":
+            dino = lista_dinos_vivos[-1]
+            entradas = [int(valor) for valor in matriz_entradas[dino.indice]]
+            saida = rede_neural.forward(entradas, dino.individuo, guarda_ativacoes=True)
+
+        perfil.etapa("dinos")
         indice = 0
 
         """Esse while percorre todos os dinos vivos"""
         while indice < vivos:
             dino = lista_dinos_vivos[indice]
 
-            """Referencia o obstáculo mais próximo do dino"""
-            if lista_obstaculos_tela[0].rect.right > dino.rect.x:   
-                obstaculo_frente = lista_obstaculos_tela[0]
-            else:
-                obstaculo_frente = lista_obstaculos_tela[1]
-
-            entradas = [
-                obstaculo_frente.rect.x - dino.rect.right,     # obstaculo_distacia
-                obstaculo_frente.rect.right - dino.rect.right, # obstaculo_largura
-                ALTURA_TELA - obstaculo_frente.rect.y,         # obstaculo_altura
-                ALTURA_TELA - obstaculo_frente.rect.bottom,    # obstaculo_comprimento
-                cenario_velocidade,                            # cenario_velocidade
-                ALTURA_TELA - dino.rect.y,                     # dino_altura
-            ]
-
-            """Calcula a saída da rede neural para o dino"""
-            saida = rede_neural.forward(entradas, dino.individuo)
-
             """Adiciona um ponto ao fitness do dino se ele passar por baixo do pterossauro"""
             if obstaculo_frente.rect.x <= dino.rect.right:
                 if ALTURA_TELA - dino.rect.y < ALTURA_TELA - obstaculo_frente.rect.bottom and dino.passando_obstaculo == False:
@@ -664,19 +973,21 @@ if __name__ == "__main__":
                 dino.passando_obstaculo = False
 
             """Executa a ação com base na saída da rede neural"""
-            if saida[-1][0] < saida[-1][1]: # Agachar
+            acao = acoes[dino.indice]
+            if comportamento is not None:
+                comportamento.registra(dino.indice, acao, dino.rect.bottom == dino.y_inicial, matriz_entradas[dino.indice,0])
+            if acao == ACAO_AGACHAR: # Agachar
                 if dino.rect.bottom == dino.y_inicial:
                     dino.crouch()
                 else:
                     dino.velocidade_y += 1
-            elif saida[-1][0] > saida[-1][1]: # Pular
+            elif acao == ACAO_PULAR: # Pular
                 dino.rect.height = 43
                 dino.image = dino.sprite_list[1]
                 if dino.rect.bottom == dino.y_inicial:
                     dino.velocidade_y = -10
                     dino.rect.y -= 10
-                    if som_ativo:
-                        som_pulo.play()
+                    recursos.toca_som("pulo")
                 else:
                     dino.jump()
             else: # Correr
@@ -685,15 +996,17 @@ if __name__ == "__main__":
                     dino.run()
 
             """Verifica se o dino colidiu com algum obstáculo"""
-            colidiu = pygame.sprite.spritecollide(dino, group_obstaculos, False)
+            colidiu = obstaculos.colide(dino.rect)
             
             if colidiu:
                 mata_dino(dino)
+                dino.pontos = rede_neural.lista_pontos[-1]
                 melhor_dino = lista_dinos_vivos.pop(indice)
                 vivos -= 1
             else:
                 indice += 1
 
+        perfil.etapa("cenario")
         rede_neural.lista_pontos[-1] += 1
 
         if rede_neural.lista_pontos[-1] >= rede_neural.limite_grafico_y:
@@ -702,13 +1015,12 @@ if __name__ == "__main__":
 
         """Taxa de aumento de velocidade do cenario"""
         if rede_neural.lista_pontos[-1] % 250 == 0:
-            if som_ativo:
-                som_ponto.play()
+            recursos.toca_som("ponto")
             if cenario_velocidade < 15:
                 cenario_velocidade += 1
 
-        if lista_obstaculos_tela[0].rect.right <= 0:
-            set_novo_obstaculo()
+        if obstaculos[0].rect.right <= 0:
+            obstaculos.recicla()
 
         """Renicia o jogo"""
         if vivos == 0:
@@ -725,15 +1037,61 @@ if __name__ == "__main__":
             else:
                 taxa_mutacao = round(1 - (rede_neural.geracao / 100), 1)
             escala_mutacao = taxa_mutacao
-
+            if mutacao_fixa:
+                taxa_mutacao, escala_mutacao = mutacao_fixa
+
+            """Pais das mutações: o melhor por fitness ou os escolhidos pelo comportamento na geração"""
+            pais = None
+            if selecao is not None:
+                pais = selecao.seleciona(
+                    comportamento.descritores(),
+                    [dino.individuo for dino in lista_dinos],
+                    np.array([dino.individuo.fitness for dino in lista_dinos]),
+                    np.array([dino.pontos for dino in lista_dinos])
+                )
+                comportamento.reinicia()
+
+            if exportador:
+                lista_fitness = np.array([dino.individuo.fitness for dino in lista_dinos])
+                tempo_geracao = time.perf_counter() - inicio_geracao
+                exportador.registra({
+                    "geracao": rede_neural.geracao,
+                    "melhor_fitness": melhor_dino.individuo.fitness,
+                    "fitness_medio": float(lista_fitness.mean()),
+                    "fitness_mediano": float(np.median(lista_fitness)),
+                    "pontos": rede_neural.lista_pontos[-1],
+                    "frames": frames_geracao,
+                    "tempo": tempo_geracao,
+                    "frames_por_segundo": frames_geracao / tempo_geracao,
+                    "taxa_mutacao": taxa_mutacao,
+                    "diversidade": diversidade(pesos_populacao, bias_populacao),
+                    **(selecao.resumo() if selecao is not None else {}),
+                })
+            inicio_geracao = time.perf_counter()
+            frames_geracao = 0
+
+            if hall_da_fama:
+                """O melhor (o que gera a próxima geração) fica em primeiro, seguido dos outros por fitness e pontos"""
+                ranking = sorted(lista_dinos, key=lambda dino: (dino.individuo.fitness, dino.pontos), reverse=True)
+                ranking = [melhor_dino] + [dino for dino in ranking if dino is not melhor_dino][:args.hall_k - 1]
+                ids = hall_da_fama.registra_geracao(
+                    rede_neural.geracao,
+                    rede_neural.lista_neuronios,
+                    [(dino.individuo.fitness, dino.pontos, dino.individuo) for dino in ranking],
+                    pai=id_pai
+                )
+                id_pai = ids[0]
+
+            individuo_elite = melhor_dino.individuo
+            fitness_elite = melhor_dino.individuo.fitness
             melhor_dino.individuo.fitness = 0
             
             for dino in lista_dinos:
                 dino.set_cor()
-                dino.morreu = False
-                dino.rect.x = 50
+                dino.reinicia()
                 if dino != melhor_dino:
-                    dino.individuo = rede_neural.mutacao(melhor_dino.individuo, taxa_mutacao, escala_mutacao)
+                    pai = melhor_dino.individuo if pais is None else pais[randrange(len(pais))]
+                    dino.individuo = rede_neural.mutacao(pai, taxa_mutacao, escala_mutacao)
 
             rede_neural.lista_pontos.append(0)
 
@@ -741,66 +1099,59 @@ if __name__ == "__main__":
 
             lista_dinos_vivos = lista_dinos.copy()
             vivos = len_lista_dinos
+            pesos_populacao, bias_populacao = rede_neural.empilha([dino.individuo for dino in lista_dinos])
 
-            """config do jogo"""
+            """config do jogo; o cenário é montado no começo do próximo frame"""
             cenario_velocidade = 5
+            nova_geracao = True
 
-            for _ in range(len(lista_obstaculos_tela)):
-                lista_obstaculos_espera.append(lista_obstaculos_tela.pop(0))
-            
-            for indice_tela in range(4):
-                indice_espera = 0
-                while nome_da_classe(lista_obstaculos_espera[indice_espera]) != "Cacto":
-                    indice_espera += 1
-
-                lista_obstaculos_espera[indice_espera].set_image()
-                if indice_tela == 0:
-                    lista_obstaculos_espera[indice_espera].rect.x = LARGURA_TELA
-                else:
-                    set_posicao_x(lista_obstaculos_espera[indice_espera])
-
-                lista_obstaculos_tela.append(lista_obstaculos_espera.pop(indice_espera))
-
-            for pterossauro in lista_obstaculos_espera:
-                pterossauro.rect.right = 0
-
-            for indice, chao in enumerate(lista_chao):
-                chao.image = chao.sprite_list[randint(0,3)]
-                chao.rect.x = 60 * indice
-
-            for nuvem in lista_nuvem:
-                nuvem.rect.right = 0
+        """Desenha as mensagens na tela (no modo "nenhum" a janela fica com o último frame desenhado)"""
+        perfil.etapa("textos")
+        if modo_render != "nenhum":
+            texto_pontos = exibe_mensagem(f"pontos: {rede_neural.lista_pontos[-1]}", 30, AZUL)
+            tela.blit(texto_pontos, (130,320))
 
-            cacto = lista_obstaculos_tela[0]
-            cacto.rect.size = (73,47)
-            cacto.rect.bottom = cacto.y_inicial
-            cacto.image = cacto.sprite_list[4]
+            texto_tempo = exibe_mensagem(f"tempo: {minutos}:{segundos}", 20, PRETO)
+            tela.blit(texto_tempo, (450,350))
 
-        """Desenha as mensagens na tela"""
-        texto_pontos = exibe_mensagem(f"pontos: {rede_neural.lista_pontos[-1]}", 30, AZUL)
-        tela.blit(texto_pontos, (130,320))
-
-        texto_tempo = exibe_mensagem(f"tempo: {minutos}:{segundos}", 20, PRETO)
-        tela.blit(texto_tempo, (450,350))
-
-        texto_geracao = exibe_mensagem(f"geracao: {rede_neural.geracao}", 20, PRETO)
-        tela.blit(texto_geracao, (650,350))
-        
-        texto_vivos = exibe_mensagem(f"vivos: {vivos}", 20, PRETO)
-        tela.blit(texto_vivos, (850,350))
+            texto_geracao = exibe_mensagem(f"geracao: {rede_neural.geracao}", 20, PRETO)
+            tela.blit(texto_geracao, (650,350))
+            
+            texto_vivos = exibe_mensagem(f"vivos: {vivos}", 20, PRETO)
+            tela.blit(texto_vivos, (850,350))
 
-        texto_fps = exibe_mensagem(f"Fps: {relogio.get_fps():.2f}", 15, PRETO)
-        tela.blit(texto_fps, (920,20))
+            texto_fps = exibe_mensagem(f"Fps: {relogio.get_fps():.2f}", 15, PRETO)
+            tela.blit(texto_fps, (920,20))
 
         """Atualiza e as sprites na tela"""
+        perfil.etapa("sprites")
         group_sprites.update()
         group_obstaculos.update()
 
         """Desenha as sprites na tela"""
-        group_sprites.draw(tela)
-        group_obstaculos.draw(tela)
-        rede_neural.draw(tela, entradas, saida, (10,10))
-
-        """Atualiza a tela e o relógio do jogo"""
-        pygame.display.flip()
-        relogio.tick(60)
+        if modo_render != "nenhum":
+            group_sprites.draw(tela)
+            group_obstaculos.draw(tela)
+        if modo_render == "completo":
+            rede_neural.draw(tela, entradas, saida, (10,10))
+
+        """Atualiza a tela, o som e o relógio do jogo (o multiplicador do canal de controle muda o limite de frames)"""
+        perfil.etapa("tela")
+        if modo_render != "nenhum":
+            pygame.display.flip()
+        recursos.audio.atualiza()
+        recursos.marca_primeiro_frame(args.tempo_inicio)
+        relogio.tick(60 * multiplicador_velocidade)
+        perfil.fim_frame()
+
+        """Benchmark de alocações: para depois dos frames pedidos e falha se passar do orçamento"""
+        if args.benchmark_alocacoes and perfil.frames >= args.benchmark_alocacoes:
+            print(perfil.relatorio())
+            if exportador:
+                exportador.fecha()
+            if hall_da_fama:
+                hall_da_fama.fecha()
+            if controle:
+                controle.fecha()
+            pygame.quit()
+            sys.exit(0 if perfil.dentro_do_orcamento() else 1)
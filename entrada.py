@@ -0,0 +1,134 @@
+import pygame, time
+from collections import deque
+
+"""Modos de ritmo do loop: tick é o relogio.tick original, busy usa tick_busy_loop, agenda dorme até perto do
+próximo frame e termina a espera lendo eventos, vsync deixa o display.flip esperar o monitor"""
+RITMOS = ["tick", "busy", "agenda", "vsync"]
+
+class EntradaJogador:
+    """Entrada do jogador com passo fixo de simulação. Cada evento recebe o horário em que foi lido e é
+    aplicado no passo de simulação em que aconteceu; as teclas seguradas são acompanhadas pelos eventos
+    de KEYDOWN/KEYUP, sem consultar pygame.key.get_pressed várias vezes por frame.
+
+    Também mede a latência entre cada tecla pressionada e o display.flip do frame que mostra o seu efeito.
+    O pygame não guarda o horário dos eventos, então eles são marcados quando são lidos: nos ritmos agenda e
+    vsync a fila é lida durante a espera (precisão de ~1 ms); nos ritmos tick e busy ela só é lida no começo
+    do frame e a latência medida fica menor do que a real."""
+    def __init__(self, fps:int=60, ritmo:str="tick", max_passos_frame:int=5, amostras:int=600):
+        """Inicializa o relógio, a fila de eventos e o histórico de latências."""
+        if ritmo not in RITMOS:
+            raise ValueError(f"ritmo desconhecido: {ritmo}")
+
+        self.fps = fps
+        # O relógio do pygame espera em milissegundos inteiros (16 ms para 60 fps); o passo usa o mesmo tempo
+        # para que cada frame simule exatamente um passo e o jogo tenha a mesma velocidade em todos os ritmos
+        self.passo = (1000 // fps) / 1000
+        self.ritmo = ritmo
+        self.max_passos_frame = max_passos_frame
+        self.relogio = pygame.time.Clock()
+        self.fila = deque()
+        self.teclas = set()
+        self.proximo_passo = None
+        self.proximo_frame = None
+        self.pendentes = []
+        self.latencias = deque(maxlen=amostras)
+        self.passos_ultimo_frame = 0
+
+    def coleta(self):
+        """Lê os eventos do pygame e guarda cada um com o horário da leitura."""
+        eventos = pygame.event.get()
+        if eventos:
+            agora = time.perf_counter()
+            for evento in eventos:
+                self.fila.append((agora, evento))
+
+    def passos(self) -> list:
+        """Retorna o horário de cada passo de simulação que já venceu (normalmente um por frame). Se o jogo ficar
+        mais de max_passos_frame passos atrasado, o atraso é descartado em vez de acelerar o jogo para alcançar.
+        Um passo que vence em até meio passo já é simulado, para que a variação do relógio não deixe um frame
+        sem passo (e a tecla esperando um frame inteiro). O último passo recebe o horário atual, para consumir
+        todos os eventos já lidos."""
+        agora = time.perf_counter()
+        if self.proximo_passo is None:
+            self.proximo_passo = agora
+
+        limite = agora + self.passo / 2
+        horarios = []
+        while self.proximo_passo <= limite and len(horarios) < self.max_passos_frame:
+            horarios.append(self.proximo_passo)
+            self.proximo_passo += self.passo
+
+        if self.proximo_passo <= agora:
+            self.proximo_passo = agora + self.passo
+
+        if horarios:
+            horarios[-1] = agora
+        self.passos_ultimo_frame = len(horarios)
+        return horarios
+
+    def eventos(self, horario:float) -> list:
+        """Retorna os eventos que aconteceram até o horário do passo, atualizando as teclas seguradas.
+        As teclas pressionadas entram na medição de latência até o próximo display.flip."""
+        eventos = []
+        while self.fila and self.fila[0][0] <= horario:
+            momento, evento = self.fila.popleft()
+            if evento.type == pygame.KEYDOWN:
+                self.teclas.add(evento.key)
+                self.pendentes.append(momento)
+            elif evento.type == pygame.KEYUP:
+                self.teclas.discard(evento.key)
+            eventos.append(evento)
+        return eventos
+
+    def pressionada(self, *teclas) -> bool:
+        """Indica se alguma das teclas está segurada no passo atual."""
+        return any(tecla in self.teclas for tecla in teclas)
+
+    def apos_flip(self):
+        """Registra a latência das teclas aplicadas neste frame, agora que ele foi enviado para a tela."""
+        if self.pendentes:
+            agora = time.perf_counter()
+            self.latencias.extend(agora - momento for momento in self.pendentes)
+            self.pendentes.clear()
+
+    def espera(self):
+        """Espera o próximo frame de acordo com o ritmo escolhido."""
+        if self.ritmo == "tick":
+            self.relogio.tick(self.fps)
+        elif self.ritmo == "busy":
+            self.relogio.tick_busy_loop(self.fps)
+        elif self.ritmo == "vsync":
+            # O display.flip já esperou o monitor; só lê os eventos que chegaram nesse tempo
+            self.coleta()
+            self.relogio.tick()
+        else:
+            agora = time.perf_counter()
+            if self.proximo_frame is None or self.proximo_frame < agora - self.passo:
+                self.proximo_frame = agora
+
+            # Dorme em pedaços de 1 ms até faltar pouco e termina em espera ativa, lendo os eventos
+            while True:
+                self.coleta()
+                restante = self.proximo_frame - time.perf_counter()
+                if restante <= 0:
+                    break
+                if restante > 0.002:
+                    time.sleep(0.001)
+
+            self.proximo_frame += self.passo
+            self.relogio.tick()
+
+    def get_fps(self) -> float:
+        """Retorna o fps medido pelo relógio."""
+        return self.relogio.get_fps()
+
+    def percentis(self) -> dict:
+        """Retorna os percentis 50, 95 e 99 da latência (em ms) das últimas teclas e a quantidade de amostras."""
+        if not self.latencias:
+            return {"p50": 0.0, "p95": 0.0, "p99": 0.0, "amostras": 0}
+
+        ordenadas = sorted(self.latencias)
+        def percentil(p):
+            return ordenadas[min(len(ordenadas) - 1, int(p / 100 * len(ordenadas)))] * 1000
+
+        return {"p50": percentil(50), "p95": percentil(95), "p99": percentil(99), "amostras": len(ordenadas)}
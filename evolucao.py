@@ -0,0 +1,264 @@
+import time, numpy as np
+from ambiente import DinoVecEnv, acoes_da_saida, PONTOS_POR_VELOCIDADE, VELOCIDADE_MAXIMA
+from dino_IA import RedeNeural, Individuo, DESCRICAO_SENSORES, salva_json
+from metricas import diversidade
+from quantizacao import PopulacaoQuantizada, PRECISOES
+
+def taxa_mutacao(fitness:int, geracao:int, limiar:int=90, taxa_final:float=0.1, decaimento:int=100) -> float:
+    """Mesma regra do dino_IA.py (com os valores padrão): mutação pequena (taxa_final) quando o melhor já passou
+    por 'limiar' pterossauros, senão a taxa cai de 1 até 0 em 'decaimento' gerações, arredondada em 0.1."""
+    if fitness >= limiar:
+        return taxa_final
+    return round(1 - (geracao / decaimento), 1)
+
+def agrega_fitness(valores:np.ndarray, agregacao:str="media", alfa:float=0.25) -> np.ndarray:
+    """Agrega os resultados (indivíduo, pista) de cada indivíduo em um único valor: a média, o mínimo ou o
+    CVaR (média dos alfa piores resultados), que pune indivíduos que só vão bem em algumas pistas."""
+    if agregacao == "media":
+        return valores.mean(axis=1)
+    if agregacao == "minimo":
+        return valores.min(axis=1).astype(np.float64)
+    if agregacao == "cvar":
+        piores = max(1, int(np.ceil(alfa * valores.shape[1])))
+        return np.sort(valores, axis=1)[:,:piores].mean(axis=1)
+    raise ValueError(f"agregação desconhecida: {agregacao}")
+
+def seleciona_melhor(fitness:np.ndarray, pontos:np.ndarray) -> int:
+    """Escolhe o melhor indivíduo como no fim de geração do dino_IA.py: o último a morrer, a não ser
+    que outro tenha fitness maior (nesse caso o primeiro com o maior fitness)."""
+    ultimo = np.flatnonzero(pontos == pontos.max())[-1]
+    if fitness.max() > fitness[ultimo]:
+        return int(np.argmax(fitness))
+    return int(ultimo)
+
+class Populacao:
+    """Pesos e biases de todos os indivíduos empilhados em arrays (indivíduo, entrada, saída),
+    permitindo calcular a saída da população inteira com um único forward por camada."""
+    def __init__(self, neuronios:list, tamanho:int, rng:np.random.Generator):
+        """Inicializa a população com pesos e biases aleatórios (distribuição normal, como o individuo_random)
+        e os buffers de ativação de cada camada."""
+        self.neuronios = list(neuronios)
+        self.tamanho = tamanho
+        self.pesos = [rng.standard_normal((tamanho, entrada, saida)) for entrada, saida in zip(neuronios[:-1], neuronios[1:])]
+        self.bias = [rng.standard_normal((tamanho, saida)) for saida in neuronios[1:]]
+        self.buffers = {}
+
+    def forward(self, entradas:np.ndarray, indices:np.ndarray=None) -> np.ndarray:
+        """Calcula a camada de saída de cada indivíduo para as suas entradas: uma matriz (indivíduo, sensores)
+        ou, com várias pistas por indivíduo, (indivíduo, pista, sensores). A saída tem o mesmo formato.
+        Com 'indices' a primeira dimensão das entradas segue esses indivíduos (podem repetir), sem os buffers."""
+        x = entradas[:,None,:] if entradas.ndim == 2 else entradas
+        if indices is not None:
+            for pesos, bias in zip(self.pesos, self.bias):
+                x = np.maximum(np.matmul(x, pesos[indices]) + bias[indices][:,None,:], 0)
+            return x[:,0,:] if entradas.ndim == 2 else x
+
+        buffers = self.buffers.get(x.shape[1])
+        if buffers is None:
+            buffers = [np.zeros((self.tamanho, x.shape[1], saida)) for saida in self.neuronios[1:]]
+            self.buffers[x.shape[1]] = buffers
+
+        for pesos, bias, ativacao in zip(self.pesos, self.bias, buffers):
+            np.matmul(x, pesos, out=ativacao)
+            ativacao += bias[:,None,:]
+            np.maximum(ativacao, 0, out=ativacao)
+            x = ativacao
+        return x[:,0,:] if entradas.ndim == 2 else x
+
+    def individuo(self, indice:int) -> Individuo:
+        """Retorna uma cópia do indivíduo na posição indicada no formato usado pelo jogo."""
+        return Individuo([pesos[indice].copy() for pesos in self.pesos], [bias[indice].copy() for bias in self.bias])
+
+    def define(self, indice:int, individuo:Individuo):
+        """Copia os pesos e biases do indivíduo para a posição indicada."""
+        for camada in range(len(self.pesos)):
+            self.pesos[camada][indice] = individuo.pesos[camada]
+            self.bias[camada][indice] = individuo.bias[camada]
+
+    def vetor(self, indice:int) -> np.ndarray:
+        """Retorna todos os parâmetros do indivíduo em um único vetor (pesos e bias de cada camada, em ordem)."""
+        partes = []
+        for pesos, bias in zip(self.pesos, self.bias):
+            partes.append(pesos[indice].ravel())
+            partes.append(bias[indice])
+        return np.concatenate(partes)
+
+    def define_vetor(self, indice:int, vetor:np.ndarray):
+        """Copia para a posição indicada um vetor de parâmetros no formato de Populacao.vetor."""
+        posicao = 0
+        for pesos, bias in zip(self.pesos, self.bias):
+            tamanho = pesos[indice].size
+            pesos[indice] = vetor[posicao:posicao+tamanho].reshape(pesos[indice].shape)
+            posicao += tamanho
+            tamanho = bias[indice].size
+            bias[indice] = vetor[posicao:posicao+tamanho]
+            posicao += tamanho
+
+    def repovoa(self, elite:int, taxa_mutacao:float, escala_mutacao:float, rng:np.random.Generator):
+        """Coloca a elite na posição 0 e preenche as outras com mutações dela: cada parâmetro muda com
+        probabilidade taxa_mutacao somando um valor normal vezes escala_mutacao, como RedeNeural.mutacao."""
+        for parametros in self.pesos + self.bias:
+            original = parametros[elite].copy()
+            mascara = rng.random(parametros.shape) < taxa_mutacao
+            parametros[:] = original + mascara * rng.standard_normal(parametros.shape) * escala_mutacao
+            parametros[0] = original
+
+class Treinador:
+    """Algoritmo evolutivo do dino_IA.py rodando sem tela: cada geração avalia a população inteira no
+    DinoVecEnv (todos nas mesmas pistas, como no jogo), escolhe o melhor e gera a próxima população por mutação.
+
+    Com cursos > 1 cada indivíduo joga várias pistas ao mesmo tempo (um segundo eixo de lote ao lado da população)
+    e o fitness é agregado entre elas (média, mínimo ou CVaR), para que uma pista de sorte não escolha um elite fraco.
+    Com cursos_fixos as pistas são sorteadas uma vez e repetidas em todas as gerações."""
+    def __init__(self, neuronios:list=None, tamanho:int=500, semente:int=None, max_passos:int=None,
+                 individuo_inicial:Individuo=None, geracao:int=0, guarda_melhores:int=5,
+                 cursos:int=1, cursos_fixos:bool=False, agregacao:str="media", alfa:float=0.25,
+                 limiar_mutacao:int=90, taxa_final:float=0.1, decaimento_mutacao:int=100,
+                 pontos_por_velocidade:int=PONTOS_POR_VELOCIDADE, velocidade_maxima:int=VELOCIDADE_MAXIMA,
+                 precisao:str="float64", eventos:bool=False, jit:bool=False):
+        """Inicializa a população (aleatória ou a partir de um indivíduo salvo), o gerador de números aleatórios
+        e uma RedeNeural com os dados do gráfico, para que o melhor possa ser salvo no formato do save.json.
+        Os parâmetros de mutação e de velocidade têm como padrão os valores fixos do dino_IA.py.
+        Com precisao "float16" ou "int8" a avaliação usa uma cópia quantizada da população (quantizacao.py).
+        Com eventos a avaliação pula de uma vez os frames sem decisão nova (DinoVecEnv.passo_por_eventos).
+        Com jit a avaliação em float64 sem observador roda no núcleo do Numba (nucleo_jit.py), se ele estiver
+        instalado; sem o Numba continua no laço do NumPy, com o mesmo resultado."""
+        neuronios = neuronios or [len(DESCRICAO_SENSORES), 6, 2]
+        self.rng = np.random.default_rng(semente)
+        self.tamanho = tamanho
+        self.max_passos = max_passos
+        self.guarda_melhores = guarda_melhores
+        self.cursos = cursos
+        self.agregacao = agregacao
+        self.alfa = alfa
+        agrega_fitness(np.zeros((1, cursos)), agregacao, alfa)
+        self.cronograma_mutacao = {"limiar": limiar_mutacao, "taxa_final": taxa_final, "decaimento": decaimento_mutacao}
+        self.pontos_por_velocidade = pontos_por_velocidade
+        self.velocidade_maxima = velocidade_maxima
+        if precisao not in PRECISOES:
+            raise ValueError(f"precisão desconhecida: {precisao}")
+        self.precisao = precisao
+        self.eventos = eventos
+        self.jit = False
+        if jit:
+            from nucleo_jit import NUMBA_DISPONIVEL
+            if not NUMBA_DISPONIVEL:
+                print("numba não está instalado, a avaliação continua no laço do NumPy")
+            self.jit = NUMBA_DISPONIVEL
+
+        self.sementes_cursos = None
+        if cursos_fixos:
+            self.sementes_cursos = self.rng.integers(0, 2**63, size=cursos, dtype=np.uint64)
+
+        self.rede = RedeNeural(neuronios[0], list(neuronios[1:-1]), neuronios[-1], DESCRICAO_SENSORES)
+        self.rede.geracao = geracao
+        self.rede.lista_pontos = []
+        self.rede.escala_grafico = 5
+
+        self.populacao = Populacao(neuronios, tamanho, self.rng)
+        self.melhor = None
+        self.melhores = []
+
+        """Função chamada depois de cada frame da avaliação com (treinador, env, saida), usada pelo visualizador"""
+        self.observador = None
+
+        if individuo_inicial is not None:
+            self.populacao.define(0, individuo_inicial)
+            taxa = taxa_mutacao(individuo_inicial.fitness, geracao, **self.cronograma_mutacao)
+            self.populacao.repovoa(0, taxa, taxa, self.rng)
+
+    def avalia(self, sementes:np.ndarray) -> tuple:
+        """Roda a população inteira em todas as pistas das sementes ao mesmo tempo (o jogo do indivíduo p na
+        pista k fica na posição p * cursos + k do ambiente) até todos morrerem (ou até max_passos) e retorna
+        o fitness e os pontos no formato (indivíduo, pista) e o total de frames simulados."""
+        cursos = len(sementes)
+        env = DinoVecEnv(self.tamanho * cursos, sementes=np.tile(np.asarray(sementes, dtype=np.uint64), self.tamanho),
+                         auto_reset=False, max_passos=self.max_passos,
+                         pontos_por_velocidade=self.pontos_por_velocidade, velocidade_maxima=self.velocidade_maxima)
+        if self.jit and self.precisao == "float64" and self.observador is None:
+            from nucleo_jit import joga_populacao
+            frames = joga_populacao(env, self.populacao.pesos, self.populacao.bias, cursos, jit=True)
+            return env.fitness.reshape(self.tamanho, cursos), env.pontos.reshape(self.tamanho, cursos), frames
+
+        forward = self.populacao.forward
+        if self.precisao != "float64":
+            forward = PopulacaoQuantizada(self.populacao.pesos, self.populacao.bias, self.precisao).forward
+
+        def decide(jogos:np.ndarray, sensores:np.ndarray) -> np.ndarray:
+            """Ações dos frames calmos de cada jogo, com os pesos do indivíduo dono do jogo"""
+            saida = forward(sensores, indices=jogos // cursos)
+            return acoes_da_saida(saida.reshape(-1, saida.shape[-1])).reshape(sensores.shape[:2])
+
+        frames = 0
+        while env.vivo.any():
+            saida = forward(env.observacoes.reshape(self.tamanho, cursos, -1))
+            acoes = acoes_da_saida(saida.reshape(self.tamanho * cursos, -1))
+            if self.eventos:
+                _, avancados = env.passo_por_eventos(acoes, decide)
+                frames += int(avancados.sum())
+            else:
+                frames += int(env.vivo.sum())
+                env.step(acoes)
+            if self.observador is not None:
+                self.observador(self, env, saida)
+        return env.fitness.reshape(self.tamanho, cursos), env.pontos.reshape(self.tamanho, cursos), frames
+
+    def executa_geracao(self) -> dict:
+        """Avalia a geração atual, guarda o melhor e os primeiros do ranking, cria a próxima geração
+        e retorna as estatísticas da geração avaliada."""
+        inicio = time.perf_counter()
+        sementes = self.sementes_cursos
+        if sementes is None:
+            sementes = self.rng.integers(0, 2**63, size=self.cursos, dtype=np.uint64)
+        fitness_cursos, pontos_cursos, frames = self.avalia(sementes)
+
+        """Com uma pista os valores continuam inteiros, como no jogo"""
+        if self.cursos == 1:
+            fitness, pontos = fitness_cursos[:,0], pontos_cursos[:,0]
+        else:
+            fitness = agrega_fitness(fitness_cursos, self.agregacao, self.alfa)
+            pontos = agrega_fitness(pontos_cursos, self.agregacao, self.alfa)
+
+        elite = seleciona_melhor(fitness, pontos)
+        ranking = np.lexsort((-pontos, -fitness))[:self.guarda_melhores]
+        self.melhores = [(fitness[indice].item(), self.populacao.vetor(indice)) for indice in ranking]
+
+        self.melhor = self.populacao.individuo(elite)
+        self.melhor.fitness = fitness[elite].item()
+
+        taxa = taxa_mutacao(self.melhor.fitness, self.rede.geracao, **self.cronograma_mutacao)
+        diversidade_populacao = diversidade(self.populacao.pesos, self.populacao.bias)
+        self.populacao.repovoa(elite, taxa, taxa, self.rng)
+
+        tempo = time.perf_counter() - inicio
+        estatisticas = {
+            "geracao": self.rede.geracao,
+            "melhor_fitness": self.melhor.fitness,
+            "fitness_medio": float(fitness.mean()),
+            "fitness_mediano": float(np.median(fitness)),
+            "pontos": pontos.max().item(),
+            "pontos_medio": float(pontos.mean()),
+            "cursos": self.cursos,
+            "frames": frames,
+            "tempo": tempo,
+            "frames_por_segundo": frames / tempo,
+            "taxa_mutacao": taxa,
+            "diversidade": diversidade_populacao,
+        }
+
+        self.rede.lista_pontos.append(round(pontos.max().item()))
+        self.rede.escala_grafico = max(5, round(max(self.rede.lista_pontos) / 300 + 0.005, 2))
+        self.rede.geracao += 1
+        return estatisticas
+
+    def recebe_migrantes(self, vetores:list):
+        """Coloca indivíduos vindos de outra população nas últimas posições, para competirem na próxima geração."""
+        for deslocamento, vetor in enumerate(vetores[:self.tamanho - 1]):
+            self.populacao.define_vetor(self.tamanho - 1 - deslocamento, vetor)
+
+    def salva(self, caminho:str="save.json"):
+        """Salva o melhor indivíduo no formato do save.json, pronto para continuar no dino_IA.py."""
+        pontos = self.rede.lista_pontos
+        self.rede.lista_pontos = pontos + [0]
+        salva_json(self.rede, self.melhor, caminho)
+        self.rede.lista_pontos = pontos
@@ -0,0 +1,194 @@
+"""Hall da fama: arquivo SQLite com os melhores indivíduos de cada geração, para que boas linhagens não se
+percam quando a geração seguinte é sobrescrita pelas mutações do melhor.
+
+    python hall_da_fama.py                          # lista os 10 melhores do arquivo
+    python hall_da_fama.py --geracao 40             # os melhores da geração 40
+    python hall_da_fama.py --exporta 123 save.json  # continua o treino a partir do indivíduo 123
+"""
+import argparse, json, sqlite3, sys, numpy as np
+from dino_IA import Individuo, RedeNeural, DESCRICAO_SENSORES, salva_json
+
+ESQUEMA = """
+CREATE TABLE IF NOT EXISTS individuos (
+    id INTEGER PRIMARY KEY,
+    geracao INTEGER NOT NULL,
+    posicao INTEGER NOT NULL,
+    fitness INTEGER NOT NULL,
+    pontos INTEGER NOT NULL,
+    pai INTEGER REFERENCES individuos(id),
+    neuronios TEXT NOT NULL,
+    parametros BLOB NOT NULL
+);
+CREATE INDEX IF NOT EXISTS individuos_fitness ON individuos (neuronios, fitness DESC, pontos DESC);
+CREATE INDEX IF NOT EXISTS individuos_geracao ON individuos (geracao, posicao);
+"""
+
+def vetor_individuo(individuo:Individuo) -> np.ndarray:
+    """Junta os pesos e biases do indivíduo em um único vetor (pesos e bias de cada camada, em ordem),
+    o mesmo formato de evolucao.Populacao.vetor."""
+    partes = []
+    for pesos, bias in zip(individuo.pesos, individuo.bias):
+        partes.append(np.asarray(pesos, dtype=np.float64).ravel())
+        partes.append(np.asarray(bias, dtype=np.float64).ravel())
+    return np.concatenate(partes)
+
+def individuo_do_vetor(vetor:np.ndarray, neuronios:list) -> Individuo:
+    """Monta um indivíduo a partir do vetor de parâmetros de uma rede com essa topologia."""
+    pesos = []
+    bias = []
+    posicao = 0
+    for entrada, saida in zip(neuronios[:-1], neuronios[1:]):
+        pesos.append(vetor[posicao:posicao + entrada * saida].reshape(entrada, saida).copy())
+        posicao += entrada * saida
+        bias.append(vetor[posicao:posicao + saida].copy())
+        posicao += saida
+    return Individuo(pesos, bias)
+
+class HallDaFama:
+    """Arquivo SQLite com os K melhores indivíduos de cada geração (fitness, pontos, geração, posição no ranking
+    e o id do pai), indexado por fitness e por geração."""
+    def __init__(self, caminho:str="hall_da_fama.db"):
+        """Abre (ou cria) o arquivo e as tabelas."""
+        self.caminho = caminho
+        self.conexao = sqlite3.connect(caminho)
+        self.conexao.executescript(ESQUEMA)
+
+    def registra_geracao(self, geracao:int, neuronios:list, individuos:list, pai:int=None) -> list:
+        """Grava os indivíduos da geração em uma única transação. individuos é uma lista de (fitness, pontos, indivíduo)
+        já ordenada do melhor para o pior; pai é o id do indivíduo do qual a geração foi criada.
+        Retorna os ids gravados, na mesma ordem."""
+        topologia = json.dumps(list(neuronios))
+        with self.conexao:
+            ids = []
+            for posicao, (fitness, pontos, individuo) in enumerate(individuos):
+                cursor = self.conexao.execute(
+                    "INSERT INTO individuos (geracao, posicao, fitness, pontos, pai, neuronios, parametros) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    (geracao, posicao, int(fitness), int(pontos), pai, topologia, vetor_individuo(individuo).astype("<f8").tobytes())
+                )
+                ids.append(cursor.lastrowid)
+        return ids
+
+    def melhores(self, quantidade:int=10, neuronios:list=None, geracao:int=None) -> list:
+        """Retorna os registros (id, geracao, posicao, fitness, pontos, pai, neuronios) dos melhores indivíduos,
+        opcionalmente só de uma topologia ou de uma geração."""
+        condicoes = []
+        valores = []
+        if neuronios is not None:
+            condicoes.append("neuronios = ?")
+            valores.append(json.dumps(list(neuronios)))
+        if geracao is not None:
+            condicoes.append("geracao = ?")
+            valores.append(geracao)
+
+        onde = f"WHERE {' AND '.join(condicoes)}" if condicoes else ""
+        return self.conexao.execute(
+            f"SELECT id, geracao, posicao, fitness, pontos, pai, neuronios FROM individuos {onde} "
+            "ORDER BY fitness DESC, pontos DESC LIMIT ?", (*valores, quantidade)
+        ).fetchall()
+
+    def individuo(self, id_individuo:int) -> tuple:
+        """Retorna (indivíduo, neurônios, fitness, geração) do registro com esse id."""
+        registro = self.conexao.execute(
+            "SELECT parametros, neuronios, fitness, geracao FROM individuos WHERE id = ?", (id_individuo,)
+        ).fetchone()
+        if registro is None:
+            raise KeyError(f"indivíduo {id_individuo} não está no hall da fama")
+
+        parametros, neuronios, fitness, geracao = registro
+        neuronios = json.loads(neuronios)
+        individuo = individuo_do_vetor(np.frombuffer(parametros, dtype="<f8"), neuronios)
+        individuo.fitness = fitness
+        return individuo, neuronios, fitness, geracao
+
+    def carrega_populacao(self, quantidade:int, neuronios:list) -> list:
+        """Carrega de uma vez os melhores indivíduos já arquivados com essa topologia (sem repetir parâmetros iguais),
+        para começar uma nova população. Retorna uma lista de (id, indivíduo)."""
+        registros = self.conexao.execute(
+            "SELECT id, fitness, parametros FROM individuos WHERE neuronios = ? ORDER BY fitness DESC, pontos DESC",
+            (json.dumps(list(neuronios)),)
+        )
+
+        populacao = []
+        vistos = set()
+        for id_individuo, fitness, parametros in registros:
+            if parametros in vistos:
+                continue
+            vistos.add(parametros)
+
+            individuo = individuo_do_vetor(np.frombuffer(parametros, dtype="<f8"), neuronios)
+            individuo.fitness = fitness
+            populacao.append((id_individuo, individuo))
+            if len(populacao) == quantidade:
+                break
+
+        return populacao
+
+    def elites(self, quantidade:int, neuronios:list=None) -> list:
+        """Retorna os ids dos elites (primeiro do ranking) de até 'quantidade' gerações espalhadas igualmente
+        do início ao fim do arquivo, da mais antiga para a mais recente. Sem topologia, usa a do melhor arquivado."""
+        if neuronios is None:
+            melhor = self.melhores(1)
+            if not melhor:
+                return []
+            neuronios = json.loads(melhor[0][6])
+
+        ids = [registro[0] for registro in self.conexao.execute(
+            "SELECT id FROM individuos WHERE posicao = 0 AND neuronios = ? ORDER BY geracao, id",
+            (json.dumps(list(neuronios)),)
+        )]
+        if len(ids) <= quantidade:
+            return ids
+        if quantidade == 1:
+            return ids[-1:]
+
+        passo = (len(ids) - 1) / (quantidade - 1)
+        return [ids[round(indice * passo)] for indice in range(quantidade)]
+
+    def linhagem(self, id_individuo:int) -> list:
+        """Retorna os ids da linhagem do indivíduo, dele até o primeiro ancestral arquivado."""
+        return [registro[0] for registro in self.conexao.execute(
+            "WITH RECURSIVE ancestrais(id, pai) AS ("
+            "SELECT id, pai FROM individuos WHERE id = ? "
+            "UNION ALL SELECT individuos.id, individuos.pai FROM individuos JOIN ancestrais ON individuos.id = ancestrais.pai"
+            ") SELECT id FROM ancestrais", (id_individuo,)
+        )]
+
+    def fecha(self):
+        """Fecha o arquivo."""
+        self.conexao.close()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Consulta o hall da fama do Dino I.A.")
+    parser.add_argument("--arquivo", default="hall_da_fama.db")
+    parser.add_argument("--quantidade", type=int, default=10)
+    parser.add_argument("--geracao", type=int, default=None, help="mostra apenas os melhores dessa geração")
+    parser.add_argument("--linhagem", type=int, default=None, metavar="ID", help="mostra os ancestrais do indivíduo")
+    parser.add_argument("--exporta", nargs=2, default=None, metavar=("ID", "SAVE"),
+                        help="grava o indivíduo no formato do save.json para continuar o treino a partir dele")
+    args = parser.parse_args()
+
+    hall = HallDaFama(args.arquivo)
+
+    if args.exporta:
+        id_individuo, caminho = int(args.exporta[0]), args.exporta[1]
+        try:
+            individuo, neuronios, fitness, geracao = hall.individuo(id_individuo)
+        except KeyError as erro:
+            print(erro.args[0])
+            sys.exit(1)
+
+        rede = RedeNeural(neuronios[0], neuronios[1:-1], neuronios[-1], DESCRICAO_SENSORES)
+        rede.geracao = geracao
+        rede.lista_pontos = [0]
+        rede.escala_grafico = 5
+        salva_json(rede, individuo, caminho)
+        print(f"Indivíduo {id_individuo} (geração {geracao}, fitness {fitness}) salvo em {caminho}")
+        sys.exit(0)
+
+    if args.linhagem is not None:
+        print(" <- ".join(str(id_individuo) for id_individuo in hall.linhagem(args.linhagem)))
+        sys.exit(0)
+
+    print(f"{'id':>6} {'geracao':>8} {'posicao':>8} {'fitness':>8} {'pontos':>8} {'pai':>6}  neuronios")
+    for id_individuo, geracao, posicao, fitness, pontos, pai, neuronios in hall.melhores(args.quantidade, geracao=args.geracao):
+        print(f"{id_individuo:>6} {geracao:>8} {posicao:>8} {fitness:>8} {pontos:>8} {pai if pai is not None else '-':>6}  {neuronios}")
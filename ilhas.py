@@ -0,0 +1,252 @@
+"""Evolução em ilhas: várias populações (processos, na mesma máquina ou em máquinas diferentes) evoluem
+separadas e trocam seus melhores indivíduos a cada algumas gerações por meio de um coordenador TCP.
+
+    python ilhas.py coordenador --porta 6000
+    python ilhas.py ilha --coordenador 192.168.0.10:6000 --id 0
+    python ilhas.py local --ilhas 4          # coordenador e 4 ilhas nesta máquina
+
+As mensagens são binárias: um cabeçalho fixo seguido dos parâmetros de cada indivíduo em float32.
+"""
+import argparse, asyncio, multiprocessing, queue, socket, struct, sys, threading, time, numpy as np
+from evolucao import Treinador
+from dino_IA import carrega_json, neuronios_salvos, Individuo
+
+MAGICO_MENSAGEM = b"DILH"
+
+"""Cabeçalho: mágico, ilha de origem, geração, quantidade de indivíduos, quantidade de camadas, frames simulados"""
+FORMATO_CABECALHO = "<4sHIHHQ"
+TAMANHO_CABECALHO = struct.calcsize(FORMATO_CABECALHO)
+
+def empacota(ilha:int, geracao:int, frames:int, neuronios:list, individuos:list) -> bytes:
+    """Monta a mensagem com a topologia da rede e, para cada indivíduo, o fitness e o vetor de parâmetros."""
+    partes = [
+        struct.pack(FORMATO_CABECALHO, MAGICO_MENSAGEM, ilha, geracao, len(individuos), len(neuronios), frames),
+        struct.pack(f"<{len(neuronios)}H", *neuronios),
+    ]
+    for fitness, vetor in individuos:
+        partes.append(struct.pack("<d", fitness))
+        partes.append(np.asarray(vetor, dtype="<f4").tobytes())
+    return b"".join(partes)
+
+def tamanho_vetor(neuronios:list) -> int:
+    """Quantidade de parâmetros (pesos e biases) de uma rede com essa topologia."""
+    return sum(entrada * saida + saida for entrada, saida in zip(neuronios[:-1], neuronios[1:]))
+
+def le_mensagem(leitura) -> tuple:
+    """Lê uma mensagem usando a função leitura(n) e retorna (ilha, geração, frames, neurônios, indivíduos)."""
+    magico, ilha, geracao, quantidade, camadas, frames = struct.unpack(FORMATO_CABECALHO, leitura(TAMANHO_CABECALHO))
+    if magico != MAGICO_MENSAGEM:
+        raise ValueError("mensagem inválida")
+
+    neuronios = list(struct.unpack(f"<{camadas}H", leitura(2 * camadas)))
+    parametros = tamanho_vetor(neuronios)
+
+    individuos = []
+    for _ in range(quantidade):
+        fitness, = struct.unpack("<d", leitura(8))
+        vetor = np.frombuffer(leitura(4 * parametros), dtype="<f4").astype(np.float64)
+        individuos.append((fitness, vetor))
+
+    return ilha, geracao, frames, neuronios, individuos
+
+class Coordenador:
+    """Recebe os melhores de cada ilha e responde com os melhores da ilha vizinha (topologia em anel,
+    na ordem dos ids), guardando o progresso de cada ilha para mostrar a vazão total."""
+    def __init__(self):
+        """Inicializa as tabelas de migrantes e de progresso por ilha."""
+        self.migrantes = {}
+        self.progresso = {}
+        self.inicio = time.perf_counter()
+
+    async def atende(self, leitor:asyncio.StreamReader, escritor:asyncio.StreamWriter):
+        """Atende uma ilha: cada mensagem recebida é respondida com os migrantes da ilha anterior no anel."""
+        try:
+            while True:
+                cabecalho = await leitor.readexactly(TAMANHO_CABECALHO)
+                _, ilha, _, quantidade, camadas, _ = struct.unpack(FORMATO_CABECALHO, cabecalho)
+                corpo = await leitor.readexactly(2 * camadas)
+                neuronios = struct.unpack(f"<{camadas}H", corpo)
+                corpo += await leitor.readexactly(quantidade * (8 + 4 * tamanho_vetor(neuronios)))
+
+                dados = memoryview(cabecalho + corpo)
+                posicao = [0]
+                def leitura(n):
+                    posicao[0] += n
+                    return dados[posicao[0]-n:posicao[0]]
+
+                ilha, geracao, frames, neuronios, individuos = le_mensagem(leitura)
+                self.migrantes[ilha] = (neuronios, individuos)
+                self.progresso[ilha] = (geracao, frames, max((fitness for fitness, _ in individuos), default=0))
+
+                ids = sorted(self.migrantes)
+                vizinha = ids[ids.index(ilha) - 1]
+                if vizinha == ilha or self.migrantes[vizinha][0] != neuronios:
+                    resposta = []
+                else:
+                    resposta = self.migrantes[vizinha][1]
+
+                escritor.write(empacota(vizinha, 0, 0, neuronios, resposta))
+                await escritor.drain()
+                self.mostra_progresso()
+        except (asyncio.IncompleteReadError, ConnectionError, ValueError):
+            pass
+        finally:
+            escritor.close()
+
+    def mostra_progresso(self):
+        """Imprime a geração e o melhor fitness de cada ilha e os frames simulados por segundo somando todas."""
+        frames = sum(frames for _, frames, _ in self.progresso.values())
+        tempo = time.perf_counter() - self.inicio
+        ilhas = ", ".join(f"{ilha}: g{geracao} f{melhor:g}" for ilha, (geracao, _, melhor) in sorted(self.progresso.items()))
+        print(f"[coordenador] {ilhas} | {frames / tempo:,.0f} frames/s no total")
+
+    async def serve(self, host:str, porta:int, pronto:threading.Event=None):
+        """Abre o servidor TCP e atende as ilhas até ser interrompido."""
+        servidor = await asyncio.start_server(self.atende, host, porta)
+        if pronto is not None:
+            pronto.set()
+        async with servidor:
+            await servidor.serve_forever()
+
+class ClienteIlha:
+    """Conexão de uma ilha com o coordenador, com envio e recebimento bloqueantes das mensagens."""
+    def __init__(self, host:str, porta:int, ilha:int):
+        """Conecta ao coordenador, tentando novamente por alguns segundos enquanto ele sobe."""
+        self.ilha = ilha
+        for tentativa in range(50):
+            try:
+                self.conexao = socket.create_connection((host, porta))
+                break
+            except ConnectionRefusedError:
+                if tentativa == 49:
+                    raise
+                time.sleep(0.1)
+        self.arquivo = self.conexao.makefile("rb")
+
+    def troca(self, geracao:int, frames:int, neuronios:list, individuos:list) -> list:
+        """Envia os melhores desta ilha e retorna os vetores dos migrantes recebidos."""
+        self.conexao.sendall(empacota(self.ilha, geracao, frames, neuronios, individuos))
+        _, _, _, _, migrantes = le_mensagem(self.arquivo.read)
+        return [vetor for _, vetor in migrantes]
+
+    def fecha(self):
+        """Fecha a conexão com o coordenador."""
+        self.arquivo.close()
+        self.conexao.close()
+
+def roda_ilha(host:str, porta:int, ilha:int, geracoes:int, tamanho:int, intervalo:int, migrantes:int,
+              camadas:list, checkpoint:str=None, saida:str=None, resultados=None, cursos:int=1, agregacao:str="media"):
+    """Loop de uma ilha: evolui a própria população e, a cada 'intervalo' gerações, envia os melhores
+    ao coordenador e coloca os migrantes recebidos na população."""
+    individuo_inicial = None
+    neuronios = [6] + camadas + [2]
+    geracao = 0
+
+    dados = carrega_json(checkpoint) if checkpoint else None
+    if dados:
+        neuronios = neuronios_salvos(dados)
+        geracao = dados["rede"]["geracao"]
+        individuo_inicial = Individuo(dados["individuo"]["pesos"], dados["individuo"]["bias"])
+        individuo_inicial.fitness = dados["individuo"]["fitness"]
+
+    treinador = Treinador(neuronios, tamanho, semente=None, individuo_inicial=individuo_inicial,
+                          geracao=geracao, guarda_melhores=migrantes, cursos=cursos, agregacao=agregacao)
+    cliente = ClienteIlha(host, porta, ilha)
+    frames = 0
+    inicio = time.perf_counter()
+
+    for numero in range(1, geracoes + 1):
+        estatisticas = treinador.executa_geracao()
+        frames += estatisticas["frames"]
+
+        if numero % intervalo == 0:
+            recebidos = cliente.troca(treinador.rede.geracao, frames, neuronios, treinador.melhores)
+            treinador.recebe_migrantes(recebidos)
+
+    cliente.fecha()
+    tempo = time.perf_counter() - inicio
+
+    if saida:
+        treinador.salva(saida)
+    if resultados is not None:
+        resultados.put((ilha, treinador.melhor.fitness, frames, tempo))
+
+    print(f"[ilha {ilha}] {geracoes} geracoes, melhor fitness {treinador.melhor.fitness}, {frames / tempo:,.0f} frames/s")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Evolução em ilhas do Dino I.A.")
+    parser.add_argument("modo", choices=["coordenador", "ilha", "local"])
+    parser.add_argument("--host", default="127.0.0.1", help="endereço em que o coordenador escuta")
+    parser.add_argument("--porta", type=int, default=6000)
+    parser.add_argument("--coordenador", default="127.0.0.1:6000", help="host:porta do coordenador (modo ilha)")
+    parser.add_argument("--id", type=int, default=0, help="id desta ilha (modo ilha)")
+    parser.add_argument("--ilhas", type=int, default=4, help="quantidade de ilhas (modo local)")
+    parser.add_argument("--geracoes", type=int, default=30)
+    parser.add_argument("--populacao", type=int, default=500)
+    parser.add_argument("--intervalo", type=int, default=5, help="gerações entre migrações")
+    parser.add_argument("--migrantes", type=int, default=5, help="indivíduos enviados em cada migração")
+    parser.add_argument("--camadas", type=int, nargs="+", default=[6])
+    parser.add_argument("--cursos", type=int, default=1, help="pistas jogadas por cada indivíduo em cada geração")
+    parser.add_argument("--agregacao", choices=["media", "minimo", "cvar"], default="media",
+                        help="como o fitness das pistas é agregado")
+    parser.add_argument("--checkpoint", default=None, help="save.json usado para começar cada ilha")
+    parser.add_argument("--saida", default=None, help="arquivo onde o melhor indivíduo é salvo no final")
+    args = parser.parse_args()
+
+    if args.modo == "coordenador":
+        try:
+            asyncio.run(Coordenador().serve(args.host, args.porta))
+        except KeyboardInterrupt:
+            pass
+        sys.exit(0)
+
+    if args.modo == "ilha":
+        host, porta = args.coordenador.rsplit(":", 1)
+        roda_ilha(host, int(porta), args.id, args.geracoes, args.populacao, args.intervalo, args.migrantes,
+                  args.camadas, args.checkpoint, args.saida, None, args.cursos, args.agregacao)
+        sys.exit(0)
+
+    """Modo local: coordenador em uma thread e cada ilha em um processo"""
+    pronto = threading.Event()
+    coordenador = Coordenador()
+    threading.Thread(target=lambda: asyncio.run(coordenador.serve(args.host, args.porta, pronto)), daemon=True).start()
+    pronto.wait()
+
+    resultados = multiprocessing.Queue()
+    processos = []
+    for ilha in range(args.ilhas):
+        saida = f"ilha_{ilha}.json" if args.saida else None
+        processo = multiprocessing.Process(target=roda_ilha, args=(
+            args.host, args.porta, ilha, args.geracoes, args.populacao, args.intervalo, args.migrantes,
+            args.camadas, args.checkpoint, saida, resultados, args.cursos, args.agregacao
+        ))
+        processo.start()
+        processos.append(processo)
+
+    """Espera o resultado de cada ilha, conferindo a cada segundo se alguma morreu antes de mandar o seu"""
+    finais = []
+    while len(finais) < len(processos):
+        try:
+            finais.append(resultados.get(timeout=1))
+            continue
+        except queue.Empty:
+            pass
+        terminadas = {final[0] for final in finais}
+        mortas = [ilha for ilha, processo in enumerate(processos)
+                  if processo.exitcode not in (None, 0) and ilha not in terminadas]
+        if mortas:
+            for processo in processos:
+                processo.terminate()
+            codigos = ", ".join(f"ilha {ilha} (código {processos[ilha].exitcode})" for ilha in mortas)
+            raise SystemExit(f"erro: terminou sem mandar o resultado: {codigos}")
+    for processo in processos:
+        processo.join()
+
+    frames = sum(frames for _, _, frames, _ in finais)
+    tempo = max(tempo for _, _, _, tempo in finais)
+    melhor = max(finais, key=lambda final: final[1])
+    print(f"{args.ilhas} ilhas: {frames / tempo:,.0f} frames/s no total, melhor fitness {melhor[1]} (ilha {melhor[0]})")
+
+    if args.saida:
+        import shutil
+        shutil.copyfile(f"ilha_{melhor[0]}.json", args.saida)
@@ -0,0 +1,181 @@
+"""Treino por imitação: ajusta os pesos e biases da rede neural às demonstrações gravadas no player_vs_IA.py
+(--grava-demonstracoes) com descida de gradiente em mini-lotes, só com NumPy, e salva um checkpoint no
+formato do save.json para a evolução começar de um indivíduo que já sabe jogar.
+
+    python player_vs_IA.py --grava-demonstracoes demos.bin
+    python imitacao.py demos.bin --saida save.json
+    python dino_IA.py --retoma elite                  # evolui a partir do indivíduo treinado
+
+A rede do jogo aplica ReLU também na camada de saída e escolhe pular se saida[0] > saida[1], agachar se
+saida[0] < saida[1] e correr se forem iguais (na prática, as duas zeradas pela ReLU). O treino usa uma perda
+de margem sobre a saída antes da ReLU que pede exatamente isso: a saída da ação maior que zero e que a outra,
+ou as duas negativas para correr. Os sensores são normalizados durante o treino e a normalização é embutida
+na primeira camada no fim, então a rede salva recebe os sensores crus, como no jogo.
+"""
+import argparse, time, numpy as np
+from ambiente import DinoVecEnv, acoes_da_saida
+from constantes import ACAO_CORRER, ACAO_PULAR, ACAO_AGACHAR, NOMES_ACOES
+from demonstracoes import le_demonstracoes, pulos_no_chao
+
+def inicia_parametros(neuronios:list, rng:np.random.Generator) -> tuple:
+    """Pesos com a inicialização de He (adequada à ReLU) e biases zerados."""
+    pesos = [rng.standard_normal((entrada, saida)) * np.sqrt(2 / entrada) for entrada, saida in zip(neuronios[:-1], neuronios[1:])]
+    bias = [np.zeros(saida) for saida in neuronios[1:]]
+    return pesos, bias
+
+def propaga(x:np.ndarray, pesos:list, bias:list) -> list:
+    """Forward de um lote guardando a entrada de cada camada; a última saída fica sem a ReLU."""
+    camadas = [x]
+    for indice, (w, b) in enumerate(zip(pesos, bias)):
+        z = camadas[-1] @ w + b
+        camadas.append(z if indice == len(pesos) - 1 else np.maximum(z, 0))
+    return camadas
+
+def perda_margem(z:np.ndarray, acoes:np.ndarray, pesos_classes:np.ndarray, margem:float=1.0) -> tuple:
+    """Perda de margem (hinge) da saída antes da ReLU e o seu gradiente, ponderada pelo peso de cada classe.
+    Pular pede z0 > margem e z0 > z1 + margem; agachar o contrário; correr pede z0 e z1 < -margem."""
+    gradiente = np.zeros_like(z)
+    perda = np.zeros(len(z))
+    z0, z1 = z[:,0], z[:,1]
+
+    for acao, (maior, menor) in [(ACAO_PULAR, (0, 1)), (ACAO_AGACHAR, (1, 0))]:
+        linhas = acoes == acao
+        if not linhas.any():
+            continue
+        positiva = margem - z[linhas, maior]
+        diferenca = margem - (z[linhas, maior] - z[linhas, menor])
+        perda[linhas] = np.maximum(positiva, 0) + np.maximum(diferenca, 0)
+        gradiente[linhas, maior] -= (positiva > 0) + (diferenca > 0)
+        gradiente[linhas, menor] += diferenca > 0
+
+    linhas = acoes == ACAO_CORRER
+    perda[linhas] = np.maximum(z0[linhas] + margem, 0) + np.maximum(z1[linhas] + margem, 0)
+    gradiente[linhas, 0] += z0[linhas] + margem > 0
+    gradiente[linhas, 1] += z1[linhas] + margem > 0
+
+    peso = pesos_classes[acoes]
+    return float((perda * peso).mean()), gradiente * peso[:,None] / len(z)
+
+def retropropaga(camadas:list, gradiente:np.ndarray, pesos:list) -> tuple:
+    """Gradientes dos pesos e biases de cada camada a partir do gradiente da saída."""
+    gradientes_pesos = [None] * len(pesos)
+    gradientes_bias = [None] * len(pesos)
+    for indice in reversed(range(len(pesos))):
+        gradientes_pesos[indice] = camadas[indice].T @ gradiente
+        gradientes_bias[indice] = gradiente.sum(axis=0)
+        if indice > 0:
+            gradiente = (gradiente @ pesos[indice].T) * (camadas[indice] > 0)
+    return gradientes_pesos, gradientes_bias
+
+def decide(entradas:np.ndarray, pesos:list, bias:list) -> np.ndarray:
+    """Ações que o jogo escolheria com esses pesos (ReLU em todas as camadas, como RedeNeural.forward)."""
+    return acoes_da_saida(np.maximum(propaga(entradas, pesos, bias)[-1], 0))
+
+def treina(entradas:np.ndarray, acoes:np.ndarray, camadas:list, epocas:int=40, lote:int=256, taxa:float=1e-3,
+           semente:int=0, validacao:float=0.1, margem:float=1.0) -> tuple:
+    """Treina a rede com Adam em mini-lotes e retorna (pesos, bias) já recebendo os sensores crus.
+    As classes são ponderadas pelo inverso da frequência, porque o jogador passa a maior parte do tempo correndo."""
+    rng = np.random.default_rng(semente)
+    ordem = rng.permutation(len(entradas))
+    quantidade_validacao = int(len(entradas) * validacao)
+    treino, teste = ordem[quantidade_validacao:], ordem[:quantidade_validacao]
+
+    media = entradas[treino].mean(axis=0)
+    desvio = entradas[treino].std(axis=0)
+    desvio[desvio == 0] = 1
+    normalizadas = (entradas - media) / desvio
+
+    frequencias = np.bincount(acoes[treino], minlength=len(NOMES_ACOES)).astype(np.float64)
+    pesos_classes = np.where(frequencias > 0, len(treino) / (len(NOMES_ACOES) * np.maximum(frequencias, 1)), 0)
+
+    pesos, bias = inicia_parametros([entradas.shape[1]] + list(camadas) + [2], rng)
+    parametros = pesos + bias
+    momento = [np.zeros_like(parametro) for parametro in parametros]
+    velocidade = [np.zeros_like(parametro) for parametro in parametros]
+    beta1, beta2, epsilon = 0.9, 0.999, 1e-8
+    passo = 0
+
+    for epoca in range(1, epocas + 1):
+        rng.shuffle(treino)
+        perdas = []
+        for inicio in range(0, len(treino), lote):
+            linhas = treino[inicio:inicio + lote]
+            saidas = propaga(normalizadas[linhas], pesos, bias)
+            perda, gradiente = perda_margem(saidas[-1], acoes[linhas], pesos_classes, margem)
+            gradientes_pesos, gradientes_bias = retropropaga(saidas, gradiente, pesos)
+            perdas.append(perda)
+
+            passo += 1
+            for indice, (parametro, gradiente_parametro) in enumerate(zip(parametros, gradientes_pesos + gradientes_bias)):
+                momento[indice] = beta1 * momento[indice] + (1 - beta1) * gradiente_parametro
+                velocidade[indice] = beta2 * velocidade[indice] + (1 - beta2) * gradiente_parametro ** 2
+                corrigido = momento[indice] / (1 - beta1 ** passo)
+                parametro -= taxa * corrigido / (np.sqrt(velocidade[indice] / (1 - beta2 ** passo)) + epsilon)
+
+        if epoca == 1 or epoca % 10 == 0 or epoca == epocas:
+            mensagem = f"época {epoca}: perda {np.mean(perdas):.4f}"
+            if len(teste):
+                acerto = (decide(normalizadas[teste], pesos, bias) == acoes[teste]).mean()
+                mensagem += f", acerto na validação {acerto:.1%}"
+            print(mensagem)
+
+    """Embute a normalização na primeira camada: (x - media) / desvio @ W + b = x @ (W / desvio) + (b - media / desvio @ W)"""
+    bias[0] = bias[0] - (media / desvio) @ pesos[0]
+    pesos[0] = pesos[0] / desvio[:,None]
+    return pesos, bias
+
+def matriz_confusao(entradas:np.ndarray, acoes:np.ndarray, pesos:list, bias:list) -> str:
+    """Tabela com quantas vezes cada ação do jogador virou cada ação da rede."""
+    previstas = decide(entradas, pesos, bias)
+    linhas = [f"{'jogador':>10} " + " ".join(f"{nome:>8}" for nome in NOMES_ACOES)]
+    for acao, nome in enumerate(NOMES_ACOES):
+        contagens = np.bincount(previstas[acoes == acao], minlength=len(NOMES_ACOES))
+        linhas.append(f"{nome:>10} " + " ".join(f"{contagem:>8}" for contagem in contagens))
+    return "\n".join(linhas)
+
+def avalia(pesos:list, bias:list, jogos:int=20, semente:int=0, max_passos:int=20000) -> np.ndarray:
+    """Joga a rede treinada em 'jogos' pistas do DinoVecEnv e retorna os pontos de cada uma."""
+    env = DinoVecEnv(jogos, sementes=semente, auto_reset=False, max_passos=max_passos)
+    while env.vivo.any():
+        env.step(decide(env.observacoes, pesos, bias))
+    return env.pontos.copy()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Treina a rede do Dino I.A. imitando as demonstrações do jogador.")
+    parser.add_argument("demonstracoes", nargs="+", help="arquivos gravados com player_vs_IA.py --grava-demonstracoes")
+    parser.add_argument("--camadas", type=int, nargs="+", default=[6])
+    parser.add_argument("--epocas", type=int, default=40)
+    parser.add_argument("--lote", type=int, default=256)
+    parser.add_argument("--taxa", type=float, default=1e-3, help="taxa de aprendizado do Adam")
+    parser.add_argument("--semente", type=int, default=0)
+    parser.add_argument("--avalia", type=int, default=20, help="pistas jogadas pela rede treinada (0 para não jogar)")
+    parser.add_argument("--saida", default="imitacao.json", help="checkpoint no formato do save.json")
+    args = parser.parse_args()
+
+    partes = [le_demonstracoes(caminho) for caminho in args.demonstracoes]
+    entradas = np.concatenate([parte[0] for parte in partes])
+    acoes = np.concatenate([parte[1] for parte in partes])
+    contagens = np.bincount(acoes, minlength=len(NOMES_ACOES))
+    print(f"{len(acoes)} passos: " + ", ".join(f"{nome} {contagem}" for nome, contagem in zip(NOMES_ACOES, contagens)))
+    if not len(acoes):
+        raise SystemExit("nenhuma demonstração para treinar")
+    if contagens[ACAO_PULAR] and not pulos_no_chao(entradas, acoes):
+        raise SystemExit("nenhum pulo gravado com o dino no chão: as demonstrações só têm pulos no meio do ar "
+                         "(grave de novo com o player_vs_IA.py atual)")
+    print(f"{pulos_no_chao(entradas, acoes)} pulos saindo do chão")
+
+    inicio = time.perf_counter()
+    pesos, bias = treina(entradas, acoes, args.camadas, args.epocas, args.lote, args.taxa, args.semente)
+    print(f"treino em {time.perf_counter() - inicio:.1f} s")
+    print(matriz_confusao(entradas, acoes, pesos, bias))
+
+    if args.avalia:
+        pontos = avalia(pesos, bias, args.avalia, args.semente)
+        print(f"{args.avalia} pistas: pontos médios {pontos.mean():.0f}, mediana {np.median(pontos):.0f}, máximo {pontos.max()}")
+
+    from dino_IA import RedeNeural, Individuo, DESCRICAO_SENSORES, salva_json
+    rede = RedeNeural(len(DESCRICAO_SENSORES), list(args.camadas), 2, DESCRICAO_SENSORES)
+    rede.lista_pontos = [0]
+    rede.escala_grafico = 5
+    salva_json(rede, Individuo(pesos, bias), args.saida)
+    print(f"rede salva em {args.saida}")
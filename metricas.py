@@ -0,0 +1,109 @@
+import csv, json, os, queue, threading, time, numpy as np
+
+"""Descrição das métricas de cada geração, usada no HELP do arquivo do Prometheus"""
+DESCRICAO_METRICAS = {
+    "geracao": "Geração avaliada",
+    "melhor_fitness": "Fitness do melhor indivíduo da geração",
+    "fitness_medio": "Fitness médio da população",
+    "fitness_mediano": "Fitness mediano da população",
+    "pontos": "Pontos do último dino vivo",
+    "frames": "Frames de dino simulados na geração (soma dos dinos vivos em cada frame)",
+    "tempo": "Tempo de relógio da geração em segundos",
+    "frames_por_segundo": "Frames de dino simulados por segundo na geração",
+    "taxa_mutacao": "Taxa de mutação usada para criar a próxima geração",
+    "diversidade": "Desvio padrão médio dos parâmetros da população",
+}
+
+def diversidade(pesos:list, bias:list) -> float:
+    """Calcula a diversidade da população como o desvio padrão médio de cada parâmetro entre os indivíduos,
+    a partir dos pesos e biases empilhados (indivíduo, ...) de cada camada."""
+    desvios = [parametros.std(axis=0).ravel() for parametros in pesos + bias]
+    return float(np.concatenate(desvios).mean())
+
+class ExportadorMetricas:
+    """Grava as métricas de cada geração em um arquivo JSONL ou CSV (pela extensão) e, opcionalmente, em um
+    arquivo de texto no formato do textfile collector do Prometheus. A escrita acontece em uma thread
+    separada, então registrar uma geração não bloqueia o loop do jogo."""
+    def __init__(self, caminho:str=None, caminho_prometheus:str=None, prefixo:str="dino"):
+        """Inicializa o exportador e a thread de escrita. Qualquer um dos caminhos pode ser None."""
+        self.caminho = caminho
+        self.caminho_prometheus = caminho_prometheus
+        self.prefixo = prefixo
+        self.csv = caminho is not None and caminho.endswith(".csv")
+        self.colunas = None
+        self.frames_total = 0
+        self.fila = queue.Queue()
+        self.thread = threading.Thread(target=self.escreve, daemon=True)
+        self.thread.start()
+
+    def registra(self, metricas:dict):
+        """Coloca as métricas de uma geração na fila de escrita."""
+        self.fila.put(dict(metricas, horario=time.time()))
+
+    def escreve(self):
+        """Loop da thread de escrita: grava cada geração recebida até receber None."""
+        arquivo = None
+        if self.caminho:
+            novo = not os.path.exists(self.caminho) or os.path.getsize(self.caminho) == 0
+            arquivo = open(self.caminho, "a", encoding="utf-8", newline="")
+            if self.csv and not novo:
+                with open(self.caminho, "r", encoding="utf-8", newline="") as existente:
+                    self.colunas = next(csv.reader(existente), None)
+
+        while True:
+            metricas = self.fila.get()
+            if metricas is None:
+                break
+
+            if arquivo is not None:
+                self.escreve_linha(arquivo, metricas)
+            if self.caminho_prometheus:
+                self.escreve_prometheus(metricas)
+
+        if arquivo is not None:
+            arquivo.close()
+
+    def escreve_linha(self, arquivo, metricas:dict):
+        """Acrescenta a geração ao arquivo JSONL ou CSV (escrevendo o cabeçalho do CSV na primeira linha)."""
+        if self.csv:
+            escritor = csv.writer(arquivo)
+            if self.colunas is None:
+                self.colunas = list(metricas)
+                escritor.writerow(self.colunas)
+            escritor.writerow([metricas.get(coluna, "") for coluna in self.colunas])
+        else:
+            arquivo.write(json.dumps(metricas) + "\n")
+        arquivo.flush()
+
+    def escreve_prometheus(self, metricas:dict):
+        """Reescreve o arquivo do Prometheus com os valores da última geração. O arquivo é gravado em um temporário
+        e renomeado, para o coletor nunca ler um arquivo pela metade."""
+        self.frames_total += metricas.get("frames", 0)
+
+        linhas = []
+        for nome, valor in metricas.items():
+            if nome == "horario" or not isinstance(valor, (int, float)):
+                continue
+            nome_metrica = f"{self.prefixo}_{nome}"
+            linhas.append(f"# HELP {nome_metrica} {DESCRICAO_METRICAS.get(nome, nome)}")
+            linhas.append(f"# TYPE {nome_metrica} gauge")
+            linhas.append(f"{nome_metrica} {valor}")
+
+        nome_metrica = f"{self.prefixo}_frames_simulados_total"
+        linhas.append(f"# HELP {nome_metrica} Frames de dino simulados desde o início do treino")
+        linhas.append(f"# TYPE {nome_metrica} counter")
+        linhas.append(f"{nome_metrica} {self.frames_total}")
+
+        temporario = f"{self.caminho_prometheus}.tmp"
+        try:
+            with open(temporario, "w", encoding="utf-8") as arquivo:
+                arquivo.write("\n".join(linhas) + "\n")
+            os.replace(temporario, self.caminho_prometheus)
+        except OSError:
+            # Se não der para escrever o treino continua, apenas sem o arquivo
+            pass
+
+    def fecha(self):
+        """Espera a thread gravar as gerações que ainda estão na fila e fecha os arquivos."""
+        self.fila.put(None)
+        self.thread.join()
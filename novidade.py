@@ -0,0 +1,213 @@
+"""Seleção por novidade e por diversidade de qualidade (MAP-Elites) para o treino com tela (dino_IA.py --selecao).
+Na seleção normal toda a população sai de mutações de um único elite e acaba convergindo para um só jeito de
+jogar; aqui os pais da próxima geração são escolhidos pelo comportamento.
+
+    python dino_IA.py --selecao novidade            # pais: os dinos de comportamento mais novo
+    python dino_IA.py --selecao map_elites --grade 12
+    python novidade.py --pontos 5000 --arquivo 20000    # confere a k-d tree contra a força bruta e mede o tempo
+
+O comportamento de cada dino na geração vira um descritor em [0, 1] x [0, 1]: o momento do pulo (distância média
+até o obstáculo da frente quando o dino sai do chão, dividida pela largura da tela; 0 se não pulou) e a fração
+dos frames vivos com a ação de agachar.
+
+- novidade: a nota de cada dino é a distância média aos k vizinhos mais próximos entre o arquivo de comportamentos
+  já vistos e a população atual. Os mais novos viram pais e alguns entram no arquivo. Os vizinhos vêm de uma
+  k-d tree reconstruída a cada geração, então o custo é O(n log n) e não O(n²) com milhares de comportamentos.
+- map_elites: os descritores são divididos em uma grade e cada célula guarda o melhor dino (fitness e pontos)
+  que já caiu nela. Os pais são sorteados entre as células ocupadas.
+
+O melhor dino por fitness continua sendo o elite salvo no save.json e no hall da fama e passa para a próxima
+geração sem mutação; só os pais das mutações mudam.
+"""
+import argparse, time, numpy as np
+from constantes import ACAO_PULAR, ACAO_AGACHAR
+
+DESCRITORES = ["momento_pulo", "fracao_agachado"]
+SELECOES = ["fitness", "novidade", "map_elites"]
+DISTANCIA_PULO_MAXIMA = 1000
+
+class RegistroComportamento:
+    """Conta o que cada dino faz durante a geração: frames vivos, frames agachando e a distância até o obstáculo
+    em cada pulo. Usa listas do Python porque é chamado para cada dino em cada frame."""
+    def __init__(self, tamanho:int):
+        """Cria os contadores zerados para 'tamanho' dinos."""
+        self.tamanho = tamanho
+        self.reinicia()
+
+    def reinicia(self):
+        """Zera os contadores no começo de uma geração."""
+        self.frames = [0] * self.tamanho
+        self.agachados = [0] * self.tamanho
+        self.pulos = [0] * self.tamanho
+        self.distancia_pulos = [0.0] * self.tamanho
+
+    def registra(self, indice:int, acao:int, no_chao:bool, distancia:float):
+        """Registra um frame do dino: a ação escolhida, se ele estava no chão e a distância até o obstáculo da frente."""
+        self.frames[indice] += 1
+        if acao == ACAO_AGACHAR:
+            self.agachados[indice] += 1
+        elif acao == ACAO_PULAR and no_chao:
+            self.pulos[indice] += 1
+            self.distancia_pulos[indice] += distancia
+
+    def descritores(self) -> np.ndarray:
+        """Retorna os descritores (dino, DESCRITORES) da geração, todos entre 0 e 1."""
+        frames = np.maximum(self.frames, 1)
+        pulos = np.array(self.pulos)
+        momento_pulo = np.where(pulos > 0, np.array(self.distancia_pulos) / np.maximum(pulos, 1), 0) / DISTANCIA_PULO_MAXIMA
+        return np.stack([np.clip(momento_pulo, 0, 1), np.array(self.agachados) / frames], axis=1)
+
+class ArvoreKD:
+    """k-d tree dos pontos (ponto, dimensão): cada nó divide os pontos pela mediana de um eixo, alternando os eixos,
+    até sobrarem no máximo 'folha' pontos, que são comparados de uma vez com NumPy na busca."""
+    def __init__(self, pontos:np.ndarray, folha:int=16):
+        """Constrói a árvore em O(n log n), particionando pela mediana com np.argpartition."""
+        self.folha = folha
+        self.ordem = np.arange(len(pontos))
+        self.pontos = np.asarray(pontos, dtype=np.float64)
+        self.nos = []
+        self.constroi(0, len(pontos), 0)
+
+        """Pontos na ordem das folhas, para cada folha ser uma fatia contígua"""
+        self.pontos = self.pontos[self.ordem]
+
+    def constroi(self, inicio:int, fim:int, profundidade:int) -> int:
+        """Cria o nó dos pontos ordem[inicio:fim] e retorna a posição dele em self.nos. Um nó interno é
+        (eixo, corte, esquerda, direita) e uma folha é (None, None, inicio, fim)."""
+        posicao = len(self.nos)
+        if fim - inicio <= self.folha:
+            self.nos.append((None, None, inicio, fim))
+            return posicao
+
+        eixo = profundidade % self.pontos.shape[1]
+        meio = (inicio + fim) // 2
+        trecho = self.ordem[inicio:fim]
+        self.ordem[inicio:fim] = trecho[np.argpartition(self.pontos[trecho, eixo], meio - inicio)]
+        corte = self.pontos[self.ordem[meio], eixo]
+
+        self.nos.append(None)
+        esquerda = self.constroi(inicio, meio, profundidade + 1)
+        direita = self.constroi(meio, fim, profundidade + 1)
+        self.nos[posicao] = (eixo, corte, esquerda, direita)
+        return posicao
+
+    def vizinhos(self, ponto:np.ndarray, k:int) -> np.ndarray:
+        """Distâncias do ponto aos k pontos mais próximos da árvore, em ordem crescente (o próprio ponto, se estiver
+        na árvore, é o primeiro, com distância 0). Um ramo só é visitado se o plano de corte estiver mais perto
+        que o k-ésimo vizinho já encontrado."""
+        melhores = np.full(min(k, len(self.pontos)), np.inf)
+        pilha = [(0, 0.0)]
+        while pilha:
+            no, distancia_plano = pilha.pop()
+            if distancia_plano >= melhores[-1]:
+                continue
+
+            eixo, corte, esquerda, direita = self.nos[no]
+            if eixo is None:
+                distancias = ((self.pontos[esquerda:direita] - ponto) ** 2).sum(axis=1)
+                melhores = np.sort(np.concatenate([melhores, distancias]))[:len(melhores)]
+                continue
+
+            diferenca = ponto[eixo] - corte
+            perto, longe = (esquerda, direita) if diferenca < 0 else (direita, esquerda)
+            pilha.append((longe, diferenca * diferenca))
+            pilha.append((perto, 0.0))
+        return np.sqrt(melhores)
+
+def novidade(descritores:np.ndarray, arquivo:np.ndarray, k:int=15) -> np.ndarray:
+    """Nota de novidade de cada descritor: a distância média aos k vizinhos mais próximos entre o arquivo e os
+    outros descritores da população (o próprio descritor não conta)."""
+    pontos = np.concatenate([arquivo, descritores])
+    if len(pontos) < 2:
+        return np.zeros(len(descritores))
+    arvore = ArvoreKD(pontos)
+    return np.array([arvore.vizinhos(descritor, k + 1)[1:].mean() for descritor in descritores])
+
+def novidade_forca_bruta(descritores:np.ndarray, arquivo:np.ndarray, k:int=15) -> np.ndarray:
+    """Mesma nota de novidade calculando todas as distâncias (O(n²)), usada para conferir a k-d tree."""
+    pontos = np.concatenate([arquivo, descritores])
+    distancias = np.sqrt(((descritores[:,None,:] - pontos[None,:,:]) ** 2).sum(axis=2))
+    return np.sort(distancias, axis=1)[:,1:k + 1].mean(axis=1)
+
+class ArquivoNovidade:
+    """Seleção por novidade: guarda os descritores dos comportamentos mais novos de cada geração e escolhe como
+    pais os dinos mais distantes de tudo o que já foi visto."""
+    def __init__(self, k:int=15, acrescimos:int=5, pais:int=10):
+        """k vizinhos na nota de novidade, quantos descritores entram no arquivo por geração e quantos pais."""
+        self.k = k
+        self.acrescimos = acrescimos
+        self.pais = pais
+        self.descritores = np.zeros((0, len(DESCRITORES)))
+        self.notas = np.zeros(0)
+
+    def seleciona(self, descritores:np.ndarray, individuos:list, fitness:np.ndarray, pontos:np.ndarray) -> list:
+        """Calcula a novidade da geração, acrescenta os mais novos ao arquivo e retorna os pais das mutações."""
+        self.notas = novidade(descritores, self.descritores, self.k)
+        ordem = np.argsort(-self.notas, kind="stable")
+        self.descritores = np.concatenate([self.descritores, descritores[ordem[:self.acrescimos]]])
+        return [individuos[indice] for indice in ordem[:self.pais]]
+
+    def resumo(self) -> dict:
+        """Métricas da última seleção, acrescentadas às métricas da geração."""
+        return {
+            "novidade_media": float(self.notas.mean()) if len(self.notas) else 0.0,
+            "novidade_maxima": float(self.notas.max()) if len(self.notas) else 0.0,
+            "arquivo_novidade": len(self.descritores),
+        }
+
+class GradeElites:
+    """Arquivo do MAP-Elites: os descritores são divididos em uma grade de 'celulas' x 'celulas' e cada célula guarda
+    o melhor dino (maior fitness e, no empate, mais pontos) que já caiu nela."""
+    def __init__(self, celulas:int=10):
+        """Cria a grade vazia."""
+        self.celulas = celulas
+        self.elites = {}
+
+    def celula(self, descritores:np.ndarray) -> np.ndarray:
+        """Coordenadas na grade (dino, eixo) de cada descritor."""
+        return np.minimum((descritores * self.celulas).astype(np.int64), self.celulas - 1)
+
+    def seleciona(self, descritores:np.ndarray, individuos:list, fitness:np.ndarray, pontos:np.ndarray) -> list:
+        """Coloca cada dino da geração na sua célula se ele for melhor que o elite dela e retorna os elites de todas
+        as células ocupadas, de onde os pais das mutações são sorteados."""
+        for coordenadas, individuo, fitness_dino, pontos_dino in zip(self.celula(descritores), individuos, fitness, pontos):
+            chave = tuple(coordenadas.tolist())
+            qualidade = (float(fitness_dino), float(pontos_dino))
+            if chave not in self.elites or qualidade > self.elites[chave][0]:
+                self.elites[chave] = (qualidade, individuo)
+        return [individuo for _, individuo in self.elites.values()]
+
+    def resumo(self) -> dict:
+        """Métricas da grade, acrescentadas às métricas da geração: células ocupadas, cobertura e a soma do
+        fitness dos elites (o "QD score")."""
+        return {
+            "celulas_ocupadas": len(self.elites),
+            "cobertura": len(self.elites) / self.celulas ** 2,
+            "qd_score": sum(qualidade[0] for qualidade, _ in self.elites.values()),
+        }
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Confere e mede a nota de novidade da k-d tree contra a força bruta.")
+    parser.add_argument("--pontos", type=int, default=5000, help="descritores da população")
+    parser.add_argument("--arquivo", type=int, default=20000, help="descritores no arquivo de novidade")
+    parser.add_argument("--k", type=int, default=15)
+    parser.add_argument("--semente", type=int, default=0)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(args.semente)
+    descritores = rng.random((args.pontos, len(DESCRITORES)))
+    arquivo = rng.random((args.arquivo, len(DESCRITORES)))
+
+    inicio = time.perf_counter()
+    notas = novidade(descritores, arquivo, args.k)
+    tempo_arvore = time.perf_counter() - inicio
+
+    """A força bruta é feita em blocos para não montar a matriz de distâncias inteira de uma vez"""
+    inicio = time.perf_counter()
+    referencia = np.concatenate([novidade_forca_bruta(descritores[bloco:bloco + 256], np.concatenate([arquivo, np.delete(descritores, np.s_[bloco:bloco + 256], axis=0)]), args.k)
+                                 for bloco in range(0, args.pontos, 256)])
+    tempo_forca_bruta = time.perf_counter() - inicio
+
+    print(f"{args.pontos} descritores, arquivo com {args.arquivo}, k = {args.k}")
+    print(f"k-d tree: {tempo_arvore:.2f} s, força bruta: {tempo_forca_bruta:.2f} s, "
+          f"maior diferença {np.abs(notas - referencia).max():.2e}")
@@ -0,0 +1,305 @@
+"""Núcleo compilado do simulador sem tela: um laço do Numba que roda o frame inteiro de cada jogo do DinoVecEnv
+(sensores, forward da rede do indivíduo, ações, colisão, fitness e cenário) até o jogo terminar, sem voltar ao
+Python entre os frames. Os ramos por dino (pulo no chão ou no ar, agachar, gravidade, reciclagem dos obstáculos)
+viram ifs comuns em vez de máscaras do NumPy.
+
+    python nucleo_jit.py                           # confere contra o DinoVecEnv e compara a vazão
+    python nucleo_jit.py --checkpoint save.json --populacao 2000 --max-passos 5000
+    python torneio.py saves/*.json --jit            # Treinador(jit=True) usa o núcleo na avaliação
+
+O Numba é opcional (pip install numba). Sem ele, NUMBA_DISPONIVEL fica False e joga_populacao roda o laço
+normal do NumPy (DinoVecEnv.step frame a frame), com o mesmo resultado. A primeira chamada compila o núcleo
+(alguns segundos); a compilação fica em cache no __pycache__.
+
+O núcleo usa a mesma ordem das regras de DinoVecEnv.step e o mesmo sorteio dos obstáculos, então os pontos,
+o fitness e o estado final de cada jogo são os mesmos; confere() compara os dois caminhos.
+"""
+import argparse, time, numpy as np
+from ambiente import (DinoVecEnv, acoes_da_saida, DINO_X, DINO_LARGURA, DINO_ALTURA_EM_PE, DINO_ALTURA_AGACHADO,
+                      DINO_Y_INICIAL, ALTURA_TELA, CACTO_Y_INICIAL, PTEROSSAURO_Y_INICIAL, PTEROSSAURO_TAMANHO,
+                      TAMANHOS_CACTO, TIPO_PTEROSSAURO, OBSTACULOS_TELA, OBSTACULOS_ESPERA,
+                      SORTEIO_TIPO, SORTEIO_CACTO, SORTEIO_PTEROSSAURO, SORTEIO_DISTANCIA)
+from constantes import ACAO_CORRER, ACAO_PULAR, ACAO_AGACHAR
+
+try:
+    import numba
+    NUMBA_DISPONIVEL = True
+except ImportError:
+    numba = None
+    NUMBA_DISPONIVEL = False
+
+def compila(paralelo:bool=False):
+    """Decorador que compila a função com o Numba (sem fastmath, para as contas seguirem a ordem do NumPy) se ele
+    estiver instalado; sem ele a função fica em Python puro. Com paralelo os jogos são divididos entre as CPUs."""
+    def decorador(funcao):
+        if numba is None:
+            return funcao
+        return numba.njit(cache=True, parallel=paralelo)(funcao)
+    return decorador
+
+prange = numba.prange if numba is not None else range
+
+@compila()
+def sorteia_jogo(semente:np.uint64, contador:int, campo:int, quantidade:int) -> int:
+    """Versão escalar de ambiente.sorteia (splitmix64 de (semente, contador, campo)) para um jogo."""
+    chave = np.uint64(contador) * np.uint64(4) + np.uint64(campo)
+    x = chave + np.uint64(0x9E3779B97F4A7C15)
+    x = (x ^ (x >> np.uint64(30))) * np.uint64(0xBF58476D1CE4E5B9)
+    x = (x ^ (x >> np.uint64(27))) * np.uint64(0x94D049BB133111EB)
+    x = semente ^ (x ^ (x >> np.uint64(31)))
+    x = x + np.uint64(0x9E3779B97F4A7C15)
+    x = (x ^ (x >> np.uint64(30))) * np.uint64(0xBF58476D1CE4E5B9)
+    x = (x ^ (x >> np.uint64(27))) * np.uint64(0x94D049BB133111EB)
+    x = x ^ (x >> np.uint64(31))
+    return np.int64(x % np.uint64(quantidade))
+
+@compila(paralelo=True)
+def joga_jogos(sementes, contadores, dino_y, dino_altura, velocidade_y, passando_obstaculo, vivo, fitness, pontos,
+               cenario_velocidade, inicio, obstaculo_x, obstaculo_largura, obstaculo_altura, obstaculo_base,
+               obstaculo_tipo, pterossauros_espera, parametros, neuronios, donos, max_passos, pontos_por_velocidade,
+               velocidade_maxima, tamanhos_cacto) -> int:
+    """Roda cada jogo vivo até ele colidir ou chegar a max_passos (negativo = sem limite), alterando os arrays do
+    DinoVecEnv no lugar, e retorna os frames simulados. O jogo j usa a linha donos[j] de 'parametros' (pesos e bias
+    de cada camada em ordem, como Populacao.vetor) com as camadas de tamanhos 'neuronios'."""
+    frames = 0
+    for jogo in prange(len(vivo)):
+        if not vivo[jogo]:
+            continue
+        dono = donos[jogo]
+        maior_camada = neuronios.max()
+        atual = np.zeros(maior_camada)
+        proxima = np.zeros(maior_camada)
+        frames_jogo = 0
+
+        while True:
+            """Sensores (DinoVecEnv.observa): o obstáculo da frente é o primeiro, ou o segundo se o primeiro já passou"""
+            primeiro = inicio[jogo]
+            frente = primeiro
+            if obstaculo_x[jogo, primeiro] + obstaculo_largura[jogo, primeiro] <= DINO_X:
+                frente = (primeiro + 1) % OBSTACULOS_TELA
+            frente_x = obstaculo_x[jogo, frente]
+            frente_base = obstaculo_base[jogo, frente]
+            atual[0] = frente_x - (DINO_X + DINO_LARGURA)
+            atual[1] = frente_x + obstaculo_largura[jogo, frente] - (DINO_X + DINO_LARGURA)
+            atual[2] = ALTURA_TELA - (frente_base - obstaculo_altura[jogo, frente])
+            atual[3] = ALTURA_TELA - frente_base
+            atual[4] = cenario_velocidade[jogo]
+            atual[5] = ALTURA_TELA - dino_y[jogo]
+
+            """Forward com ReLU em todas as camadas, somando as entradas em ordem e depois o bias, como o matmul"""
+            posicao = 0
+            for camada in range(len(neuronios) - 1):
+                entradas = neuronios[camada]
+                saidas = neuronios[camada + 1]
+                for saida in range(saidas):
+                    soma = 0.0
+                    for entrada in range(entradas):
+                        soma += atual[entrada] * parametros[dono, posicao + entrada * saidas + saida]
+                    soma += parametros[dono, posicao + entradas * saidas + saida]
+                    proxima[saida] = soma if soma > 0 else 0.0
+                posicao += entradas * saidas + saidas
+                atual, proxima = proxima, atual
+
+            if atual[0] < atual[1]:
+                acao = ACAO_AGACHAR
+            elif atual[0] > atual[1]:
+                acao = ACAO_PULAR
+            else:
+                acao = ACAO_CORRER
+            frames_jogo += 1
+
+            """Fitness por passar por baixo do pterossauro (DinoVecEnv.aplica_acoes)"""
+            passando = frente_x <= DINO_X + DINO_LARGURA
+            if passando and dino_y[jogo] > frente_base and not passando_obstaculo[jogo]:
+                fitness[jogo] += 1
+            passando_obstaculo[jogo] = passando
+
+            no_chao = dino_y[jogo] + dino_altura[jogo] == DINO_Y_INICIAL
+            if acao == ACAO_AGACHAR:
+                if no_chao:
+                    dino_altura[jogo] = DINO_ALTURA_AGACHADO
+                    dino_y[jogo] = DINO_Y_INICIAL - DINO_ALTURA_AGACHADO
+                else:
+                    velocidade_y[jogo] += 1
+            elif acao == ACAO_PULAR:
+                dino_altura[jogo] = DINO_ALTURA_EM_PE
+                if dino_y[jogo] + dino_altura[jogo] == DINO_Y_INICIAL:
+                    velocidade_y[jogo] = -10
+                    dino_y[jogo] -= 10
+                else:
+                    velocidade_y[jogo] -= 0.5
+            elif no_chao:
+                dino_altura[jogo] = DINO_ALTURA_EM_PE
+                dino_y[jogo] = DINO_Y_INICIAL - DINO_ALTURA_EM_PE
+
+            """Colisão com qualquer obstáculo da tela (Rect.colliderect)"""
+            colidiu = False
+            for obstaculo in range(OBSTACULOS_TELA):
+                x = obstaculo_x[jogo, obstaculo]
+                base = obstaculo_base[jogo, obstaculo]
+                if (DINO_X < x + obstaculo_largura[jogo, obstaculo] and x < DINO_X + DINO_LARGURA and
+                        dino_y[jogo] < base and base - obstaculo_altura[jogo, obstaculo] < dino_y[jogo] + dino_altura[jogo]):
+                    colidiu = True
+
+            """Cenário (DinoVecEnv.avanca_cenario): o frame da colisão ainda conta ponto e move tudo"""
+            pontos[jogo] += 1
+            if pontos[jogo] % pontos_por_velocidade == 0 and cenario_velocidade[jogo] < velocidade_maxima:
+                cenario_velocidade[jogo] += 1
+
+            if obstaculo_x[jogo, primeiro] + obstaculo_largura[jogo, primeiro] <= 0:
+                """Recicla o primeiro obstáculo (DinoVecEnv.novo_obstaculo)"""
+                semente = sementes[jogo]
+                contador = contadores[jogo]
+                ultimo = (primeiro + OBSTACULOS_TELA - 1) % OBSTACULOS_TELA
+                quer_pterossauro = sorteia_jogo(semente, contador, SORTEIO_TIPO, 5) == 0
+                espera = pterossauros_espera[jogo]
+                tem_espera = espera > 0 if quer_pterossauro else espera < OBSTACULOS_ESPERA
+
+                tipo_saiu = obstaculo_tipo[jogo, primeiro]
+                tipo_novo = tipo_saiu
+                if tem_espera:
+                    tipo_novo = 1 if quer_pterossauro else 0
+                    pterossauros_espera[jogo] += tipo_saiu - tipo_novo
+
+                cacto = sorteia_jogo(semente, contador, SORTEIO_CACTO, 5)
+                altura_pterossauro = PTEROSSAURO_Y_INICIAL - 60 + 30 * sorteia_jogo(semente, contador, SORTEIO_PTEROSSAURO, 3)
+                obstaculo_tipo[jogo, primeiro] = tipo_novo
+                if tipo_novo == TIPO_PTEROSSAURO:
+                    obstaculo_largura[jogo, primeiro] = PTEROSSAURO_TAMANHO[0]
+                    obstaculo_altura[jogo, primeiro] = PTEROSSAURO_TAMANHO[1]
+                    obstaculo_base[jogo, primeiro] = altura_pterossauro
+                else:
+                    obstaculo_largura[jogo, primeiro] = tamanhos_cacto[cacto, 0]
+                    obstaculo_altura[jogo, primeiro] = tamanhos_cacto[cacto, 1]
+                    obstaculo_base[jogo, primeiro] = CACTO_Y_INICIAL
+                obstaculo_x[jogo, primeiro] = obstaculo_x[jogo, ultimo] + 400 + sorteia_jogo(semente, contador, SORTEIO_DISTANCIA, 201)
+                inicio[jogo] = (primeiro + 1) % OBSTACULOS_TELA
+                contadores[jogo] += 1
+
+            """Gravidade (Dino.update)"""
+            if dino_y[jogo] + dino_altura[jogo] == DINO_Y_INICIAL:
+                velocidade_y[jogo] = 0
+            else:
+                velocidade_y[jogo] += 1
+                if dino_y[jogo] + dino_altura[jogo] + velocidade_y[jogo] > DINO_Y_INICIAL:
+                    dino_y[jogo] = DINO_Y_INICIAL - dino_altura[jogo]
+                else:
+                    dino_y[jogo] = np.int64(np.floor(dino_y[jogo] + velocidade_y[jogo] + 0.5))
+
+            for obstaculo in range(OBSTACULOS_TELA):
+                if obstaculo_x[jogo, obstaculo] + obstaculo_largura[jogo, obstaculo] > 0:
+                    obstaculo_x[jogo, obstaculo] -= cenario_velocidade[jogo]
+
+            if colidiu or (max_passos >= 0 and pontos[jogo] >= max_passos):
+                vivo[jogo] = False
+                break
+
+        frames += frames_jogo
+    return frames
+
+def parametros_populacao(pesos:list, bias:list) -> np.ndarray:
+    """Junta os pesos e biases empilhados da população em uma matriz (indivíduo, parâmetro), com cada linha no
+    formato de Populacao.vetor."""
+    partes = []
+    for camada_pesos, camada_bias in zip(pesos, bias):
+        partes.append(camada_pesos.reshape(len(camada_pesos), -1))
+        partes.append(camada_bias)
+    return np.ascontiguousarray(np.concatenate(partes, axis=1), dtype=np.float64)
+
+def joga_populacao(env:DinoVecEnv, pesos:list, bias:list, cursos:int=1, jit:bool=None) -> int:
+    """Joga todos os jogos do env (criado com auto_reset=False) até terminarem, o jogo j com o indivíduo j // cursos
+    da população (pesos e biases empilhados, como em Populacao), e retorna os frames simulados. Com jit=None o
+    núcleo do Numba é usado se estiver instalado; com jit=False (ou sem o Numba) roda o laço do NumPy."""
+    if env.auto_reset:
+        raise ValueError("joga_populacao precisa de um DinoVecEnv com auto_reset=False")
+    if jit is None:
+        jit = NUMBA_DISPONIVEL
+    if jit and not NUMBA_DISPONIVEL:
+        raise ImportError("o núcleo compilado precisa do numba (pip install numba)")
+
+    if not jit:
+        frames = 0
+        while env.vivo.any():
+            frames += int(env.vivo.sum())
+            saida = env.observacoes.reshape(len(pesos[0]), cursos, -1)
+            for camada_pesos, camada_bias in zip(pesos, bias):
+                saida = np.maximum(np.matmul(saida, camada_pesos) + camada_bias[:,None,:], 0)
+            env.step(acoes_da_saida(saida.reshape(env.num_envs, -1)))
+        return frames
+
+    neuronios = np.array([pesos[0].shape[1]] + [camada.shape[2] for camada in pesos], dtype=np.int64)
+    frames = joga_jogos(
+        env.sementes, env.contadores, env.dino_y, env.dino_altura, env.velocidade_y, env.passando_obstaculo, env.vivo,
+        env.fitness, env.pontos, env.cenario_velocidade, env.inicio, env.obstaculo_x, env.obstaculo_largura,
+        env.obstaculo_altura, env.obstaculo_base, env.obstaculo_tipo, env.pterossauros_espera,
+        parametros_populacao(pesos, bias), neuronios, np.arange(env.num_envs, dtype=np.int64) // cursos,
+        -1 if env.max_passos is None else env.max_passos, env.pontos_por_velocidade, env.velocidade_maxima,
+        TAMANHOS_CACTO.astype(np.int64)
+    )
+    env.observa()
+    return int(frames)
+
+"""Estado do DinoVecEnv comparado pelo confere()"""
+CAMPOS_ESTADO = ["contadores", "dino_y", "dino_altura", "velocidade_y", "passando_obstaculo", "vivo", "fitness", "pontos",
+                 "cenario_velocidade", "inicio", "obstaculo_x", "obstaculo_largura", "obstaculo_altura", "obstaculo_base",
+                 "obstaculo_tipo", "pterossauros_espera", "observacoes"]
+
+def confere(pesos:list, bias:list, sementes:np.ndarray, max_passos:int=None, **opcoes) -> dict:
+    """Joga a população nas pistas das sementes (cada indivíduo em todas elas, como o Treinador) pelo laço do NumPy
+    e pelo núcleo compilado e compara o estado final dos dois ambientes campo a campo. Retorna os campos
+    diferentes (vazio se forem iguais), os frames e o tempo de cada caminho; o tempo do núcleo já não inclui
+    a compilação, feita antes com um jogo curto."""
+    cursos = len(sementes)
+    tamanho = len(pesos[0])
+    criar = lambda limite: DinoVecEnv(tamanho * cursos, sementes=np.tile(np.asarray(sementes, dtype=np.uint64), tamanho),
+                                      auto_reset=False, max_passos=limite, **opcoes)
+    joga_populacao(criar(1), pesos, bias, cursos, jit=True)
+
+    resultado = {}
+    ambientes = {}
+    for nome, jit in (("numpy", False), ("numba", True)):
+        env = criar(max_passos)
+        inicio = time.perf_counter()
+        resultado[f"frames_{nome}"] = joga_populacao(env, pesos, bias, cursos, jit=jit)
+        resultado[f"tempo_{nome}"] = time.perf_counter() - inicio
+        ambientes[nome] = env
+
+    resultado["diferentes"] = [campo for campo in CAMPOS_ESTADO
+                               if not np.array_equal(getattr(ambientes["numpy"], campo), getattr(ambientes["numba"], campo))]
+    if resultado["frames_numpy"] != resultado["frames_numba"]:
+        resultado["diferentes"].append("frames")
+    resultado["pontos_medio"] = float(ambientes["numpy"].pontos.mean())
+    return resultado
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Confere o núcleo do Numba contra o DinoVecEnv e compara a vazão.")
+    parser.add_argument("--checkpoint", default=None, help="indivíduo de onde vem a população (sem ele, aleatória)")
+    parser.add_argument("--populacao", type=int, default=500)
+    parser.add_argument("--mutacao", type=float, default=0.1, help="taxa e escala das mutações do checkpoint")
+    parser.add_argument("--cursos", type=int, default=3)
+    parser.add_argument("--max-passos", type=int, default=3000)
+    parser.add_argument("--semente", type=int, default=0)
+    args = parser.parse_args()
+
+    if not NUMBA_DISPONIVEL:
+        raise SystemExit("numba não está instalado (pip install numba); o Treinador usa o laço do NumPy")
+
+    from evolucao import Populacao
+    from dino_IA import carrega_json, neuronios_salvos, Individuo
+
+    rng = np.random.default_rng(args.semente)
+    dados = carrega_json(args.checkpoint) if args.checkpoint else None
+    populacao = Populacao(neuronios_salvos(dados) if dados else [6, 6, 2], args.populacao, rng)
+    if dados:
+        populacao.define(0, Individuo(dados["individuo"]["pesos"], dados["individuo"]["bias"]))
+        populacao.repovoa(0, args.mutacao, args.mutacao, rng)
+
+    sementes = np.arange(args.cursos, dtype=np.uint64) + np.uint64(args.semente)
+    resultado = confere(populacao.pesos, populacao.bias, sementes, args.max_passos)
+    for nome in ("numpy", "numba"):
+        print(f"{nome:>6}: {resultado[f'frames_{nome}']:,} frames em {resultado[f'tempo_{nome}']:.2f} s "
+              f"({resultado[f'frames_{nome}'] / resultado[f'tempo_{nome}']:,.0f} frames/s)")
+    print(f"pontos médios {resultado['pontos_medio']:.0f}")
+    if resultado["diferentes"]:
+        raise SystemExit(f"estado diferente em: {', '.join(resultado['diferentes'])}")
+    print("estado final idêntico")
@@ -0,0 +1,153 @@
+"""Gerenciador dos obstáculos dos jogos com tela (dino_IA.py e player_vs_IA.py): um buffer circular de capacidade
+fixa com os obstáculos ativos, na ordem em que chegam ao dino, e uma fila de obstáculos livres por tipo.
+Pegar e devolver um obstáculo é O(1), sem procurar pelo nome da classe nem tirar do começo de uma lista.
+
+Cada tipo é registrado com a função que cria o sprite, quantos sprites desse tipo existem e o peso no sorteio
+do próximo obstáculo (o padrão dos jogos é 4 cactos e 2 pterossauros, com 20% de chance de pterossauro). O sprite
+só precisa de um pygame.Rect em 'rect' e de um método prepara(), chamado sempre que ele volta para a tela
+(o cacto sorteia a imagem, o pterossauro a altura). A distância entre obstáculos seguidos define a densidade.
+
+O estado dos obstáculos ativos também fica em um array (obstáculo, campo) na ordem da fila, atualizado uma vez
+por frame, para os sensores e a colisão lerem todos de uma vez em vez de percorrer os sprites.
+"""
+import numpy as np
+from collections import deque
+from random import choices, randint
+
+"""Colunas do array de estado"""
+CAMPO_X = 0
+CAMPO_Y = 1
+CAMPO_LARGURA = 2
+CAMPO_ALTURA = 3
+CAMPO_TIPO = 4
+
+DISTANCIA_MINIMA = 400
+DISTANCIA_MAXIMA = 600
+
+class GerenciadorObstaculos:
+    """Obstáculos ativos em um buffer circular e livres em uma fila por tipo."""
+    def __init__(self, tipos:dict, distancia_minima:int=DISTANCIA_MINIMA, distancia_maxima:int=DISTANCIA_MAXIMA):
+        """Cria todos os sprites de uma vez. 'tipos' é um dicionário nome -> (fabrica, quantidade, peso), com a
+        função sem argumentos que cria um sprite do tipo, quantos existem e o peso no sorteio do próximo obstáculo."""
+        self.nomes = list(tipos)
+        self.pesos = [peso for _, _, peso in tipos.values()]
+        self.distancia_minima = distancia_minima
+        self.distancia_maxima = distancia_maxima
+
+        self.todos = []
+        self.livres = {nome: deque() for nome in self.nomes}
+        for indice_tipo, (nome, (fabrica, quantidade, _)) in enumerate(tipos.items()):
+            for _ in range(quantidade):
+                obstaculo = fabrica()
+                obstaculo.tipo = nome
+                obstaculo.indice_tipo = indice_tipo
+                self.todos.append(obstaculo)
+                self.livres[nome].append(obstaculo)
+
+        """Buffer circular dos ativos: 'inicio' é o primeiro obstáculo (o mais à esquerda)"""
+        self.capacidade = len(self.todos)
+        self.ativos = [None] * self.capacidade
+        self.inicio = 0
+        self.quantidade = 0
+        self.estado = np.zeros((self.capacidade, 5), dtype=np.int64)
+        self.retangulos = []
+
+    def __len__(self) -> int:
+        """Quantidade de obstáculos ativos."""
+        return self.quantidade
+
+    def __getitem__(self, posicao:int):
+        """Obstáculo ativo na posição da fila (0 é o primeiro, -1 o último)."""
+        if not -self.quantidade <= posicao < self.quantidade:
+            raise IndexError("posição fora dos obstáculos ativos")
+        return self.ativos[(self.inicio + posicao % self.quantidade) % self.capacidade]
+
+    def adquire(self, nome:str):
+        """Tira o próximo obstáculo livre do tipo, ou retorna None se não houver nenhum."""
+        livres = self.livres[nome]
+        return livres.popleft() if livres else None
+
+    def libera(self, obstaculo):
+        """Devolve o obstáculo para a fila de livres do seu tipo."""
+        self.livres[obstaculo.tipo].append(obstaculo)
+
+    def empilha(self, obstaculo):
+        """Coloca o obstáculo no fim da fila de ativos."""
+        self.ativos[(self.inicio + self.quantidade) % self.capacidade] = obstaculo
+        self.quantidade += 1
+
+    def desempilha(self):
+        """Tira e retorna o primeiro obstáculo da fila de ativos."""
+        obstaculo = self.ativos[self.inicio]
+        self.ativos[self.inicio] = None
+        self.inicio = (self.inicio + 1) % self.capacidade
+        self.quantidade -= 1
+        return obstaculo
+
+    def posiciona(self, obstaculo):
+        """Coloca o obstáculo a uma distância sorteada depois do último ativo."""
+        obstaculo.rect.x = self[-1].rect.x + randint(self.distancia_minima, self.distancia_maxima)
+
+    def recicla(self):
+        """Troca o primeiro obstáculo (que saiu da tela) por um novo no fim da fila:
+        sorteia o tipo e usa um obstáculo livre desse tipo, devolvendo o que saiu; se não houver livre, o próprio
+        obstáculo que saiu volta para a tela."""
+        nome = choices(self.nomes, self.pesos)[0]
+        saiu = self.desempilha()
+        novo = self.adquire(nome)
+        if novo is None:
+            novo = saiu
+        else:
+            self.libera(saiu)
+
+        novo.prepara()
+        self.posiciona(novo)
+        self.empilha(novo)
+
+    def reinicia(self, iniciais:list, x_inicial:int):
+        """Devolve todos os ativos e coloca na tela os obstáculos dos tipos em 'iniciais', o primeiro em x_inicial e
+        os outros às distâncias sorteadas. Os que ficam livres saem da tela pela esquerda."""
+        while self.quantidade:
+            self.libera(self.desempilha())
+
+        for posicao, nome in enumerate(iniciais):
+            obstaculo = self.adquire(nome)
+            if obstaculo is None:
+                raise ValueError(f"não há obstáculos livres do tipo {nome}")
+            obstaculo.prepara()
+            if posicao == 0:
+                obstaculo.rect.x = x_inicial
+            else:
+                self.posiciona(obstaculo)
+            self.empilha(obstaculo)
+
+        for livres in self.livres.values():
+            for obstaculo in livres:
+                obstaculo.rect.right = 0
+
+    def atualiza_estado(self) -> np.ndarray:
+        """Copia x, y, largura, altura e tipo dos obstáculos ativos, na ordem da fila, para o array de estado (e os
+        retângulos para a lista usada em colide) e retorna as linhas preenchidas."""
+        self.retangulos = [self.ativos[(self.inicio + posicao) % self.capacidade].rect for posicao in range(self.quantidade)]
+        for posicao, rect in enumerate(self.retangulos):
+            self.estado[posicao, :CAMPO_TIPO] = rect
+            self.estado[posicao, CAMPO_TIPO] = self.ativos[(self.inicio + posicao) % self.capacidade].indice_tipo
+        return self.estado[:self.quantidade]
+
+    def frente(self, x:int) -> int:
+        """Posição na fila do obstáculo mais próximo à frente de quem está em x (o primeiro, se ele ainda não
+        passou por inteiro, ou o segundo), pelo array de estado."""
+        return 0 if self.estado[0, CAMPO_X] + self.estado[0, CAMPO_LARGURA] > x else 1
+
+    def colide(self, rect) -> bool:
+        """Verifica se o retângulo colide com algum obstáculo ativo no último atualiza_estado (os livres estão
+        sempre fora da tela). Para um retângulo só, o collidelist do pygame é mais rápido que o array."""
+        return rect.collidelist(self.retangulos) != -1
+
+    def colisoes(self, x:np.ndarray, y:np.ndarray, largura:np.ndarray, altura:np.ndarray) -> np.ndarray:
+        """Versão em lote de colide: recebe os retângulos (x, y, largura, altura) de vários dinos e retorna quais
+        colidem com algum obstáculo ativo, com a regra do Rect.colliderect, lendo o array de estado."""
+        estado = self.estado[None,:self.quantidade]
+        x, y, largura, altura = (np.asarray(valor)[:,None] for valor in (x, y, largura, altura))
+        return ((x < estado[:,:,CAMPO_X] + estado[:,:,CAMPO_LARGURA]) & (estado[:,:,CAMPO_X] < x + largura) &
+                (y < estado[:,:,CAMPO_Y] + estado[:,:,CAMPO_ALTURA]) & (estado[:,:,CAMPO_Y] < y + altura)).any(axis=1)
@@ -0,0 +1,197 @@
+"""Perfil de alocações do loop principal, por frame e por etapa do loop, usando o tracemalloc e os
+callbacks do gc. Pode ser ligado pela linha de comando ou por uma tecla durante o jogo.
+
+    python dino_IA.py --perfil-alocacoes                                   # liga desde o início (F4 liga e desliga)
+    python dino_IA.py --benchmark-alocacoes 600 --orcamento-alocacoes 65536  # falha se passar do orçamento
+
+O tracemalloc só enxerga os blocos vivos, então para cada etapa são medidos o pico de memória acima do
+início da etapa (o quanto ela alocou de temporários ao mesmo tempo) e a diferença líquida no fim dela.
+A cada 'intervalo_linhas' frames também é tirado um retrato da memória em cada fronteira de etapa, para
+separar por linha do código os blocos criados na etapa que ainda existem no fim dela.
+"""
+import gc, time, tracemalloc
+from collections import defaultdict, deque
+
+def formata_bytes(valor:float) -> str:
+    """Formata uma quantidade de bytes em B, KiB ou MiB."""
+    for unidade in ["B", "KiB"]:
+        if abs(valor) < 1024:
+            return f"{valor:.0f} {unidade}" if unidade == "B" else f"{valor:.1f} {unidade}"
+        valor /= 1024
+    return f"{valor:.1f} MiB"
+
+class PerfilAlocacoes:
+    """Mede as alocações de cada etapa do loop (etapa("nome") marca o começo de uma etapa e fim_frame() fecha
+    o frame), as coletas do gc e o tempo de cada pausa. Desligado, cada chamada só verifica um atributo."""
+    def __init__(self, orcamento:int=None, intervalo_linhas:int=30, amostras:int=600, linhas:int=10):
+        """Inicializa os acumuladores. orcamento é o limite de bytes alocados por frame (soma dos picos das etapas)."""
+        self.orcamento = orcamento
+        self.intervalo_linhas = intervalo_linhas
+        self.linhas = linhas
+        self.amostras = amostras
+        self.ativo = False
+        self.ignorados = [tracemalloc.Filter(False, tracemalloc.__file__), tracemalloc.Filter(False, __file__)]
+        self.zera()
+
+    def zera(self):
+        """Zera as medições."""
+        self.frames = 0
+        self.bytes_frames = deque(maxlen=self.amostras)
+        self.pausas_frames = deque(maxlen=self.amostras)
+        self.frames_acima = 0
+
+        self.pico_etapas = defaultdict(int)
+        self.liquido_etapas = defaultdict(int)
+        self.gc_etapas = defaultdict(float)
+        self.blocos_linhas = defaultdict(int)
+        self.bytes_linhas = defaultdict(int)
+        self.frames_amostrados = 0
+
+        self.coletas = [0, 0, 0]
+        self.pausas = deque(maxlen=self.amostras)
+        self.inicio_gc = None
+
+        self.etapa_atual = None
+        self.inicio_etapa = 0
+        self.retrato = None
+        self.bytes_frame = 0
+        self.pausa_frame = 0.0
+
+    def liga(self):
+        """Liga o tracemalloc e o callback do gc, zerando as medições anteriores."""
+        if self.ativo:
+            return
+        self.zera()
+        tracemalloc.start(1)
+        gc.callbacks.append(self.callback_gc)
+        self.ativo = True
+
+    def desliga(self):
+        """Desliga o tracemalloc e o callback do gc, mantendo as medições para o relatório."""
+        if not self.ativo:
+            return
+        self.ativo = False
+        self.retrato = None
+        gc.callbacks.remove(self.callback_gc)
+        tracemalloc.stop()
+
+    def alterna(self) -> bool:
+        """Liga ou desliga o perfil e retorna se ele ficou ligado."""
+        if self.ativo:
+            self.desliga()
+        else:
+            self.liga()
+        return self.ativo
+
+    def callback_gc(self, fase:str, info:dict):
+        """Mede cada coleta do gc e atribui a pausa à etapa em que ela aconteceu."""
+        if fase == "start":
+            self.inicio_gc = time.perf_counter()
+        elif self.inicio_gc is not None:
+            pausa = time.perf_counter() - self.inicio_gc
+            self.inicio_gc = None
+            self.coletas[info["generation"]] += 1
+            self.pausas.append(pausa)
+            self.pausa_frame += pausa
+            self.gc_etapas[self.etapa_atual] += pausa
+
+    def amostrando(self) -> bool:
+        """Indica se este frame separa as alocações por linha."""
+        return self.intervalo_linhas > 0 and self.frames % self.intervalo_linhas == 0
+
+    def fecha_etapa(self):
+        """Guarda o pico e a diferença líquida da etapa que está terminando e, nos frames amostrados,
+        os blocos criados nela por linha."""
+        atual, pico = tracemalloc.get_traced_memory()
+        if self.etapa_atual is not None:
+            self.pico_etapas[self.etapa_atual] += pico - self.inicio_etapa
+            self.liquido_etapas[self.etapa_atual] += atual - self.inicio_etapa
+            self.bytes_frame += pico - self.inicio_etapa
+
+        if self.amostrando():
+            retrato = tracemalloc.take_snapshot().filter_traces(self.ignorados)
+            if self.retrato is not None and self.etapa_atual is not None:
+                for diferenca in retrato.compare_to(self.retrato, "lineno"):
+                    if diferenca.count_diff > 0:
+                        quadro = diferenca.traceback[0]
+                        chave = (self.etapa_atual, f"{quadro.filename}:{quadro.lineno}")
+                        self.blocos_linhas[chave] += diferenca.count_diff
+                        self.bytes_linhas[chave] += diferenca.size_diff
+            self.retrato = retrato
+
+    def etapa(self, nome:str):
+        """Fecha a etapa anterior e começa a etapa 'nome'."""
+        if not self.ativo:
+            return
+        self.fecha_etapa()
+        self.etapa_atual = nome
+        tracemalloc.reset_peak()
+        self.inicio_etapa = tracemalloc.get_traced_memory()[0]
+
+    def fim_frame(self):
+        """Fecha a última etapa e o frame, conferindo o orçamento."""
+        if not self.ativo:
+            return
+        self.fecha_etapa()
+        if self.amostrando():
+            self.frames_amostrados += 1
+        self.retrato = None
+
+        self.bytes_frames.append(self.bytes_frame)
+        self.pausas_frames.append(self.pausa_frame)
+        if self.orcamento is not None and self.bytes_frame > self.orcamento:
+            self.frames_acima += 1
+
+        self.frames += 1
+        self.etapa_atual = None
+        self.bytes_frame = 0
+        self.pausa_frame = 0.0
+
+    def percentil(self, valores, p:float) -> float:
+        """Retorna o percentil p de uma sequência de valores."""
+        if not valores:
+            return 0
+        ordenados = sorted(valores)
+        return ordenados[min(len(ordenados) - 1, int(p / 100 * len(ordenados)))]
+
+    def dentro_do_orcamento(self) -> bool:
+        """Indica se o percentil 95 dos bytes alocados por frame ficou dentro do orçamento. O percentil deixa de
+        fora os frames raros de troca de geração, em que a população inteira é recriada."""
+        return self.orcamento is None or self.percentil(self.bytes_frames, 95) <= self.orcamento
+
+    def relatorio(self) -> str:
+        """Monta o relatório com os bytes por frame, cada etapa, as linhas que mais alocam e o gc."""
+        if not self.frames:
+            return "perfil de alocações: nenhum frame medido"
+
+        bytes_frames = list(self.bytes_frames)
+        linhas = [
+            f"perfil de alocações: {self.frames} frames",
+            f"  bytes por frame: média {formata_bytes(sum(bytes_frames) / len(bytes_frames))}, "
+            f"p50 {formata_bytes(self.percentil(bytes_frames, 50))}, p95 {formata_bytes(self.percentil(bytes_frames, 95))}, "
+            f"máximo {formata_bytes(max(bytes_frames))}",
+        ]
+        if self.orcamento is not None:
+            situacao = "dentro" if self.dentro_do_orcamento() else "ACIMA"
+            linhas.append(f"  orçamento {formata_bytes(self.orcamento)} por frame: p95 {situacao} do orçamento, "
+                          f"{self.frames_acima} frames acima")
+
+        linhas.append(f"  {'etapa':<12} {'pico/frame':>12} {'líquido/frame':>14} {'gc ms/frame':>12}")
+        for etapa in self.pico_etapas:
+            linhas.append(f"  {etapa:<12} {formata_bytes(self.pico_etapas[etapa] / self.frames):>12} "
+                          f"{formata_bytes(self.liquido_etapas[etapa] / self.frames):>14} "
+                          f"{self.gc_etapas[etapa] * 1000 / self.frames:>12.3f}")
+
+        if self.frames_amostrados:
+            linhas.append(f"  linhas com mais blocos criados por frame ({self.frames_amostrados} frames amostrados):")
+            ranking = sorted(self.bytes_linhas, key=self.bytes_linhas.get, reverse=True)[:self.linhas]
+            for etapa, linha in ranking:
+                blocos = self.blocos_linhas[(etapa, linha)] / self.frames_amostrados
+                tamanho = self.bytes_linhas[(etapa, linha)] / self.frames_amostrados
+                linhas.append(f"    {etapa:<12} {blocos:>8.1f} blocos {formata_bytes(tamanho):>10}  {linha}")
+
+        pausas = list(self.pausas)
+        linhas.append(f"  gc: coletas por geração {self.coletas}, pausa média "
+                      f"{(sum(pausas) / len(pausas) if pausas else 0) * 1000:.3f} ms, máxima {max(pausas, default=0) * 1000:.3f} ms, "
+                      f"frames com pausa {sum(1 for pausa in self.pausas_frames if pausa)}")
+        return "\n".join(linhas)
@@ -1,5 +1,12 @@
-import pygame, sys, os, json, numpy as np
+from __future__ import annotations
+import pygame, sys, json, argparse
 from random import randint, randrange
+from recursos import GerenciadorRecursos, resource_path
+from tabela_politica import TabelaPolitica
+from constantes import ACAO_CORRER, ACAO_PULAR, ACAO_AGACHAR
+from entrada import EntradaJogador, RITMOS
+from demonstracoes import GravadorDemonstracoes
+from obstaculos import GerenciadorObstaculos
 
 class Individuo:
     """Representa um indivíduo (ou solução) em um algoritmo evolutivo, com pesos e biases que 
@@ -28,6 +35,8 @@ class RedeNeural:
             self.lista_neuronios.append(camada)
         self.lista_neuronios.append(self.camada_saida)
 
+        self.buffers_ativacao = {}
+
     def relu(self, x) -> np.ndarray:
         """Aplica a função de ativação ReLU (Rectified Linear Unit), que retorna o valor de entrada 
         se for positivo e 0 se for negativo."""
@@ -39,26 +48,63 @@ class RedeNeural:
         soma_ponderada = np.dot(inputs, pesos) + bias
         return self.relu(soma_ponderada)
 
+    def buffers(self, linhas:int) -> list:
+        """Retorna os buffers de ativação de cada camada (escondidas e saída) para entradas com esse número
+        de linhas (None para um único vetor, ("lote", n) para o forward_lote), criando-os apenas na primeira vez."""
+        buffers = self.buffers_ativacao.get(linhas)
+        if buffers is None:
+            if linhas is None:
+                buffers = [np.zeros(camada) for camada in self.lista_neuronios[1:]]
+            elif isinstance(linhas, tuple):
+                buffers = [np.zeros((linhas[1], 1, camada)) for camada in self.lista_neuronios[1:]]
+            else:
+                buffers = [np.zeros((linhas, camada)) for camada in self.lista_neuronios[1:]]
+            self.buffers_ativacao[linhas] = buffers
+        return buffers
+
     def forward(self, entradas:list, individuo:Individuo) -> list:
         """Realiza a propagação para frente (feedforward) na rede neural, calculando a saída da rede 
-        com base nas entradas e parâmetros (pesos e biases) do indivíduo."""
+        com base nas entradas e parâmetros (pesos e biases) do indivíduo. Cada camada é escrita no seu
+        buffer pré-alocado, sobrescrito na próxima chamada."""
         pesos = individuo.pesos
         bias = individuo.bias
-        resultado = []
-
-        x = np.array(entradas)  # A entrada inicial
 
-        # Passando pela primeira camada escondida até a última camada escondida
-        for i in range(len(self.camadas_escondida)):
-            x = self.neuronio(x, pesos[i], bias[i])  # Passa pela função de ativação
-            resultado.append(x)
+        x = np.asarray(entradas, dtype=np.float64)  # A entrada inicial
+        resultado = self.buffers(None if x.ndim == 1 else x.shape[0])
 
-        # Passando pela camada de saída
-        x = self.neuronio(x, pesos[-1], bias[-1])
-        resultado.append(x)
+        # Passando por todas as camadas escondidas e pela camada de saída
+        for i, ativacao in enumerate(resultado):
+            np.dot(x, pesos[i], out=ativacao)
+            ativacao += bias[i]
+            np.maximum(ativacao, 0, out=ativacao)  # Passa pela função de ativação
+            x = ativacao
 
         return resultado  # Retorna a saída da rede (previsão do indivíduo)
 
+    def empilha(self, individuos:list) -> tuple:
+        """Empilha os pesos e biases dos indivíduos em arrays (indivíduo, entrada, saída) por camada,
+        no formato usado pelo forward_lote."""
+        pesos = [np.stack([individuo.pesos[camada] for individuo in individuos]) for camada in range(len(self.lista_neuronios)-1)]
+        bias = [np.stack([individuo.bias[camada] for individuo in individuos])[:,None,:] for camada in range(len(self.lista_neuronios)-1)]
+        return pesos, bias
+
+    def forward_lote(self, entradas:np.ndarray, pesos:list, bias:list) -> np.ndarray:
+        """Calcula a camada de saída de cada indivíduo empilhado para a sua linha da matriz de entradas
+        (indivíduo, sensores), com um único produto de matrizes por camada para todos."""
+        x = entradas[:,None,:]
+        resultado = self.buffers(("lote", entradas.shape[0]))
+        for i, ativacao in enumerate(resultado):
+            np.matmul(x, pesos[i], out=ativacao)
+            ativacao += bias[i]
+            np.maximum(ativacao, 0, out=ativacao)
+            x = ativacao
+        return x[:,0,:]
+
+    def acoes(self, saida:np.ndarray) -> np.ndarray:
+        """Converte a camada de saída (uma linha por indivíduo) nas ações do dino:
+        agacha se a segunda saída for maior, pula se a primeira for maior e corre se forem iguais."""
+        return np.where(saida[:,0] < saida[:,1], ACAO_AGACHAR, np.where(saida[:,0] > saida[:,1], ACAO_PULAR, ACAO_CORRER))
+
 class Dino(pygame.sprite.Sprite):
     """Representa o personagem dinossauro no jogo, com diferentes estados de animação (correndo, agachando, pulando) 
     e lógica de movimentação (pulo, colisão com o chão e gravidade)."""
@@ -67,6 +113,7 @@ class Dino(pygame.sprite.Sprite):
         cria a lista de sprites com a cor aleatória."""
         pygame.sprite.Sprite.__init__(self)
         self.individuo = None
+        self.indice = 0
         self.morreu = False
         self.passando_obstaculo = False
         self.y_inicial = y_inicial
@@ -80,15 +127,9 @@ class Dino(pygame.sprite.Sprite):
         self.rect.bottom = self.y_inicial
 
     def set_cor(self, cor:tuple):
-        """Define uma cor aleatória para o Dino e adiciona as sprites a lista de sprites com base na
-        imagem de fundo (sheet_dino), aplicando a cor escolhida."""
-        sheet = sheet_dino.copy()
-        sheet.fill(cor, special_flags=pygame.BLEND_RGB_MULT)
-
-        self.sprite_list = []
-        for i in range(6):
-            img = sheet.subsurface((i * 64,0), (64,64))
-            self.sprite_list.append(img)
+        """Define a cor do Dino usando os frames tingidos do gerenciador de recursos, que só
+        tinge a sheet (sheet_dino) na primeira vez que a cor é usada."""
+        self.sprite_list = recursos.frames_dino(cor)
 
     def run(self):
         """Define a animação de corrida do Dino, alternando entre os sprites de corrida com base
@@ -136,10 +177,7 @@ class Chao(pygame.sprite.Sprite):
         """Inicializa o Chão com uma lista de imagens de sprite e define sua posição inicial,
         com base na coordenada y fornecida como parametro."""
         pygame.sprite.Sprite.__init__(self)
-        self.sprite_list = []
-        for i in range(6):
-            img = sheet_chao.subsurface((i * 60,0), (60,12))
-            self.sprite_list.append(img)
+        self.sprite_list = recursos.frames("chao")
 
         self.image = self.sprite_list[randint(0,5)]
         self.rect = self.image.get_rect()
@@ -159,7 +197,7 @@ class Nuvem(pygame.sprite.Sprite):
     def __init__(self):
         """Inicializa a Nuvem com a imagem e define sua posição inicial fora da tela, à direita."""
         pygame.sprite.Sprite.__init__(self)
-        self.image = sprite_nuvem
+        self.image = recursos.frames("nuvem")[0]
         self.rect = self.image.get_rect()
         self.rect.right = 0
 
@@ -178,10 +216,7 @@ class Cacto(pygame.sprite.Sprite):
         pygame.sprite.Sprite.__init__(self)
         """Inicializa o Cacto com a posição y inicial, carrega as imagens de sprite e define a imagem inicial do Cacto."""
         self.y_inicial = y_inicial
-        self.sprite_list = []
-        for i in range(5):
-            img = sheet_cacto.subsurface((i * 73,0), (73,47))
-            self.sprite_list.append(img)
+        self.sprite_list = recursos.frames("cacto")
 
         self.rect = pygame.rect.Rect(0,0,0,0)
         self.image = None
@@ -205,6 +240,10 @@ class Cacto(pygame.sprite.Sprite):
 
         self.image = self.sprite_list[indice_img]
 
+    def prepara(self):
+        """Chamado pelo GerenciadorObstaculos quando o Cacto volta para a tela: sorteia uma nova imagem."""
+        self.set_image()
+
     def update(self):
         """Atualiza a posição do Cacto na tela, movendo-o horizontalmente com base na velocidade do cenário."""
         if self.rect.right > 0:
@@ -218,14 +257,15 @@ class Pterossauro(pygame.sprite.Sprite):
         pygame.sprite.Sprite.__init__(self)
         self.y_inicial = y_inicial
         self.index_sprite = 0
-        self.sprite_list = [
-            sheet_pterossauro.subsurface((0,0), (42,36)),
-            sheet_pterossauro.subsurface((42,0), (42,36))
-        ]
+        self.sprite_list = recursos.frames("pterossauro")
         self.image = self.sprite_list[0]
         self.rect = self.image.get_rect()
         self.rect.right = 0
 
+    def prepara(self):
+        """Chamado pelo GerenciadorObstaculos quando o Pterossauro volta para a tela: sorteia uma das 3 alturas."""
+        self.rect.bottom = randrange(self.y_inicial-60, self.y_inicial+30, 30)
+
     def update(self):
         """Atualiza a posição do Pterossauro na tela e altera a animação entre os sprites de voo."""
         if self.rect.right > 0:
@@ -237,48 +277,84 @@ class Pterossauro(pygame.sprite.Sprite):
             self.index_sprite += 0.15
             self.image = self.sprite_list[int(self.index_sprite)]
         
-def nome_da_classe(objeto) -> str:
-    """Retorna o nome da classe do objeto passado como argumento."""
-    return objeto.__class__.__name__
-
-def set_posicao_x(obstaculo):
-    """Define a posição horizontal do obstáculo com base na posição do último obstáculo visível na tela, 
-    adicionando uma distância aleatória entre 400 e 600 pixels."""
-    obstaculo.rect.x = lista_obstaculos_tela[-1].rect.x + randint(400,600)
-
-def set_novo_obstaculo():
-    """Define e posiciona um novo obstáculo na tela, escolhendo aleatoriamente entre um Pterossauro ou um Cacto,
-    ajustando sua posição vertical e adicionando-o à lista de obstáculos visíveis na tela."""
-    nome_classes_espera = list(map(nome_da_classe, lista_obstaculos_espera))
-    chance_pterossauro = randint(1,5) == 1 # 20%
-    
-    if chance_pterossauro:
-        nome_obstaculo = "Pterossauro"
-    else:
-        nome_obstaculo = "Cacto"
-
-    if nome_obstaculo in nome_classes_espera:
-        if nome_classes_espera[0] == nome_obstaculo:
-            obstaculo_espera = lista_obstaculos_espera.pop(0)
+def atualiza_sensores(entradas:np.ndarray, dinos_vivos:list) -> pygame.sprite.Sprite:
+    """Preenche a matriz de entradas dos fantasmas (uma linha por fantasma) e retorna o obstáculo da frente.
+    Todos os fantasmas vivos ficam em x = 50, então os sensores do obstáculo e a velocidade são calculados
+    uma vez por frame; só a dino_altura é lida de cada fantasma."""
+    dino_rect = dinos_vivos[0].rect
+
+    """Referencia o obstáculo mais próximo dos dinos no array de estado dos obstáculos (atualizado no começo do frame)"""
+    frente = obstaculos.frente(dino_rect.x)
+    x, y, largura, altura, _ = obstaculos.estado[frente].tolist()
+
+    entradas[:,0] = x - dino_rect.right                            # obstaculo_distacia
+    entradas[:,1] = x + largura - dino_rect.right                  # obstaculo_largura
+    entradas[:,2] = ALTURA_TELA - y                                # obstaculo_altura
+    entradas[:,3] = ALTURA_TELA - (y + altura)                     # obstaculo_comprimento
+    entradas[:,4] = cenario_velocidade                             # cenario_velocidade
+
+    for dino in dinos_vivos:
+        entradas[dino.indice,5] = ALTURA_TELA - dino.rect.y        # dino_altura
+
+    return obstaculos[frente]
+
+def sensores_dino(dino:Dino) -> list:
+    """Retorna os 6 sensores da rede neural para um dino (na ordem da descrição da rede)."""
+    """Referencia o obstáculo mais próximo do dino no array de estado dos obstáculos"""
+    x, y, largura, altura, _ = obstaculos.estado[obstaculos.frente(dino.rect.x)].tolist()
+
+    return [
+        x - dino.rect.right,                           # obstaculo_distacia
+        x + largura - dino.rect.right,                 # obstaculo_largura
+        ALTURA_TELA - y,                               # obstaculo_altura
+        ALTURA_TELA - (y + altura),                    # obstaculo_comprimento
+        cenario_velocidade,                            # cenario_velocidade
+        ALTURA_TELA - dino.rect.y,                     # dino_altura
+    ]
+
+def acao_jogador(entrada:EntradaJogador) -> int:
+    """Traduz as teclas seguradas pelo jogador na ação equivalente da I.A. (agachar tem prioridade, como no jogo)."""
+    if entrada.pressionada(pygame.K_DOWN):
+        return ACAO_AGACHAR
+    if entrada.pressionada(pygame.K_UP, pygame.K_SPACE):
+        return ACAO_PULAR
+    return ACAO_CORRER
+
+def aplica_acao(dino:Dino, acao:int, som:bool=True):
+    """Executa a ação escolhida pela I.A. (tabela ou rede neural) no dino."""
+    if acao == ACAO_AGACHAR: # Agachar
+        if dino.rect.bottom == dino.y_inicial:
+            dino.crouch()
         else:
-            obstaculo_espera = lista_obstaculos_espera.pop(1)
-        lista_obstaculos_espera.append(lista_obstaculos_tela.pop(0))
-    else:
-        obstaculo_espera = lista_obstaculos_tela.pop(0)
-
-    if nome_da_classe(obstaculo_espera) == "Pterossauro":
-        obstaculo_espera.rect.bottom = randrange(obstaculo_espera.y_inicial-60, obstaculo_espera.y_inicial+30, 30)
-    else:
-        obstaculo_espera.set_image()
-
-    set_posicao_x(obstaculo_espera)
-    lista_obstaculos_tela.append(obstaculo_espera)
-
-def mata_dino(dino:Dino):
+            dino.velocidade_y += 1
+    elif acao == ACAO_PULAR: # Pular
+        dino.rect.height = 43
+        dino.image = dino.sprite_list[1]
+        if dino.rect.bottom == dino.y_inicial:
+            dino.velocidade_y = -10
+            dino.rect.y -= 10
+            if som:
+                recursos.toca_som("pulo")
+        else:
+            dino.jump()
+    else: # Correr
+        if dino.rect.bottom == dino.y_inicial: 
+            dino.rect.height = 43
+            dino.run()
+
+def reinicia_dino(dino:Dino, x:int):
+    """Coloca o dino vivo e em pé na posição inicial."""
+    dino.morreu = False
+    dino.rect.x = x
+    dino.rect.height = 43
+    dino.image = dino.sprite_list[1]
+    dino.rect.bottom = dino.y_inicial
+
+def mata_dino(dino:Dino, som:bool=True):
     """Marca o dinossauro como morto, altera sua imagem e executa o som de morte, 
     ajustando a altura e posição do dinossauro caso ele tenha um tamanho ou posição específica."""
-    if som_ativo:
-        som_morte.play()
+    if som:
+        recursos.toca_som("morte")
 
     dino.morreu = True
     dino.image = dino.sprite_list[0]
@@ -289,14 +365,14 @@ def mata_dino(dino:Dino):
 
 def exibe_mensagem(msg, tamanho:int, cor:tuple) -> pygame.surface.Surface:
     """Exibe uma mensagem formatada na tela com a fonte e cor especificadas"""
-    fonte = pygame.font.Font(diretorio_fonte, tamanho)
+    fonte = recursos.fonte(tamanho)
     texto_formatado = fonte.render(f"{msg}", True, cor)
     return texto_formatado
 
-def carrega_json() -> dict:
+def carrega_json(caminho:str="save.json") -> dict:
     """Carrega os dados da rede neural salvo no arquivo "save.json"."""
     try:
-        with open("save.json", "r", encoding="utf-8") as arquivo:
+        with open(caminho, "r", encoding="utf-8") as arquivo:
             dados = json.load(arquivo)
             for indice in range(len(dados["individuo"]["pesos"])):
                 dados["individuo"]["pesos"][indice] = np.array(dados["individuo"]["pesos"][indice])
@@ -305,16 +381,33 @@ def carrega_json() -> dict:
     except (FileNotFoundError, json.JSONDecodeError):
         return None
 
-def resource_path(*paths) -> str:
-    """Retorna o caminho correto, dependendo de estar rodando no executável ou no código fonte."""
-    if getattr(sys, "frozen", False):
-        # Quando estiver no executável (PyInstaller)
-        base_path = sys._MEIPASS
-    else:
-        # Quando estiver no código fonte
-        base_path = os.path.join(os.path.dirname(__file__), "assets")
-
-    return os.path.join(base_path, *paths)
+def carrega_fantasmas(caminhos:list, arquivo_hall:str=None, quantidade_hall:int=0) -> list:
+    """Carrega os indivíduos dos fantasmas: checkpoints no formato do save.json e os elites de gerações espalhadas
+    do hall da fama. Como todos rodam no mesmo forward, só entram os que têm a topologia do primeiro."""
+    individuos = []
+    for caminho in caminhos:
+        dados = carrega_json(caminho)
+        if dados is None:
+            print(f"Fantasma ignorado, checkpoint não encontrado: {caminho}")
+            continue
+        individuos.append(Individuo(dados["individuo"]["pesos"], dados["individuo"]["bias"]))
+
+    if arquivo_hall and quantidade_hall:
+        from hall_da_fama import HallDaFama
+        hall = HallDaFama(arquivo_hall)
+        for id_individuo in hall.elites(quantidade_hall):
+            individuo, _, _, _ = hall.individuo(id_individuo)
+            individuos.append(Individuo(individuo.pesos, individuo.bias))
+        hall.fecha()
+
+    if not individuos:
+        return []
+
+    formato = [pesos.shape for pesos in individuos[0].pesos]
+    compativeis = [individuo for individuo in individuos if [pesos.shape for pesos in individuo.pesos] == formato]
+    if len(compativeis) < len(individuos):
+        print(f"{len(individuos) - len(compativeis)} fantasmas ignorados por terem outra topologia")
+    return compativeis
 
 def alterna_cor(dino:Dino):
     """Altera a cor do Dino para uma nova cor aleatória."""
@@ -325,11 +418,27 @@ def alterna_cor(dino:Dino):
             dino_inc[indice] = -randint(0,2)
 
         dino_cor[indice] += dino_inc[indice]
-            
-    dino.set_cor(tuple(dino_cor))
+
+    # Arredonda a cor em passos de 4 para reaproveitar os frames tingidos entre frames seguidos
+    dino.set_cor(tuple(valor - valor % 4 for valor in dino_cor))
 
 if __name__ == "__main__":
 
+    parser = argparse.ArgumentParser(description="Dino I.A. - jogador contra a I.A.")
+    parser.add_argument("--fantasmas", nargs="+", default=[], metavar="CHECKPOINT",
+                        help="checkpoints (formato do save.json) que correm junto como fantasmas")
+    parser.add_argument("--hall-da-fama", default=None, metavar="ARQUIVO",
+                        help="hall da fama (hall_da_fama.py) de onde vêm fantasmas de gerações passadas")
+    parser.add_argument("--ritmo", choices=RITMOS, default="tick",
+                        help="como o loop espera o próximo frame: tick (padrão), busy (tick_busy_loop), agenda ou vsync")
+    parser.add_argument("--latencia", action="store_true", help="mostra a latência das teclas na tela (F3 alterna)")
+    parser.add_argument("--hall-fantasmas", type=int, default=20,
+                        help="quantas gerações do hall da fama viram fantasmas")
+    parser.add_argument("--grava-demonstracoes", default=None, metavar="ARQUIVO",
+                        help="grava os sensores e as ações do jogador para o treino por imitação (imitacao.py)")
+    parser.add_argument("--tempo-inicio", action="store_true", help="mostra o tempo entre o início do processo e o primeiro frame")
+    args = parser.parse_args()
+
     """Configura a rede neural"""
     rede_neural = RedeNeural(
         camada_entrada=6,
@@ -350,13 +459,9 @@ if __name__ == "__main__":
     limite_grafico_y = escala * 300
 
     """Configura o pygame"""
-    pygame.init()
-
-    try:
-        pygame.mixer.init()
-        som_ativo = True
-    except:
-        som_ativo = False
+    # O mixer é inicializado junto com os sons pelo GerenciadorRecursos, fora da thread principal
+    pygame.display.init()
+    pygame.font.init()
 
     LARGURA_TELA = 1000
     ALTURA_TELA = 600
@@ -367,135 +472,177 @@ if __name__ == "__main__":
     CINZA = (200,200,200)
     AZUL = (0,0,255)
 
-    tela = pygame.display.set_mode((LARGURA_TELA, ALTURA_TELA))
+    if args.ritmo == "vsync":
+        tela = pygame.display.set_mode((LARGURA_TELA, ALTURA_TELA), pygame.SCALED, vsync=1)
+    else:
+        tela = pygame.display.set_mode((LARGURA_TELA, ALTURA_TELA))
     pygame.display.set_caption("Dino I.A.")
     pygame.display.set_icon(pygame.image.load(resource_path("icon.png")))
 
-    relogio = pygame.time.Clock()
+    """Entrada do jogador com passo fixo de 60 passos por segundo e o ritmo de espera escolhido"""
+    entrada = EntradaJogador(60, args.ritmo)
+    mostra_latencia = args.latencia
+    gravador = GravadorDemonstracoes(args.grava_demonstracoes) if args.grava_demonstracoes else None
     cenario_velocidade = 5
     renicia = False
     start = False
     pontos = 0
 
-    """Carrega a fonte as imagens e os sons do jogo"""
-    diretorio_fonte = resource_path("fonts", "Minecraft.ttf")
-
-    sheet_dino = pygame.image.load(resource_path("images", "dino.png")).convert_alpha()
-    sheet_chao = pygame.image.load(resource_path("images", "chao.png")).convert_alpha()
-    sprite_nuvem = pygame.image.load(resource_path("images", "nuvem.png")).convert_alpha()
-    sheet_cacto = pygame.image.load(resource_path("images", "cacto.png")).convert_alpha()
-    sheet_pterossauro = pygame.image.load(resource_path("images", "pterossauro.png")).convert_alpha()
-
-    if som_ativo:
-        som_pulo = pygame.mixer.Sound(resource_path("sounds", "jump_sound.wav"))
-        som_morte = pygame.mixer.Sound(resource_path("sounds", "death_sound.wav"))
-        som_ponto = pygame.mixer.Sound(resource_path("sounds", "score_sound.wav"))
+    """Carrega as imagens do jogo e inicia o carregamento dos sons em segundo plano"""
+    recursos = GerenciadorRecursos()
+    recursos.carrega()
+    recursos.inicia_sons()
 
     """Configura o dinossauro da rede neural"""
 
     dino_ia = Dino(ALTURA_TELA-15, CINZA)
     
-    dados = carrega_json()
-    
-    if dados:
-        # tem erro aki
-        dino_ia.individuo = Individuo(dados["individuo"]["pesos"], dados["individuo"]["bias"])
-    else:
-        dino_ia.individuo = Individuo(
-            pesos = [
-                np.array([
-                    [
-                        7.196304852649284,
-                        -0.8739284556547353,
-                        -1.6975048223995874,
-                        -2.98242856498219,
-                        -2.7021646940160915,
-                        1.2781313844327562
-                    ],
-                    [
-                        4.742541953883711,
-                        -11.869064400397106,
-                        -7.790752627277446,
-                        -5.344319388794939,
-                        6.899810621104953,
-                        -1.1759477190178842
-                    ],
-                    [
-                        1.1224235946486858,
-                        -0.40061956985182307,
-                        -4.26790057337712,
-                        -12.442097770867159,
-                        0.9291181289042172,
-                        7.280128774885846
-                    ],
-                    [
-                        -12.66623272904336,
-                        1.7052058907530259,
-                        -1.0943501925153436,
-                        6.509224593982106,
-                        0.22764843152623804,
-                        -13.632405470325589
-                    ],
-                    [
-                        -5.162484955395137,
-                        -8.58024069920135,
-                        10.624031043448081,
-                        -12.83127759695358,
-                        -8.497248449476011,
-                        5.405933049404479
-                    ],
-                    [
-                        -12.842842267697566,
-                        -0.6266692725507854,
-                        2.267377048400517,
-                        11.992436112326144,
-                        6.7753798039642765,
-                        1.1226732468251372
-                    ]
-                ]),
-                np.array([
-                    [
-                        -13.228347415617975,
-                        -4.873485555819144
-                    ],
-                    [
-                        -2.4595792782331607,
-                        22.226765890496594
-                    ],
-                    [
-                        22.958096390683938,
-                        -0.7936401059029947
-                    ],
-                    [
-                        4.816804502679519,
-                        -1.9298940656587684
-                    ],
-                    [
-                        0.887515880142751,
-                        4.1905217063949145
-                    ],
-                    [
-                        6.855975892895226,
-                        -13.933524981600545
-                    ]
-                ])
-            ],
-            bias = [
-                np.array([
-                    -2.04535008540506,
-                    5.471609138429885,
-                    0.7913569598490003,
-                    11.443279839241377,
-                    8.238800402782305,
-                    -6.3876627774243495
-                ]),
-                np.array([
-                    -0.1773017800941552,
-                    -10.152596785011804
-                ])
-            ]
+    """Usa a tabela de decisões compilada (compila_politica.py) se ela existir para o save atual;
+    sem ela o NumPy é importado e a rede neural roda a cada frame"""
+    tabela_politica = TabelaPolitica.carrega("politica.bin", "save.json")
+
+    if tabela_politica is None:
+        import numpy as np
+
+        dados = carrega_json()
+
+        if dados:
+            pesos = dados["individuo"]["pesos"]
+            dino_ia.individuo = Individuo(pesos, dados["individuo"]["bias"])
+
+            # A topologia vem do formato dos pesos salvos, que pode ter outras camadas escondidas
+            rede_neural = RedeNeural(
+                camada_entrada=pesos[0].shape[0],
+                camadas_escondida=[camada.shape[1] for camada in pesos[:-1]],
+                camada_saida=pesos[-1].shape[1],
+                descricao=rede_neural.descricao
+            )
+        else:
+            dino_ia.individuo = Individuo(
+                pesos = [
+                    np.array([
+                        [
+                            7.196304852649284,
+                            -0.8739284556547353,
+                            -1.6975048223995874,
+                            -2.98242856498219,
+                            -2.7021646940160915,
+                            1.2781313844327562
+                        ],
+                        [
+                            4.742541953883711,
+                            -11.869064400397106,
+                            -7.790752627277446,
+                            -5.344319388794939,
+                            6.899810621104953,
+                            -1.1759477190178842
+                        ],
+                        [
+                            1.1224235946486858,
+                            -0.40061956985182307,
+                            -4.26790057337712,
+                            -12.442097770867159,
+                            0.9291181289042172,
+                            7.280128774885846
+                        ],
+                        [
+                            -12.66623272904336,
+                            1.7052058907530259,
+                            -1.0943501925153436,
+                            6.509224593982106,
+                            0.22764843152623804,
+                            -13.632405470325589
+                        ],
+                        [
+                            -5.162484955395137,
+                            -8.58024069920135,
+                            10.624031043448081,
+                            -12.83127759695358,
+                            -8.497248449476011,
+                            5.405933049404479
+                        ],
+                        [
+                            -12.842842267697566,
+                            -0.6266692725507854,
+                            2.267377048400517,
+                            11.992436112326144,
+                            6.7753798039642765,
+                            1.1226732468251372
+                        ]
+                    ]),
+                    np.array([
+                        [
+                            -13.228347415617975,
+                            -4.873485555819144
+                        ],
+                        [
+                            -2.4595792782331607,
+                            22.226765890496594
+                        ],
+                        [
+                            22.958096390683938,
+                            -0.7936401059029947
+                        ],
+                        [
+                            4.816804502679519,
+                            -1.9298940656587684
+                        ],
+                        [
+                            0.887515880142751,
+                            4.1905217063949145
+                        ],
+                        [
+                            6.855975892895226,
+                            -13.933524981600545
+                        ]
+                    ])
+                ],
+                bias = [
+                    np.array([
+                        -2.04535008540506,
+                        5.471609138429885,
+                        0.7913569598490003,
+                        11.443279839241377,
+                        8.238800402782305,
+                        -6.3876627774243495
+                    ]),
+                    np.array([
+                        -0.1773017800941552,
+                        -10.152596785011804
+                    ])
+                ]
+            )
+
+    """Configura os fantasmas: todos usam os mesmos frames translúcidos e rodam em um único forward por frame"""
+    COR_FANTASMA = (150,150,150)
+    lista_fantasmas = []
+    group_fantasmas = pygame.sprite.Group()
+
+    if args.fantasmas or args.hall_da_fama:
+        import numpy as np
+
+        individuos_fantasmas = carrega_fantasmas(args.fantasmas, args.hall_da_fama, args.hall_fantasmas)
+        for indice, individuo in enumerate(individuos_fantasmas):
+            fantasma = Dino(ALTURA_TELA-15, CINZA)
+            fantasma.sprite_list = recursos.frames_fantasma(COR_FANTASMA)
+            fantasma.image = fantasma.sprite_list[1]
+            fantasma.individuo = individuo
+            fantasma.indice = indice
+            lista_fantasmas.append(fantasma)
+            group_fantasmas.add(fantasma)
+
+    if lista_fantasmas:
+        pesos = lista_fantasmas[0].individuo.pesos
+        rede_fantasmas = RedeNeural(
+            camada_entrada=pesos[0].shape[0],
+            camadas_escondida=[camada.shape[1] for camada in pesos[:-1]],
+            camada_saida=pesos[-1].shape[1],
+            descricao=rede_neural.descricao
         )
-        
+        pesos_fantasmas, bias_fantasmas = rede_fantasmas.empilha([fantasma.individuo for fantasma in lista_fantasmas])
+        entradas_fantasmas = np.zeros((len(lista_fantasmas), rede_fantasmas.camada_entrada))
+    fantasmas_vivos = lista_fantasmas.copy()
+
     """Configura o dinossauro do jogador"""
 
     dino_player = Dino(ALTURA_TELA-15, AZUL)
@@ -528,149 +675,147 @@ if __name__ == "__main__":
         lista_nuvem.append(nuvem)
         group_sprites.add(nuvem)
 
-    group_obstaculos = pygame.sprite.Group()
-
-    cacto = Cacto(ALTURA_TELA-10)
-    cacto.rect.x = LARGURA_TELA
-    group_obstaculos.add(cacto)
-    lista_obstaculos_tela = [cacto]
-
-    for _ in range(3):
-        cacto = Cacto(ALTURA_TELA-10)
-        set_posicao_x(cacto)
-        lista_obstaculos_tela.append(cacto)
-        group_obstaculos.add(cacto)
-
-    lista_obstaculos_espera = []
-
-    for _ in range(2):
-        pterossauro = Pterossauro(ALTURA_TELA-15)
-        lista_obstaculos_espera.append(pterossauro)
-        group_obstaculos.add(pterossauro)
+    """4 cactos e 2 pterossauros reaproveitados pelo gerenciador, com 20% de chance de o próximo ser um pterossauro"""
+    obstaculos = GerenciadorObstaculos({
+        "cacto": (lambda: Cacto(ALTURA_TELA-10), 4, 4),
+        "pterossauro": (lambda: Pterossauro(ALTURA_TELA-15), 2, 1),
+    })
+    obstaculos.reinicia(["cacto"] * 4, LARGURA_TELA)
+    group_obstaculos = pygame.sprite.Group(obstaculos.todos)
 
     """Loop principal do jogo"""
     while True:
         tela.fill(BRANCO)
-        for event in pygame.event.get():
-            if event.type == pygame.QUIT:
-                pygame.quit()
-                sys.exit()
-            elif event.type == pygame.KEYDOWN:
-                if event.key == pygame.K_BACKSPACE:
-                    renicia = True
-                elif event.key in [pygame.K_UP, pygame.K_SPACE]:
-                    start = True
-                    if dino_player.rect.bottom == dino_player.y_inicial:
-                        dino_player.velocidade_y = -10
-                        dino_player.rect.y -= 10
-                        if som_ativo:
-                            som_pulo.play()
-
-        if start:
-            if not dino_ia.morreu:
-                """Referencia o obstáculo mais próximo do dino"""
-                if lista_obstaculos_tela[0].rect.right > dino_ia.rect.x:   
-                    obstaculo_frente = lista_obstaculos_tela[0]
-                else:
-                    obstaculo_frente = lista_obstaculos_tela[1]
-
-                entradas = [
-                    obstaculo_frente.rect.x - dino_ia.rect.right,     # obstaculo_distacia
-                    obstaculo_frente.rect.right - dino_ia.rect.right, # obstaculo_largura
-                    ALTURA_TELA - obstaculo_frente.rect.y,            # obstaculo_altura
-                    ALTURA_TELA - obstaculo_frente.rect.bottom,       # obstaculo_comprimento
-                    cenario_velocidade,                               # cenario_velocidade
-                    ALTURA_TELA - dino_ia.rect.y,                     # dino_altura
-                ]
-
-                """Calcula a saída da rede neural para o dino"""
-                saida = rede_neural.forward(entradas, dino_ia.individuo)
-
-                """Executa a ação com base na saída da rede neural"""
-                if saida[-1][0] < saida[-1][1]: # Agachar
-                    if dino_ia.rect.bottom == dino_ia.y_inicial:
-                        dino_ia.crouch()
+        entrada.coleta()
+
+        """Simula os passos que venceram desde o último frame, aplicando cada tecla no passo em que foi pressionada"""
+        for horario in entrada.passos():
+            """Estado dos obstáculos do passo, lido pelos sensores e pelas colisões. Os sensores do jogador são lidos
+            antes de as teclas do passo moverem o dino, para a gravação guardar o estado em que ele decidiu"""
+            obstaculos.atualiza_estado()
+            if gravador and not dino_player.morreu:
+                sensores_jogador = sensores_dino(dino_player)
+            pulou = False
+
+            for event in entrada.eventos(horario):
+                if event.type == pygame.QUIT:
+                    if gravador:
+                        gravador.fecha()
+                        print(f"{gravador.registros} passos gravados em {args.grava_demonstracoes}")
+                    pygame.quit()
+                    sys.exit()
+                elif event.type == pygame.KEYDOWN:
+                    if event.key == pygame.K_BACKSPACE:
+                        renicia = True
+                    elif event.key == pygame.K_F3:
+                        mostra_latencia = not mostra_latencia
+                    elif event.key in [pygame.K_UP, pygame.K_SPACE]:
+                        start = True
+                        if dino_player.rect.bottom == dino_player.y_inicial:
+                            dino_player.velocidade_y = -10
+                            dino_player.rect.y -= 10
+                            recursos.toca_som("pulo")
+                            pulou = True
+
+            if start:
+                if not dino_ia.morreu:
+                    entradas = sensores_dino(dino_ia)
+
+                    """Escolhe a ação pela tabela compilada ou calcula a saída da rede neural para o dino"""
+                    if tabela_politica:
+                        acao = tabela_politica.acao(entradas)
                     else:
-                        dino_ia.velocidade_y += 1
-                elif saida[-1][0] > saida[-1][1]: # Pular
-                    dino_ia.rect.height = 43
-                    dino_ia.image = dino_ia.sprite_list[1]
-                    if dino_ia.rect.bottom == dino_ia.y_inicial:
-                        dino_ia.velocidade_y = -10
-                        dino_ia.rect.y -= 10
-                        if som_ativo:
-                            som_pulo.play()
+                        saida = rede_neural.forward(entradas, dino_ia.individuo)
+                        if saida[-1][0] < saida[-1][1]:
+                            acao = ACAO_AGACHAR
+                        elif saida[-1][0] > saida[-1][1]:
+                            acao = ACAO_PULAR
+                        else:
+                            acao = ACAO_CORRER
+
+                    """Executa a ação com base na saída da rede neural"""
+                    aplica_acao(dino_ia, acao)
+
+                    """Verifica se o dino colidiu com algum obstáculo"""
+                    colidiu = obstaculos.colide(dino_ia.rect)
+                    
+                    if colidiu:
+                        ultimo_dino = mata_dino(dino_ia)
+
+                if fantasmas_vivos:
+                    """Todos os fantasmas vivos decidem juntos; eles não tocam sons"""
+                    atualiza_sensores(entradas_fantasmas, fantasmas_vivos)
+                    acoes_fantasmas = rede_fantasmas.acoes(rede_fantasmas.forward_lote(entradas_fantasmas, pesos_fantasmas, bias_fantasmas))
+
+                    indice = 0
+                    while indice < len(fantasmas_vivos):
+                        fantasma = fantasmas_vivos[indice]
+                        aplica_acao(fantasma, acoes_fantasmas[fantasma.indice], som=False)
+
+                        if obstaculos.colide(fantasma.rect):
+                            mata_dino(fantasma, som=False)
+                            fantasmas_vivos.pop(indice)
+                        else:
+                            indice += 1
+
+                if not dino_player.morreu:
+                    """Grava os sensores do começo do passo com a ação que o jogador escolheu nele; um toque rápido
+                    (KEYDOWN e KEYUP no mesmo passo) já soltou a tecla, mas o dino saiu do chão neste passo"""
+                    if gravador:
+                        gravador.grava(sensores_jogador, ACAO_PULAR if pulou else acao_jogador(entrada))
+
+                    if entrada.pressionada(pygame.K_DOWN):
+                        if dino_player.rect.bottom == dino_player.y_inicial:
+                            dino_player.crouch()
+                        else:
+                            dino_player.velocidade_y += 1
                     else:
-                        dino_ia.jump()
-                else: # Correr
-                    if dino_ia.rect.bottom == dino_ia.y_inicial: 
-                        dino_ia.rect.height = 43
-                        dino_ia.run()
-
-                """Verifica se o dino colidiu com algum obstáculo"""
-                colidiu = pygame.sprite.spritecollide(dino_ia, group_obstaculos, False)
-                
-                if colidiu:
-                    ultimo_dino = mata_dino(dino_ia)
-
-            if not dino_player.morreu:
-                if pygame.key.get_pressed()[pygame.K_DOWN]:
-                    if dino_player.rect.bottom == dino_player.y_inicial:
-                        dino_player.crouch()
-                    else:
-                        dino_player.velocidade_y += 1
-                else:
-                    dino_player.rect.height = 43
+                        dino_player.rect.height = 43
 
-                    if dino_player.rect.bottom < dino_player.y_inicial:
-                        dino_player.image = dino_player.sprite_list[1]
-                        if pygame.key.get_pressed()[pygame.K_UP] or pygame.key.get_pressed()[pygame.K_SPACE]:
-                            dino_player.jump()
-                    else:
-                        dino_player.run()
+                        if dino_player.rect.bottom < dino_player.y_inicial:
+                            dino_player.image = dino_player.sprite_list[1]
+                            if entrada.pressionada(pygame.K_UP, pygame.K_SPACE):
+                                dino_player.jump()
+                        else:
+                            dino_player.run()
 
-                colisoes = pygame.sprite.spritecollide(dino_player, group_obstaculos, False)
+                    colisoes = obstaculos.colide(dino_player.rect)
 
-                if colisoes:
-                    mata_dino(dino_player)
+                    if colisoes:
+                        mata_dino(dino_player)
 
-            if not dino_player.morreu:
-                alterna_cor(dino_player)
+                if not dino_player.morreu:
+                    alterna_cor(dino_player)
 
-            pontos += 1
+                pontos += 1
 
-            """Taxa de aumento de velocidade do cenario"""
-            if pontos % 250 == 0:
-                if som_ativo:
-                    som_ponto.play()
-                if cenario_velocidade < 15:
-                    cenario_velocidade += 1
+                """Taxa de aumento de velocidade do cenario"""
+                if pontos % 250 == 0:
+                    recursos.toca_som("ponto")
+                    if cenario_velocidade < 15:
+                        cenario_velocidade += 1
 
-            if lista_obstaculos_tela[0].rect.right <= 0:
-                set_novo_obstaculo()
+                if obstaculos[0].rect.right <= 0:
+                    obstaculos.recicla()
 
-            """Atualiza e as sprites na tela"""
-            group_sprites.update()
-            group_obstaculos.update()
-        
-        if dino_ia.morreu and dino_player.morreu:
-            renicia = True
+                """Atualiza e as sprites na tela"""
+                group_sprites.update()
+                group_fantasmas.update()
+                group_obstaculos.update()
+            
+            if dino_ia.morreu and dino_player.morreu:
+                renicia = True
 
         """Renicia o jogo"""
         if renicia:
             
-            """config do player e da IA"""
-            dino_player.morreu = False
-            dino_player.rect.x = 150
-            dino_player.rect.height = 43
-            dino_player.image = dino_player.sprite_list[1]
-            dino_player.rect.bottom = dino_player.y_inicial
-
-            dino_ia.morreu = False
-            dino_ia.rect.x = 50
-            dino_ia.rect.height = 43
-            dino_ia.image = dino_ia.sprite_list[1]
-            dino_ia.rect.bottom = dino_ia.y_inicial
+            """config do player, da IA e dos fantasmas"""
+            reinicia_dino(dino_player, 150)
+            reinicia_dino(dino_ia, 50)
+
+            for fantasma in lista_fantasmas:
+                reinicia_dino(fantasma, 50)
+            fantasmas_vivos = lista_fantasmas.copy()
 
             """config do jogo"""
             cenario_velocidade = 5
@@ -678,24 +823,7 @@ if __name__ == "__main__":
             start = False
             pontos = 0
 
-            for _ in range(len(lista_obstaculos_tela)):
-                lista_obstaculos_espera.append(lista_obstaculos_tela.pop(0))
-            
-            for indice_tela in range(4):
-                indice_espera = 0
-                while nome_da_classe(lista_obstaculos_espera[indice_espera]) != "Cacto":
-                    indice_espera += 1
-
-                lista_obstaculos_espera[indice_espera].set_image()
-                if indice_tela == 0:
-                    lista_obstaculos_espera[indice_espera].rect.x = LARGURA_TELA
-                else:
-                    set_posicao_x(lista_obstaculos_espera[indice_espera])
-
-                lista_obstaculos_tela.append(lista_obstaculos_espera.pop(indice_espera))
-
-            for pterossauro in lista_obstaculos_espera:
-                pterossauro.rect.right = 0
+            obstaculos.reinicia(["cacto"] * 4, LARGURA_TELA)
 
             for indice, chao in enumerate(lista_chao):
                 chao.image = chao.sprite_list[randint(0,3)]
@@ -705,7 +833,7 @@ if __name__ == "__main__":
                 nuvem.rect.right = 0
 
         """Desenha as mensagens na tela"""
-        texto_fps = exibe_mensagem(f"Fps: {relogio.get_fps():.2f}", 30, PRETO)
+        texto_fps = exibe_mensagem(f"Fps: {entrada.get_fps():.2f}", 30, PRETO)
         tela.blit(texto_fps, (50,20))
 
         texto_pontos = exibe_mensagem(f"velocidade: {cenario_velocidade}", 30, PRETO)
@@ -714,10 +842,27 @@ if __name__ == "__main__":
         texto_pontos = exibe_mensagem(f"pontos: {pontos}", 30, AZUL)
         tela.blit(texto_pontos, (750,20))
 
-        """Desenha as sprites na tela"""
+        if mostra_latencia:
+            latencia = entrada.percentis()
+            texto_latencia = exibe_mensagem(
+                f"latencia tecla-tela: p50 {latencia['p50']:.1f} ms, p95 {latencia['p95']:.1f} ms, "
+                f"p99 {latencia['p99']:.1f} ms ({latencia['amostras']} teclas)", 20, VERMELHO)
+            tela.blit(texto_latencia, (50,90))
+            texto_ritmo = exibe_mensagem(f"ritmo: {entrada.ritmo}, passos no frame: {entrada.passos_ultimo_frame}", 20, VERMELHO)
+            tela.blit(texto_ritmo, (50,115))
+
+        if lista_fantasmas:
+            texto_fantasmas = exibe_mensagem(f"fantasmas: {len(fantasmas_vivos)}/{len(lista_fantasmas)}", 20, PRETO)
+            tela.blit(texto_fantasmas, (50,60))
+
+        """Desenha as sprites na tela (os fantasmas por baixo)"""
+        group_fantasmas.draw(tela)
         group_sprites.draw(tela)
         group_obstaculos.draw(tela)
 
-        """Atualiza a tela e o relógio do jogo"""
+        """Atualiza a tela, o som e o relógio do jogo"""
         pygame.display.flip()
-        relogio.tick(60)
+        entrada.apos_flip()
+        recursos.audio.atualiza()
+        recursos.marca_primeiro_frame(args.tempo_inicio)
+        entrada.espera()
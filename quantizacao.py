@@ -0,0 +1,185 @@
+"""Inferência quantizada da população: os pesos de cada indivíduo guardados em int8 (com uma escala por
+indivíduo e camada) ou em float16, para populações muito grandes caberem em poucos megabytes.
+
+    python quantizacao.py                                  # 100 mil mutações do save.json
+    python quantizacao.py --tracos demos.bin --populacao 20000
+
+No modo int8 os sensores (inteiros em pixels) entram direto como int32, cada camada acumula em int32 e
+só então volta para float32 com as escalas; a saída de cada camada escondida é quantizada de novo em int8
+(escala por linha) antes da próxima. No modo float16 os pesos ficam em float16 e são convertidos para float32
+camada por camada, porque o NumPy não calcula em float16 de forma eficiente.
+
+O relatório mostra a memória dos pesos em cada precisão, o tempo de um forward da população inteira e a taxa
+de concordância das decisões (correr, pular, agachar) com a referência em float64, em traços de sensores
+gravados (demonstracoes.py) ou gerados jogando o checkpoint no DinoVecEnv.
+"""
+import argparse, time, numpy as np
+from ambiente import DinoVecEnv, acoes_da_saida
+
+PRECISOES = ["float64", "float16", "int8"]
+
+class PopulacaoQuantizada:
+    """Cópia somente leitura dos pesos de uma evolucao.Populacao em precisão reduzida, com o mesmo forward
+    (entradas (indivíduo, sensores) ou (indivíduo, pista, sensores) e ReLU em todas as camadas)."""
+    def __init__(self, pesos:list, bias:list, precisao:str="int8"):
+        """Quantiza os pesos (indivíduo, entrada, saída) e biases (indivíduo, saída) de cada camada."""
+        if precisao not in PRECISOES[1:]:
+            raise ValueError(f"precisão desconhecida: {precisao}")
+
+        self.precisao = precisao
+        self.tamanho = len(pesos[0])
+        self.bias = [np.asarray(camada, dtype=np.float32) for camada in bias]
+        self.buffers = {}
+
+        if precisao == "float16":
+            self.pesos = [np.asarray(camada, dtype=np.float16) for camada in pesos]
+            self.escalas = None
+        else:
+            """Escala simétrica por indivíduo e camada: o maior peso em módulo vira 127"""
+            self.escalas = []
+            self.pesos = []
+            for camada in pesos:
+                escala = np.abs(camada).max(axis=(1, 2)) / 127
+                escala[escala == 0] = 1
+                self.escalas.append(escala.astype(np.float32))
+                self.pesos.append(np.rint(camada / escala[:,None,None]).astype(np.int8))
+
+    def memoria(self) -> int:
+        """Bytes ocupados pelos pesos, escalas e biases."""
+        return sum(camada.nbytes for camada in self.pesos + self.bias + (self.escalas or []))
+
+    def forward(self, entradas:np.ndarray, indices:np.ndarray=None) -> np.ndarray:
+        """Calcula a camada de saída (float32) de cada indivíduo para as suas entradas. Com 'indices' a primeira
+        dimensão das entradas segue esses indivíduos (podem repetir), como em Populacao.forward."""
+        x = entradas[:,None,:] if entradas.ndim == 2 else entradas
+        tipo = np.int32 if self.precisao == "int8" else np.float32
+        if indices is None:
+            buffers = self.buffers.get(x.shape[1])
+            if buffers is None:
+                """Um buffer por camada para converter os pesos e outro para o acumulador (int32 ou float32)"""
+                buffers = [(np.zeros(camada.shape, dtype=tipo), np.zeros((self.tamanho, x.shape[1], camada.shape[2]), dtype=tipo))
+                           for camada in self.pesos]
+                self.buffers[x.shape[1]] = buffers
+            camadas = [(pesos, bias, convertidos, acumulador) for pesos, bias, (convertidos, acumulador) in zip(self.pesos, self.bias, buffers)]
+            escalas = self.escalas
+        else:
+            camadas = [(pesos[indices], bias[indices], None, None) for pesos, bias in zip(self.pesos, self.bias)]
+            escalas = [escala[indices] for escala in self.escalas] if self.escalas else None
+
+        def acumula(x:np.ndarray, pesos:np.ndarray, convertidos:np.ndarray, acumulador:np.ndarray) -> np.ndarray:
+            """Produto das entradas pelos pesos convertidos para o tipo de cálculo, nos buffers se houver"""
+            if convertidos is None:
+                return np.matmul(x, pesos.astype(tipo))
+            np.copyto(convertidos, pesos)
+            return np.matmul(x, convertidos, out=acumulador)
+
+        if self.precisao == "float16":
+            x = x.astype(np.float32)
+            for pesos, bias, convertidos, acumulador in camadas:
+                x = acumula(x, pesos, convertidos, acumulador)
+                x += bias[:,None,:]
+                np.maximum(x, 0, out=x)
+            return x[:,0,:] if entradas.ndim == 2 else x
+
+        """int8: os sensores já são inteiros, então a primeira camada tem escala de entrada 1"""
+        quantizada = np.rint(x).astype(np.int32)
+        escala_entrada = None
+        for indice, ((pesos, bias, convertidos, acumulador), escala) in enumerate(zip(camadas, escalas)):
+            acumulador = acumula(quantizada, pesos, convertidos, acumulador)
+
+            escala_total = escala[:,None,None] if escala_entrada is None else escala[:,None,None] * escala_entrada
+            saida = np.maximum(acumulador * escala_total + bias[:,None,:], 0, dtype=np.float32)
+            if indice == len(camadas) - 1:
+                break
+
+            escala_entrada = saida.max(axis=2, keepdims=True) / 127
+            escala_entrada[escala_entrada == 0] = 1
+            quantizada = np.rint(saida / escala_entrada).astype(np.int32)
+
+        return saida[:,0,:] if entradas.ndim == 2 else saida
+
+def forward_referencia(entradas:np.ndarray, pesos:list, bias:list) -> np.ndarray:
+    """Forward em float64 da população (a referência), no mesmo formato de PopulacaoQuantizada.forward."""
+    x = entradas[:,None,:] if entradas.ndim == 2 else entradas
+    for camada_pesos, camada_bias in zip(pesos, bias):
+        x = np.maximum(np.matmul(x, camada_pesos) + camada_bias[:,None,:], 0)
+    return x[:,0,:] if entradas.ndim == 2 else x
+
+def concordancia(pesos:list, bias:list, quantizada:PopulacaoQuantizada, tracos:np.ndarray, bloco:int=256) -> np.ndarray:
+    """Fração dos traços (linhas de sensores) em que cada indivíduo toma a mesma decisão na versão quantizada
+    e na referência em float64. Os traços são passados para todos os indivíduos, em blocos."""
+    iguais = np.zeros(len(pesos[0]))
+    for inicio in range(0, len(tracos), bloco):
+        parte = np.broadcast_to(tracos[inicio:inicio + bloco], (len(pesos[0]), *tracos[inicio:inicio + bloco].shape))
+        referencia = acoes_da_saida(forward_referencia(parte, pesos, bias).reshape(-1, 2))
+        decisoes = acoes_da_saida(quantizada.forward(parte).reshape(-1, 2))
+        iguais += (referencia == decisoes).reshape(len(pesos[0]), -1).sum(axis=1)
+    return iguais / len(tracos)
+
+def gera_tracos(individuo, jogos:int=20, max_passos:int=5000, amostras:int=2000, semente:int=0) -> np.ndarray:
+    """Joga o indivíduo em algumas pistas do DinoVecEnv e sorteia linhas de sensores dos jogos vivos."""
+    env = DinoVecEnv(jogos, sementes=semente, auto_reset=False, max_passos=max_passos)
+    linhas = []
+    while env.vivo.any():
+        linhas.append(env.observacoes[env.vivo].copy())
+        saida = env.observacoes
+        for pesos, bias in zip(individuo.pesos, individuo.bias):
+            saida = np.maximum(saida @ pesos + bias, 0)
+        env.step(acoes_da_saida(saida))
+
+    tracos = np.concatenate(linhas)
+    rng = np.random.default_rng(semente)
+    return tracos[rng.choice(len(tracos), min(amostras, len(tracos)), replace=False)]
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Inferência quantizada (int8/float16) da população do Dino I.A.")
+    parser.add_argument("--checkpoint", default="save.json", help="indivíduo de onde vem a população (sem ele, aleatória)")
+    parser.add_argument("--populacao", type=int, default=100000)
+    parser.add_argument("--mutacao", type=float, default=0.3, help="taxa e escala das mutações que formam a população")
+    parser.add_argument("--tracos", nargs="*", default=[], help="arquivos de demonstrações usados como traços de sensores")
+    parser.add_argument("--amostra", type=int, default=2000, help="indivíduos usados na concordância")
+    parser.add_argument("--semente", type=int, default=0)
+    args = parser.parse_args()
+
+    from evolucao import Populacao
+    from dino_IA import carrega_json, neuronios_salvos, Individuo
+
+    rng = np.random.default_rng(args.semente)
+    dados = carrega_json(args.checkpoint)
+    neuronios = neuronios_salvos(dados) if dados else [6, 6, 2]
+    populacao = Populacao(neuronios, args.populacao, rng)
+    if dados:
+        populacao.define(0, Individuo(dados["individuo"]["pesos"], dados["individuo"]["bias"]))
+        populacao.repovoa(0, args.mutacao, args.mutacao, rng)
+
+    if args.tracos:
+        from demonstracoes import le_demonstracoes
+        tracos = np.concatenate([le_demonstracoes(caminho)[0] for caminho in args.tracos])
+    else:
+        tracos = gera_tracos(populacao.individuo(0), semente=args.semente)
+    print(f"{args.populacao} indivíduos {neuronios}, {len(tracos)} traços de sensores")
+
+    """Uma linha de sensores por indivíduo, como em um frame do treino"""
+    entradas = tracos[rng.integers(len(tracos), size=args.populacao)]
+    amostra = rng.choice(args.populacao, min(args.amostra, args.populacao), replace=False)
+    pesos_amostra = [camada[amostra] for camada in populacao.pesos]
+    bias_amostra = [camada[amostra] for camada in populacao.bias]
+
+    memoria_referencia = sum(camada.nbytes for camada in populacao.pesos + populacao.bias)
+    inicio = time.perf_counter()
+    for _ in range(10):
+        populacao.forward(entradas)
+    tempo_referencia = (time.perf_counter() - inicio) / 10
+    print(f"{'float64':>8}: {memoria_referencia / 2**20:7.2f} MiB, forward {tempo_referencia * 1000:7.2f} ms")
+
+    for precisao in PRECISOES[1:]:
+        quantizada = PopulacaoQuantizada(populacao.pesos, populacao.bias, precisao)
+        quantizada.forward(entradas)
+        inicio = time.perf_counter()
+        for _ in range(10):
+            quantizada.forward(entradas)
+        tempo = (time.perf_counter() - inicio) / 10
+
+        taxas = concordancia(pesos_amostra, bias_amostra, PopulacaoQuantizada(pesos_amostra, bias_amostra, precisao), tracos)
+        print(f"{precisao:>8}: {quantizada.memoria() / 2**20:7.2f} MiB, forward {tempo * 1000:7.2f} ms, "
+              f"concordância média {taxas.mean():.4%}, pior indivíduo {taxas.min():.2%}")
@@ -0,0 +1,244 @@
+import pygame, sys, os, struct, threading, time, zlib
+from collections import OrderedDict
+from random import choice
+
+INICIO_PROCESSO = time.perf_counter()
+
+MAGICO_CACHE = b"DINOREC1"
+
+"""Arquivo de cada sheet e os recortes (posição, tamanho) de cada frame dentro dela"""
+SHEETS = {
+    "dino": ("dino.png", [((i * 64, 0), (64, 64)) for i in range(6)]),
+    "chao": ("chao.png", [((i * 60, 0), (60, 12)) for i in range(6)]),
+    "nuvem": ("nuvem.png", [((0, 0), (46, 13))]),
+    "cacto": ("cacto.png", [((i * 73, 0), (73, 47)) for i in range(5)]),
+    "pterossauro": ("pterossauro.png", [((0, 0), (42, 36)), ((42, 0), (42, 36))]),
+}
+
+SONS = {
+    "pulo": "jump_sound.wav",
+    "morte": "death_sound.wav",
+    "ponto": "score_sound.wav",
+}
+
+"""Quantas vezes o mesmo som pode tocar ao mesmo tempo"""
+VOZES_POR_SOM = 2
+
+"""Níveis de cada canal RGB usados na paleta de cores dos dinos (4 x 4 x 4 = 64 cores)"""
+NIVEIS_COR = (0, 66, 133, 200)
+PALETA_DINO = [(r, g, b) for r in NIVEIS_COR for g in NIVEIS_COR for b in NIVEIS_COR]
+
+def resource_path(*paths) -> str:
+    """Retorna o caminho correto, dependendo de estar rodando no executável ou no código fonte."""
+    if getattr(sys, "frozen", False):
+        # Quando estiver no executável (PyInstaller)
+        base_path = sys._MEIPASS
+    else:
+        # Quando estiver no código fonte
+        base_path = os.path.join(os.path.dirname(__file__), "assets")
+
+    return os.path.join(base_path, *paths)
+
+def cor_aleatoria() -> tuple:
+    """Sorteia uma cor da paleta de dinos, garantindo que os frames tingidos sejam reaproveitados."""
+    return choice(PALETA_DINO)
+
+def sem_tela() -> bool:
+    """Indica se o jogo está rodando sem tela ou sem áudio (drivers "dummy" do SDL), caso em que o som fica mudo."""
+    return os.environ.get("SDL_VIDEODRIVER") == "dummy" or os.environ.get("SDL_AUDIODRIVER") == "dummy"
+
+class GerenciadorAudio:
+    """Junta os pedidos de som de um frame e toca cada som no máximo uma vez por frame, respeitando um limite
+    de vozes simultâneas por som. Com 500 dinos pulando ou morrendo no mesmo frame o custo continua sendo
+    de no máximo uma chamada ao mixer por som."""
+    def __init__(self, vozes_por_som:int=VOZES_POR_SOM, mudo:bool=False):
+        """Inicializa o gerenciador sem sons carregados. Enquanto os sons não estiverem prontos (ou se estiver mudo)
+        os pedidos são descartados no fim do frame."""
+        self.vozes_por_som = vozes_por_som
+        self.mudo = mudo
+        self.sons = {}
+        self.pronto = False
+        self.pedidos = set()
+        self.thread = None
+
+    def inicia(self):
+        """Inicializa o mixer e carrega os sons em uma thread separada, sem atrasar o primeiro frame."""
+        if self.mudo:
+            return
+        self.thread = threading.Thread(target=self.carrega, daemon=True)
+        self.thread.start()
+
+    def carrega(self):
+        """Inicializa o mixer, reserva canais suficientes para as vozes de todos os sons e carrega os sons do jogo.
+        Se não houver dispositivo de áudio o jogo segue sem som."""
+        try:
+            pygame.mixer.init()
+            pygame.mixer.set_num_channels(max(pygame.mixer.get_num_channels(), len(SONS) * self.vozes_por_som))
+            sons = {nome: pygame.mixer.Sound(resource_path("sounds", arquivo)) for nome, arquivo in SONS.items()}
+        except pygame.error:
+            return
+
+        self.sons = sons
+        self.pronto = True
+
+    def toca(self, nome:str):
+        """Registra o pedido do som para este frame; pedidos repetidos do mesmo som são juntados."""
+        self.pedidos.add(nome)
+
+    def atualiza(self):
+        """Toca os sons pedidos no frame, pulando os que já estão com todas as vozes ocupadas, e limpa os pedidos.
+        Deve ser chamado uma vez por frame."""
+        if self.pronto and not self.mudo:
+            for nome in self.pedidos:
+                som = self.sons[nome]
+                if som.get_num_channels() < self.vozes_por_som:
+                    som.play()
+        self.pedidos.clear()
+
+    def define_mudo(self, mudo:bool):
+        """Liga ou desliga o som, parando o que estiver tocando ao ficar mudo (por exemplo ao acelerar o jogo)."""
+        self.mudo = mudo
+        if mudo and self.pronto:
+            pygame.mixer.stop()
+        elif not mudo and not self.pronto and self.thread is None:
+            self.inicia()
+
+class GerenciadorRecursos:
+    """Carrega cada sheet do jogo uma única vez, recorta os frames e os compartilha entre todas as sprites.
+    Também guarda os frames tingidos dos dinos, as fontes por tamanho e o áudio (GerenciadorAudio)."""
+    def __init__(self, arquivo_cache:str="recursos.cache", limite_cores:int=256, mudo:bool=None):
+        """Inicializa o gerenciador com o caminho do pacote binário de pixels e o limite de cores tingidas em memória.
+        Se mudo não for informado, o som fica mudo apenas quando o jogo roda sem tela."""
+        self.arquivo_cache = arquivo_cache
+        self.limite_cores = limite_cores
+        self.sheets = {}
+        self.lista_frames = {}
+        self.frames_tingidos = OrderedDict()
+        self.frames_translucidos = {}
+        self.fontes = {}
+        self.audio = GerenciadorAudio(mudo=sem_tela() if mudo is None else mudo)
+        self.tempo_primeiro_frame = None
+
+    def carrega(self):
+        """Carrega as sheets a partir do pacote binário (ou dos PNGs, recriando o pacote) e recorta os frames.
+        Precisa ser chamado depois de pygame.display.set_mode por causa do convert_alpha."""
+        assinaturas = {}
+        for nome, (arquivo, _) in SHEETS.items():
+            with open(resource_path("images", arquivo), "rb") as png:
+                conteudo = png.read()
+            assinaturas[nome] = (len(conteudo), zlib.crc32(conteudo))
+
+        pixels = self.le_cache(assinaturas)
+
+        if pixels is None:
+            pixels = {}
+            for nome, (arquivo, _) in SHEETS.items():
+                imagem = pygame.image.load(resource_path("images", arquivo))
+                pixels[nome] = (imagem.get_size(), pygame.image.tobytes(imagem, "RGBA"))
+            self.salva_cache(assinaturas, pixels)
+
+        for nome, (tamanho, dados) in pixels.items():
+            sheet = pygame.image.frombytes(dados, tamanho, "RGBA").convert_alpha()
+            self.sheets[nome] = sheet
+            self.lista_frames[nome] = [sheet.subsurface(posicao, tamanho_frame) for posicao, tamanho_frame in SHEETS[nome][1]]
+
+    def le_cache(self, assinaturas:dict) -> dict:
+        """Lê o pacote binário com os pixels decodificados, retornando None se ele não existir ou estiver desatualizado."""
+        try:
+            with open(self.arquivo_cache, "rb") as arquivo:
+                if arquivo.read(len(MAGICO_CACHE)) != MAGICO_CACHE:
+                    return None
+
+                pixels = {}
+                quantidade, = struct.unpack("<I", arquivo.read(4))
+                for _ in range(quantidade):
+                    tamanho_nome, = struct.unpack("<H", arquivo.read(2))
+                    nome = arquivo.read(tamanho_nome).decode("utf-8")
+                    tamanho_png, crc, largura, altura = struct.unpack("<IIII", arquivo.read(16))
+                    if assinaturas.get(nome) != (tamanho_png, crc):
+                        return None
+                    pixels[nome] = ((largura, altura), arquivo.read(largura * altura * 4))
+
+            if pixels.keys() != assinaturas.keys():
+                return None
+            return pixels
+        except (OSError, struct.error, UnicodeDecodeError):
+            return None
+
+    def salva_cache(self, assinaturas:dict, pixels:dict):
+        """Grava os pixels decodificados de todas as sheets em um único arquivo binário."""
+        try:
+            temporario = f"{self.arquivo_cache}.tmp"
+            with open(temporario, "wb") as arquivo:
+                arquivo.write(MAGICO_CACHE)
+                arquivo.write(struct.pack("<I", len(pixels)))
+                for nome, ((largura, altura), dados) in pixels.items():
+                    nome_bytes = nome.encode("utf-8")
+                    arquivo.write(struct.pack("<H", len(nome_bytes)))
+                    arquivo.write(nome_bytes)
+                    arquivo.write(struct.pack("<IIII", *assinaturas[nome], largura, altura))
+                    arquivo.write(dados)
+            os.replace(temporario, self.arquivo_cache)
+        except OSError:
+            # Sem permissão de escrita o jogo continua, apenas sem o cache
+            pass
+
+    def frames(self, nome:str) -> list:
+        """Retorna a lista de frames já recortados da sheet, compartilhada por todas as instâncias."""
+        return self.lista_frames[nome]
+
+    def frames_dino(self, cor:tuple) -> list:
+        """Retorna os frames do dino tingidos com a cor, tingindo a sheet apenas na primeira vez que a cor aparece."""
+        cor = tuple(cor)
+        frames = self.frames_tingidos.get(cor)
+
+        if frames is None:
+            sheet = self.sheets["dino"].copy()
+            sheet.fill(cor, special_flags=pygame.BLEND_RGB_MULT)
+            frames = [sheet.subsurface(posicao, tamanho) for posicao, tamanho in SHEETS["dino"][1]]
+
+            self.frames_tingidos[cor] = frames
+            if len(self.frames_tingidos) > self.limite_cores:
+                self.frames_tingidos.popitem(last=False)
+        else:
+            self.frames_tingidos.move_to_end(cor)
+
+        return frames
+
+    def frames_fantasma(self, cor:tuple, transparencia:int=90) -> list:
+        """Retorna os frames do dino tingidos com a cor e translúcidos (alpha multiplicado por transparencia/255),
+        criados uma única vez e compartilhados por todos os fantasmas."""
+        chave = (tuple(cor), transparencia)
+        frames = self.frames_translucidos.get(chave)
+
+        if frames is None:
+            sheet = self.sheets["dino"].copy()
+            sheet.fill((*cor, transparencia), special_flags=pygame.BLEND_RGBA_MULT)
+            frames = [sheet.subsurface(posicao, tamanho) for posicao, tamanho in SHEETS["dino"][1]]
+            self.frames_translucidos[chave] = frames
+
+        return frames
+
+    def fonte(self, tamanho:int) -> pygame.font.Font:
+        """Retorna a fonte do jogo no tamanho pedido, carregando o TTF apenas uma vez por tamanho."""
+        fonte = self.fontes.get(tamanho)
+        if fonte is None:
+            fonte = pygame.font.Font(resource_path("fonts", "Minecraft.ttf"), tamanho)
+            self.fontes[tamanho] = fonte
+        return fonte
+
+    def inicia_sons(self):
+        """Inicializa o mixer e carrega os sons em segundo plano."""
+        self.audio.inicia()
+
+    def toca_som(self, nome:str):
+        """Pede o som para o frame atual; ele só toca no GerenciadorAudio.atualiza, uma vez por frame."""
+        self.audio.toca(nome)
+
+    def marca_primeiro_frame(self, mostra:bool=False):
+        """Registra o tempo entre o início do processo e o primeiro frame desenhado na tela (em tempo_primeiro_frame)
+        e, se mostra for verdadeiro, imprime o tempo uma vez."""
+        if self.tempo_primeiro_frame is None:
+            self.tempo_primeiro_frame = time.perf_counter() - INICIO_PROCESSO
+            if mostra:
+                print(f"Tempo ate o primeiro frame: {self.tempo_primeiro_frame * 1000:.1f} ms")
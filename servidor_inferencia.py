@@ -0,0 +1,204 @@
+"""Servidor local de inferência para dinos treinados.
+
+Carrega um checkpoint no formato do "save.json" e responde, por TCP em localhost ou por socket Unix,
+com a ação (correr, pular ou agachar) para cada vetor de 6 sensores recebido. Pedidos que chegam ao
+mesmo tempo são agrupados em um único forward em lote.
+
+Protocolo (uma linha por mensagem):
+    cliente -> "distancia largura altura comprimento velocidade dino_altura\\n"
+    servidor -> "correr\\n" | "pular\\n" | "agachar\\n"
+    cliente -> "stats\\n"
+    servidor -> uma linha JSON com as estatísticas de latência e vazão
+"""
+import asyncio, argparse, json, sys, time, numpy as np
+from collections import deque
+from dino_IA import RedeNeural, Individuo, carrega_modelo
+from constantes import NOMES_ACOES
+
+class ServidorInferencia:
+    """Atende conexões com asyncio e junta os pedidos concorrentes em micro-lotes, fazendo um único
+    forward por lote. Mantém estatísticas de latência (do pedido até a resposta) e de vazão."""
+    def __init__(self, rede:RedeNeural, individuo:Individuo, tamanho_lote:int=256, espera_lote:float=0.0005):
+        """Inicializa o servidor com a rede, o indivíduo, o tamanho máximo do lote e quanto tempo (em segundos)
+        o lote espera por mais pedidos depois que o primeiro chega."""
+        self.rede = rede
+        self.individuo = individuo
+        self.tamanho_lote = tamanho_lote
+        self.espera_lote = espera_lote
+        self.entradas_lote = np.zeros((tamanho_lote, rede.camada_entrada))
+        self.fila = None
+        self.tarefa_lotes = None
+        self.servidor = None
+
+        self.inicio = time.perf_counter()
+        self.pedidos = 0
+        self.lotes = 0
+        self.latencias = deque(maxlen=10000)
+
+    async def inicia(self, host:str="127.0.0.1", porta:int=5005, caminho_unix:str=None):
+        """Abre o servidor em TCP (localhost por padrão) ou em um socket Unix e inicia a tarefa de lotes."""
+        self.fila = asyncio.Queue()
+        self.tarefa_lotes = asyncio.create_task(self.processa_lotes())
+
+        if caminho_unix:
+            self.servidor = await asyncio.start_unix_server(self.atende, path=caminho_unix)
+        else:
+            self.servidor = await asyncio.start_server(self.atende, host, porta)
+        return self.servidor
+
+    async def fecha(self):
+        """Fecha o servidor e encerra a tarefa de lotes."""
+        self.servidor.close()
+        await self.servidor.wait_closed()
+        self.tarefa_lotes.cancel()
+
+    async def decide(self, entradas:list) -> int:
+        """Coloca um vetor de sensores na fila e espera a ação calculada no próximo lote."""
+        futuro = asyncio.get_running_loop().create_future()
+        await self.fila.put((entradas, futuro, time.perf_counter()))
+        return await futuro
+
+    async def processa_lotes(self):
+        """Espera o primeiro pedido, junta os que chegarem até encher o lote ou acabar o tempo de espera
+        e resolve todos com um único forward."""
+        while True:
+            lote = [await self.fila.get()]
+            limite = time.perf_counter() + self.espera_lote
+
+            while len(lote) < self.tamanho_lote:
+                if self.fila.empty():
+                    restante = limite - time.perf_counter()
+                    if restante <= 0:
+                        break
+                    await asyncio.sleep(restante)
+                    if self.fila.empty():
+                        break
+                lote.append(self.fila.get_nowait())
+
+            quantidade = len(lote)
+            entradas = self.entradas_lote[:quantidade]
+            for indice, (sensores, _, _) in enumerate(lote):
+                entradas[indice] = sensores
+
+            acoes = self.rede.acoes(self.rede.forward(entradas, self.individuo)[-1])
+
+            agora = time.perf_counter()
+            for (_, futuro, chegada), acao in zip(lote, acoes):
+                if not futuro.done():
+                    futuro.set_result(int(acao))
+                self.latencias.append(agora - chegada)
+
+            self.pedidos += quantidade
+            self.lotes += 1
+
+    async def atende(self, leitor:asyncio.StreamReader, escritor:asyncio.StreamWriter):
+        """Lê linhas da conexão e responde cada uma com a ação ou com as estatísticas."""
+        try:
+            while linha := await leitor.readline():
+                texto = linha.decode("utf-8").strip()
+                if not texto:
+                    continue
+
+                if texto == "stats":
+                    resposta = json.dumps(self.estatisticas())
+                else:
+                    try:
+                        entradas = [float(valor) for valor in texto.split()]
+                    except ValueError:
+                        entradas = []
+
+                    if len(entradas) != self.rede.camada_entrada:
+                        resposta = f"erro: esperado {self.rede.camada_entrada} valores"
+                    else:
+                        resposta = NOMES_ACOES[await self.decide(entradas)]
+
+                escritor.write(f"{resposta}\n".encode("utf-8"))
+                await escritor.drain()
+        except ConnectionError:
+            pass
+        finally:
+            escritor.close()
+
+    def estatisticas(self) -> dict:
+        """Retorna pedidos atendidos, tamanho médio do lote, vazão e percentis de latência em milissegundos."""
+        tempo = time.perf_counter() - self.inicio
+        latencias = np.array(self.latencias) * 1000 if self.latencias else np.zeros(1)
+
+        return {
+            "pedidos": self.pedidos,
+            "lotes": self.lotes,
+            "lote_medio": round(self.pedidos / self.lotes, 2) if self.lotes else 0,
+            "pedidos_por_segundo": round(self.pedidos / tempo, 1),
+            "latencia_p50_ms": round(float(np.percentile(latencias, 50)), 3),
+            "latencia_p99_ms": round(float(np.percentile(latencias, 99)), 3),
+        }
+
+async def consulta(host:str, porta:int, lista_entradas:list) -> list:
+    """Cliente simples: abre uma conexão, envia cada vetor de sensores e retorna as ações recebidas."""
+    leitor, escritor = await asyncio.open_connection(host, porta)
+    respostas = []
+
+    for entradas in lista_entradas:
+        escritor.write((" ".join(str(valor) for valor in entradas) + "\n").encode("utf-8"))
+        await escritor.drain()
+        respostas.append((await leitor.readline()).decode("utf-8").strip())
+
+    escritor.close()
+    await escritor.wait_closed()
+    return respostas
+
+async def benchmark(servidor:ServidorInferencia, porta:int, clientes:int, pedidos:int):
+    """Sobe o servidor em localhost, dispara vários clientes concorrentes e confere as respostas
+    com o forward direto da rede, imprimindo as estatísticas no final."""
+    await servidor.inicia("127.0.0.1", porta)
+    rng = np.random.default_rng(0)
+
+    lista_entradas = [
+        [[int(rng.integers(-150, 1000)), int(rng.integers(-100, 1100)), int(rng.choice([43, 57, 51, 81, 111])),
+          int(rng.choice([10, 15, 45, 75])), int(rng.integers(5, 16)), int(rng.integers(41, 200))]
+         for _ in range(pedidos)]
+        for _ in range(clientes)
+    ]
+
+    respostas = await asyncio.gather(*[consulta("127.0.0.1", porta, entradas) for entradas in lista_entradas])
+
+    esperado = servidor.rede.acoes(servidor.rede.forward(np.array(lista_entradas).reshape(-1, 6), servidor.individuo)[-1])
+    recebido = [acao for resposta in respostas for acao in resposta]
+    iguais = sum(NOMES_ACOES[a] == b for a, b in zip(esperado, recebido))
+
+    print(f"respostas iguais ao forward direto: {iguais}/{len(recebido)}")
+    print(json.dumps(servidor.estatisticas(), indent=4))
+    await servidor.fecha()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Servidor local de inferência do Dino I.A.")
+    parser.add_argument("--checkpoint", default="save.json", help="arquivo salvo pelo dino_IA.py")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--porta", type=int, default=5005)
+    parser.add_argument("--unix", default=None, help="caminho de um socket Unix (substitui host/porta)")
+    parser.add_argument("--lote", type=int, default=256, help="tamanho máximo do micro-lote")
+    parser.add_argument("--espera", type=float, default=0.5, help="espera máxima do micro-lote em milissegundos")
+    parser.add_argument("--benchmark", type=int, default=0, metavar="CLIENTES", help="testa em localhost com N clientes concorrentes")
+    args = parser.parse_args()
+
+    try:
+        rede, individuo = carrega_modelo(args.checkpoint)
+    except FileNotFoundError as erro:
+        print(erro)
+        sys.exit(1)
+
+    servidor = ServidorInferencia(rede, individuo, args.lote, args.espera / 1000)
+
+    async def main():
+        if args.benchmark:
+            await benchmark(servidor, args.porta, args.benchmark, 200)
+            return
+
+        await servidor.inicia(args.host, args.porta, args.unix)
+        print(f"Servidor de inferencia ouvindo em {args.unix or f'{args.host}:{args.porta}'}")
+        await servidor.servidor.serve_forever()
+
+    try:
+        asyncio.run(main())
+    except KeyboardInterrupt:
+        pass
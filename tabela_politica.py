@@ -0,0 +1,86 @@
+import mmap, struct, zlib
+from constantes import ACAO_CORRER
+
+MAGICO_TABELA = b"DINOPOL1"
+
+"""Cabeçalho: crc do checkpoint, distância mínima e quantidade, altura mínima e quantidade,
+velocidade mínima e quantidade, quantidade de tipos de obstáculo"""
+FORMATO_CABECALHO = "<Iiiiiiii"
+FORMATO_OBSTACULO = "<hhh"
+
+def crc_arquivo(caminho:str) -> int:
+    """Retorna o crc32 do conteúdo do arquivo, ou 0 se ele não existir."""
+    try:
+        with open(caminho, "rb") as arquivo:
+            return zlib.crc32(arquivo.read())
+    except OSError:
+        return 0
+
+class TabelaPolitica:
+    """Tabela de decisões compilada a partir de uma rede neural treinada (veja compila_politica.py).
+    Guarda 2 bits por combinação de (obstáculo, velocidade, distância, altura do dino) em um arquivo
+    mapeado na memória, então escolher a ação é só um cálculo de índice, sem NumPy."""
+    def __init__(self, dados, checkpoint_crc:int, distancia_min:int, distancias:int, altura_min:int, alturas:int,
+                 velocidade_min:int, velocidades:int, obstaculos:list, inicio_acoes:int):
+        """Inicializa a tabela com os bytes (mmap ou bytes), os intervalos de cada eixo e os tipos de obstáculo
+        (largura, obstaculo_altura, obstaculo_comprimento) na ordem em que aparecem na tabela."""
+        self.dados = dados
+        self.checkpoint_crc = checkpoint_crc
+        self.distancia_min = distancia_min
+        self.distancias = distancias
+        self.altura_min = altura_min
+        self.alturas = alturas
+        self.velocidade_min = velocidade_min
+        self.velocidades = velocidades
+        self.obstaculos = obstaculos
+        self.indice_obstaculo = {obstaculo: indice for indice, obstaculo in enumerate(obstaculos)}
+        self.inicio_acoes = inicio_acoes
+
+    @classmethod
+    def carrega(cls, caminho:str="politica.bin", checkpoint:str="save.json"):
+        """Abre a tabela mapeando o arquivo na memória. Retorna None se ela não existir ou se tiver sido
+        compilada a partir de outro checkpoint (o crc do arquivo salvo não confere)."""
+        try:
+            with open(caminho, "rb") as arquivo:
+                dados = mmap.mmap(arquivo.fileno(), 0, access=mmap.ACCESS_READ)
+        except (OSError, ValueError):
+            return None
+
+        if dados[:len(MAGICO_TABELA)] != MAGICO_TABELA:
+            return None
+
+        posicao = len(MAGICO_TABELA)
+        cabecalho = struct.unpack_from(FORMATO_CABECALHO, dados, posicao)
+        posicao += struct.calcsize(FORMATO_CABECALHO)
+
+        obstaculos = []
+        for _ in range(cabecalho[-1]):
+            obstaculos.append(struct.unpack_from(FORMATO_OBSTACULO, dados, posicao))
+            posicao += struct.calcsize(FORMATO_OBSTACULO)
+
+        if cabecalho[0] != crc_arquivo(checkpoint):
+            return None
+
+        return cls(dados, *cabecalho[:-1], obstaculos, posicao)
+
+    def indice(self, entradas:list) -> int:
+        """Calcula a posição das entradas na tabela. Distância e altura fora do intervalo compilado
+        são limitadas às bordas; um obstáculo desconhecido retorna -1."""
+        distancia, largura, altura, comprimento, velocidade, dino_altura = (int(valor) for valor in entradas)
+
+        obstaculo = self.indice_obstaculo.get((largura - distancia, altura, comprimento), -1)
+        if obstaculo < 0:
+            return -1
+
+        distancia = min(max(distancia - self.distancia_min, 0), self.distancias - 1)
+        dino_altura = min(max(dino_altura - self.altura_min, 0), self.alturas - 1)
+        velocidade = min(max(velocidade - self.velocidade_min, 0), self.velocidades - 1)
+
+        return ((obstaculo * self.velocidades + velocidade) * self.distancias + distancia) * self.alturas + dino_altura
+
+    def acao(self, entradas:list) -> int:
+        """Retorna a ação (ACAO_CORRER, ACAO_PULAR ou ACAO_AGACHAR) para as 6 entradas dos sensores."""
+        indice = self.indice(entradas)
+        if indice < 0:
+            return ACAO_CORRER
+        return (self.dados[self.inicio_acoes + (indice >> 2)] >> ((indice & 3) * 2)) & 3
@@ -0,0 +1,162 @@
+"""Torneio sem tela entre checkpoints: todos jogam as mesmas pistas sorteadas, em um ambiente vetorizado
+dividido entre processos, e saem em uma tabela ordenada pelos pontos médios com a distribuição dos pontos
+e o intervalo de confiança da média.
+
+    python torneio.py saves/*.json --cursos 50
+    python torneio.py save.json ilha_*.json --hall-da-fama hall_da_fama.db --hall-k 20 --csv torneio.csv
+
+Como as pistas são as mesmas para todos, a comparação é pareada: a coluna "P(>próx)" é a fração das
+reamostragens bootstrap das pistas em que o checkpoint fez mais pontos médios do que o seguinte na tabela, com
+os empates contando meio (dois checkpoints que fazem os mesmos pontos em todas as pistas ficam com 50%).
+"""
+import argparse, csv, glob, os, time, numpy as np
+from concurrent.futures import ProcessPoolExecutor
+
+def carrega_participantes(caminhos:list, arquivo_hall:str=None, quantidade_hall:int=0) -> list:
+    """Carrega os checkpoints (arquivos no formato do save.json ou pastas com eles) e, se pedido, os elites de
+    gerações espalhadas do hall da fama. Retorna uma lista de (nome, neurônios, indivíduo)."""
+    from dino_IA import carrega_json, neuronios_salvos, Individuo
+
+    arquivos = []
+    for caminho in caminhos:
+        arquivos.extend(sorted(glob.glob(os.path.join(caminho, "*.json"))) if os.path.isdir(caminho) else [caminho])
+
+    participantes = []
+    for arquivo in arquivos:
+        dados = carrega_json(arquivo)
+        if dados is None:
+            print(f"ignorando {arquivo}: não é um checkpoint válido")
+            continue
+        participantes.append((arquivo, neuronios_salvos(dados), Individuo(dados["individuo"]["pesos"], dados["individuo"]["bias"])))
+
+    if arquivo_hall and quantidade_hall:
+        from hall_da_fama import HallDaFama
+        hall = HallDaFama(arquivo_hall)
+        for id_individuo in hall.elites(quantidade_hall):
+            individuo, neuronios, _, geracao = hall.individuo(id_individuo)
+            participantes.append((f"hall:{id_individuo} (geração {geracao})", neuronios, individuo))
+        hall.fecha()
+
+    return participantes
+
+def joga_lote(neuronios:list, individuos:list, sementes:np.ndarray, max_passos:int, eventos:bool=False,
+              jit:bool=False) -> tuple:
+    """Roda um lote de indivíduos com a mesma topologia em todas as pistas de uma vez (o avalia do Treinador,
+    com a população trocada pelos participantes) e retorna os pontos e o fitness (participante, pista)."""
+    from evolucao import Treinador
+
+    treinador = Treinador(neuronios, len(individuos), semente=0, max_passos=max_passos, cursos=len(sementes),
+                          eventos=eventos, jit=jit)
+    for indice, individuo in enumerate(individuos):
+        treinador.populacao.define(indice, individuo)
+    fitness, pontos, frames = treinador.avalia(sementes)
+    return pontos, fitness, frames
+
+def roda_torneio(participantes:list, sementes:np.ndarray, max_passos:int, processos:int=None, lote:int=None,
+                 eventos:bool=False, jit:bool=False) -> tuple:
+    """Separa os participantes por topologia, divide cada grupo em lotes entre os processos e retorna os pontos
+    e o fitness (participante, pista) na ordem dos participantes e o total de frames simulados."""
+    processos = processos or os.cpu_count() or 1
+    pontos = np.zeros((len(participantes), len(sementes)), dtype=np.int64)
+    fitness = np.zeros((len(participantes), len(sementes)), dtype=np.int64)
+
+    grupos = {}
+    for indice, (_, neuronios, _) in enumerate(participantes):
+        grupos.setdefault(tuple(neuronios), []).append(indice)
+
+    tarefas = []
+    for neuronios, indices in grupos.items():
+        tamanho = lote or max(1, -(-len(indices) // processos))
+        for inicio in range(0, len(indices), tamanho):
+            tarefas.append((list(neuronios), indices[inicio:inicio + tamanho]))
+
+    frames = 0
+    with ProcessPoolExecutor(processos) as pool:
+        futuros = [(indices, pool.submit(joga_lote, neuronios, [participantes[indice][2] for indice in indices], sementes, max_passos, eventos, jit))
+                   for neuronios, indices in tarefas]
+        for indices, futuro in futuros:
+            pontos_lote, fitness_lote, frames_lote = futuro.result()
+            pontos[indices] = pontos_lote
+            fitness[indices] = fitness_lote
+            frames += frames_lote
+
+    return pontos, fitness, frames
+
+def classifica(pontos:np.ndarray, fitness:np.ndarray, reamostragens:int=2000, confianca:float=0.95, semente:int=0) -> list:
+    """Ordena os participantes pelos pontos médios (e fitness médio no empate) e calcula, por bootstrap das pistas,
+    o intervalo de confiança da média de cada um e a chance de ele ser melhor que o seguinte. As mesmas
+    reamostragens são usadas para todos, então a comparação entre dois participantes é pareada."""
+    rng = np.random.default_rng(semente)
+    cursos = pontos.shape[1]
+    amostras = rng.integers(cursos, size=(reamostragens, cursos))
+    medias_bootstrap = pontos[:, amostras].mean(axis=2)
+
+    ordem = np.lexsort((-fitness.mean(axis=1), -pontos.mean(axis=1)))
+    cauda = (1 - confianca) / 2 * 100
+
+    linhas = []
+    for posicao, indice in enumerate(ordem):
+        proximo = ordem[posicao + 1] if posicao + 1 < len(ordem) else None
+        melhor_que_proximo = None
+        if proximo is not None:
+            atual, seguinte = medias_bootstrap[indice], medias_bootstrap[proximo]
+            melhor_que_proximo = float((atual > seguinte).mean() + 0.5 * (atual == seguinte).mean())
+        linhas.append({
+            "posicao": posicao + 1,
+            "indice": int(indice),
+            "media": float(pontos[indice].mean()),
+            "ic_inferior": float(np.percentile(medias_bootstrap[indice], cauda)),
+            "ic_superior": float(np.percentile(medias_bootstrap[indice], 100 - cauda)),
+            "desvio": float(pontos[indice].std()),
+            "minimo": int(pontos[indice].min()),
+            "p10": float(np.percentile(pontos[indice], 10)),
+            "mediana": float(np.median(pontos[indice])),
+            "p90": float(np.percentile(pontos[indice], 90)),
+            "maximo": int(pontos[indice].max()),
+            "fitness_medio": float(fitness[indice].mean()),
+            "melhor_que_proximo": melhor_que_proximo,
+        })
+    return linhas
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Torneio sem tela entre checkpoints do Dino I.A.")
+    parser.add_argument("checkpoints", nargs="*", help="arquivos no formato do save.json ou pastas com eles")
+    parser.add_argument("--hall-da-fama", default=None, metavar="ARQUIVO", help="inclui elites do hall da fama")
+    parser.add_argument("--hall-k", type=int, default=10, help="quantas gerações do hall da fama participam")
+    parser.add_argument("--cursos", type=int, default=50, help="pistas jogadas por todos os participantes")
+    parser.add_argument("--semente", type=int, default=0, help="semente da primeira pista (as outras são as seguintes)")
+    parser.add_argument("--max-passos", type=int, default=20000, help="limite de pontos de cada jogo")
+    parser.add_argument("--processos", type=int, default=None, help="processos (padrão: um por CPU)")
+    parser.add_argument("--eventos", action="store_true", help="pula de uma vez os frames sem decisão nova (mesmo resultado)")
+    parser.add_argument("--jit", action="store_true", help="joga no núcleo compilado do Numba, se instalado (veja nucleo_jit.py)")
+    parser.add_argument("--confianca", type=float, default=0.95, help="nível do intervalo de confiança")
+    parser.add_argument("--csv", default=None, help="grava a tabela também em um CSV")
+    args = parser.parse_args()
+
+    participantes = carrega_participantes(args.checkpoints, args.hall_da_fama, args.hall_k)
+    if not participantes:
+        raise SystemExit("nenhum checkpoint para o torneio")
+
+    sementes = np.arange(args.cursos, dtype=np.uint64) + np.uint64(args.semente)
+    inicio = time.perf_counter()
+    pontos, fitness, frames = roda_torneio(participantes, sementes, args.max_passos, args.processos, eventos=args.eventos,
+                                           jit=args.jit)
+    tempo = time.perf_counter() - inicio
+    linhas = classifica(pontos, fitness, confianca=args.confianca, semente=args.semente)
+
+    print(f"{len(participantes)} participantes x {args.cursos} pistas em {tempo:.1f} s ({frames / tempo:,.0f} frames/s)")
+    nivel = f"IC {args.confianca:.0%}"
+    print(f"{'#':>3} {'média':>8} {nivel:>17} {'desvio':>7} {'mín':>6} {'p10':>7} {'mediana':>8} {'p90':>7} {'máx':>6} {'P(>próx)':>8}  checkpoint")
+    for linha in linhas:
+        intervalo = f"{linha['ic_inferior']:.0f}-{linha['ic_superior']:.0f}"
+        melhor = "" if linha["melhor_que_proximo"] is None else f"{linha['melhor_que_proximo']:.0%}"
+        print(f"{linha['posicao']:>3} {linha['media']:>8.0f} {intervalo:>17} {linha['desvio']:>7.0f} {linha['minimo']:>6} "
+              f"{linha['p10']:>7.0f} {linha['mediana']:>8.0f} {linha['p90']:>7.0f} {linha['maximo']:>6} {melhor:>8}  "
+              f"{participantes[linha['indice']][0]}")
+
+    if args.csv:
+        with open(args.csv, "w", encoding="utf-8", newline="") as arquivo:
+            escritor = csv.DictWriter(arquivo, ["checkpoint", *linhas[0]])
+            escritor.writeheader()
+            for linha in linhas:
+                escritor.writerow(dict(linha, checkpoint=participantes[linha["indice"]][0]))
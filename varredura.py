@@ -0,0 +1,201 @@
+"""Varredura de hiperparâmetros do treino sem tela: tamanho da população, camadas, cronograma de mutação e
+aumento de velocidade. Cada combinação vira um trabalho com a sua semente e um limite de tempo, rodado em
+um pool de processos; os resultados vão para uma tabela CSV, uma linha por trabalho terminado.
+
+    python varredura.py varredura.json --processos 4
+    python varredura.py varredura.json --resumo          # média de cada combinação, sem rodar nada
+
+Se a varredura for interrompida, rodar o mesmo comando continua dela: os trabalhos que já estão na tabela
+(pela chave dos parâmetros e da semente) são pulados. Exemplo de arquivo de varredura:
+
+    {
+        "modo": "grade",
+        "repeticoes": 3,
+        "alvo": 3000,
+        "tempo_maximo": 300,
+        "parametros": {
+            "populacao": [100, 300, 500],
+            "camadas": [[6], [12], [8, 8]],
+            "taxa_final": [0.05, 0.1],
+            "pontos_por_velocidade": [250]
+        }
+    }
+
+No modo "aleatoria" são sorteadas 'amostras' combinações; cada parâmetro pode ser uma lista de valores
+ou um intervalo {"min": 0.01, "max": 0.5, "log": true} (com "inteiro": true para valores inteiros).
+"""
+import argparse, csv, itertools, json, os, sys, time, numpy as np
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+"""Valores usados quando o parâmetro não aparece na varredura (os mesmos do dino_IA.py)"""
+PADROES = {
+    "populacao": 500,
+    "camadas": [6],
+    "limiar_mutacao": 90,
+    "taxa_final": 0.1,
+    "decaimento_mutacao": 100,
+    "pontos_por_velocidade": 250,
+    "velocidade_maxima": 15,
+    "cursos": 1,
+}
+
+COLUNAS = ["id", "chave", "semente", *PADROES, "atingiu", "tempo_ate_alvo", "geracao_alvo", "frames_ate_alvo",
+           "geracoes", "melhor_pontos", "melhor_fitness", "frames_por_segundo", "tempo"]
+
+def sorteia_valor(especificacao, rng:np.random.Generator):
+    """Sorteia um valor de uma lista ou de um intervalo {"min", "max", "log", "inteiro"}."""
+    if isinstance(especificacao, list):
+        return especificacao[rng.integers(len(especificacao))]
+
+    minimo, maximo = especificacao["min"], especificacao["max"]
+    if especificacao.get("log"):
+        valor = float(np.exp(rng.uniform(np.log(minimo), np.log(maximo))))
+    else:
+        valor = float(rng.uniform(minimo, maximo))
+    return int(round(valor)) if especificacao.get("inteiro") else valor
+
+def monta_trabalhos(varredura:dict) -> list:
+    """Expande o arquivo de varredura na lista de trabalhos (parâmetros completos e semente), sempre na mesma
+    ordem, para que a varredura possa ser retomada."""
+    parametros = varredura.get("parametros", {})
+    desconhecidos = set(parametros) - set(PADROES)
+    if desconhecidos:
+        raise ValueError(f"parâmetros desconhecidos: {sorted(desconhecidos)}")
+
+    rng = np.random.default_rng(varredura.get("semente", 0))
+    if varredura.get("modo", "grade") == "grade":
+        nomes = list(parametros)
+        combinacoes = [dict(zip(nomes, valores)) for valores in itertools.product(*(parametros[nome] for nome in nomes))]
+    else:
+        combinacoes = [{nome: sorteia_valor(especificacao, rng) for nome, especificacao in parametros.items()}
+                       for _ in range(varredura.get("amostras", 10))]
+
+    trabalhos = []
+    for combinacao in combinacoes:
+        for repeticao in range(varredura.get("repeticoes", 1)):
+            trabalho = dict(PADROES, **combinacao)
+            trabalho["semente"] = varredura.get("semente", 0) * 1000 + repeticao
+            trabalho["chave"] = json.dumps({nome: trabalho[nome] for nome in [*PADROES, "semente"]}, sort_keys=True)
+            trabalho["id"] = len(trabalhos)
+            trabalhos.append(trabalho)
+    return trabalhos
+
+def roda_trabalho(trabalho:dict, alvo:int, tempo_maximo:float, max_geracoes:int) -> dict:
+    """Treina sem tela com os parâmetros do trabalho até o melhor dino fazer 'alvo' pontos ou acabar o tempo.
+    Cada jogo para em 'alvo' pontos, então uma geração nunca demora mais do que isso. Retorna a linha da tabela."""
+    from evolucao import Treinador
+
+    treinador = Treinador(
+        [6] + list(trabalho["camadas"]) + [2], int(trabalho["populacao"]), semente=trabalho["semente"],
+        max_passos=alvo, cursos=int(trabalho["cursos"]), limiar_mutacao=trabalho["limiar_mutacao"],
+        taxa_final=trabalho["taxa_final"], decaimento_mutacao=trabalho["decaimento_mutacao"],
+        pontos_por_velocidade=int(trabalho["pontos_por_velocidade"]), velocidade_maxima=int(trabalho["velocidade_maxima"])
+    )
+
+    resultado = dict(trabalho, atingiu=False, tempo_ate_alvo="", geracao_alvo="", frames_ate_alvo="",
+                     melhor_pontos=0, melhor_fitness=0)
+    inicio = time.perf_counter()
+    frames = 0
+    geracoes = 0
+    while geracoes < max_geracoes and time.perf_counter() - inicio < tempo_maximo:
+        estatisticas = treinador.executa_geracao()
+        frames += estatisticas["frames"]
+        geracoes += 1
+        resultado["melhor_pontos"] = max(resultado["melhor_pontos"], estatisticas["pontos"])
+        resultado["melhor_fitness"] = max(resultado["melhor_fitness"], estatisticas["melhor_fitness"])
+
+        if estatisticas["pontos"] >= alvo:
+            resultado.update(atingiu=True, tempo_ate_alvo=round(time.perf_counter() - inicio, 3),
+                             geracao_alvo=geracoes, frames_ate_alvo=frames)
+            break
+
+    tempo = time.perf_counter() - inicio
+    resultado.update(geracoes=geracoes, frames_por_segundo=round(frames / tempo), tempo=round(tempo, 3))
+    return resultado
+
+def le_resultados(caminho:str) -> list:
+    """Lê as linhas já gravadas na tabela (nenhuma se ela não existir)."""
+    if not os.path.exists(caminho):
+        return []
+    with open(caminho, "r", encoding="utf-8", newline="") as arquivo:
+        return list(csv.DictReader(arquivo))
+
+def roda_varredura(varredura:dict, caminho:str, processos:int=None):
+    """Roda os trabalhos que ainda não estão na tabela em um pool de processos, gravando cada resultado
+    assim que ele termina. Um Ctrl+C cancela os trabalhos que não começaram e mantém os já gravados."""
+    trabalhos = monta_trabalhos(varredura)
+    feitos = {linha["chave"] for linha in le_resultados(caminho)}
+    pendentes = [trabalho for trabalho in trabalhos if trabalho["chave"] not in feitos]
+    print(f"{len(trabalhos)} trabalhos, {len(trabalhos) - len(pendentes)} já feitos, {len(pendentes)} para rodar")
+    if not pendentes:
+        return
+
+    novo = not os.path.exists(caminho) or os.path.getsize(caminho) == 0
+    alvo = varredura.get("alvo", 3000)
+    tempo_maximo = varredura.get("tempo_maximo", 300)
+    max_geracoes = varredura.get("max_geracoes", 1000)
+
+    with open(caminho, "a", encoding="utf-8", newline="") as arquivo:
+        escritor = csv.DictWriter(arquivo, COLUNAS, extrasaction="ignore")
+        if novo:
+            escritor.writeheader()
+
+        pool = ProcessPoolExecutor(processos)
+        try:
+            futuros = {pool.submit(roda_trabalho, trabalho, alvo, tempo_maximo, max_geracoes): trabalho for trabalho in pendentes}
+            for terminados, futuro in enumerate(as_completed(futuros), 1):
+                resultado = futuro.result()
+                resultado["camadas"] = json.dumps(list(resultado["camadas"]))
+                escritor.writerow(resultado)
+                arquivo.flush()
+
+                situacao = f"alvo em {resultado['tempo_ate_alvo']} s" if resultado["atingiu"] else f"melhor {resultado['melhor_pontos']} pontos"
+                print(f"[{terminados}/{len(pendentes)}] trabalho {resultado['id']}: {situacao}, {resultado['frames_por_segundo']:,} frames/s")
+        except KeyboardInterrupt:
+            print("interrompido; rode de novo para continuar")
+            pool.shutdown(wait=False, cancel_futures=True)
+            raise
+        pool.shutdown()
+
+def mostra_resumo(caminho:str):
+    """Mostra cada combinação da tabela com a fração das sementes que atingiu o alvo, o tempo médio até o alvo
+    (entre as que atingiram) e a média de frames por segundo, da mais rápida para a mais lenta."""
+    grupos = {}
+    for linha in le_resultados(caminho):
+        chave = json.loads(linha["chave"])
+        chave.pop("semente")
+        grupos.setdefault(json.dumps(chave, sort_keys=True), []).append(linha)
+
+    resumo = []
+    for chave, linhas in grupos.items():
+        tempos = [float(linha["tempo_ate_alvo"]) for linha in linhas if linha["atingiu"] == "True"]
+        resumo.append((
+            len(tempos) / len(linhas),
+            sum(tempos) / len(tempos) if tempos else float("inf"),
+            sum(float(linha["frames_por_segundo"]) for linha in linhas) / len(linhas),
+            len(linhas),
+            chave,
+        ))
+    resumo.sort(key=lambda item: (-item[0], item[1]))
+
+    print(f"{'atingiu':>8} {'tempo alvo':>11} {'frames/s':>10} {'n':>3}  parâmetros")
+    for fracao, tempo, frames, quantidade, chave in resumo:
+        print(f"{fracao:>8.0%} {tempo:>11.1f} {frames:>10,.0f} {quantidade:>3}  {chave}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Varredura de hiperparâmetros do Dino I.A.")
+    parser.add_argument("varredura", help="arquivo JSON com a grade ou a busca aleatória")
+    parser.add_argument("--resultados", default="varredura.csv", help="tabela CSV com uma linha por trabalho")
+    parser.add_argument("--processos", type=int, default=None, help="processos do pool (padrão: um por CPU)")
+    parser.add_argument("--resumo", action="store_true", help="só mostra o resumo da tabela")
+    args = parser.parse_args()
+
+    if not args.resumo:
+        with open(args.varredura, "r", encoding="utf-8") as arquivo:
+            varredura = json.load(arquivo)
+        try:
+            roda_varredura(varredura, args.resultados, args.processos)
+        except KeyboardInterrupt:
+            sys.exit(1)
+
+    mostra_resumo(args.resultados)
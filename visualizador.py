@@ -0,0 +1,380 @@
+"""Treino sem tela em um processo e visualização em outro, ligados por uma memória compartilhada.
+
+    python visualizador.py treina                      # treina e publica o estado, sem abrir janela
+    python visualizador.py ve                          # abre a janela com o último estado publicado
+    python visualizador.py treina --com-visualizador   # as duas coisas, em processos separados
+
+O treino escreve pequenos retratos do jogo (obstáculos, dino líder, ativações da rede e curva de pontos) em um
+buffer duplo na memória compartilhada, no máximo 60 vezes por segundo. O visualizador desenha o retrato mais
+recente no seu próprio ritmo e pode ser aberto e fechado a qualquer momento sem mudar a velocidade do treino.
+"""
+import argparse, os, subprocess, sys, time, numpy as np
+from multiprocessing import shared_memory, resource_tracker
+from ambiente import (OBSTACULOS_TELA, TIPO_PTEROSSAURO, TAMANHOS_CACTO, DINO_X, DINO_ALTURA_AGACHADO,
+                      LARGURA_TELA, ALTURA_TELA, acoes_da_saida)
+from constantes import NOMES_ACOES
+
+NOME_MEMORIA = "dino_ia_estado"
+MAGICO_ESTADO = b"DINOEST1"
+
+MAX_CAMADAS = 8
+MAX_ATIVACOES = 512
+TAMANHO_CURVA = 400
+
+CABECALHO = np.dtype([("magico", "S8"), ("atual", "<u4"), ("publicacoes", "<u4")])
+
+"""Retrato do jogo. obstaculos: (x, topo, largura, altura, tipo) na ordem da tela; dino: (y, altura, ação, jogo)"""
+ESTADO = np.dtype([
+    ("sequencia", "<u8"),
+    ("geracao", "<i4"),
+    ("pontos", "<i4"),
+    ("vivos", "<i4"),
+    ("populacao", "<i4"),
+    ("velocidade", "<i4"),
+    ("camadas", "<i4"),
+    ("tamanho_curva", "<i4"),
+    ("melhor_fitness", "<f8"),
+    ("passos_por_segundo", "<f8"),
+    ("obstaculos", "<i4", (OBSTACULOS_TELA, 5)),
+    ("dino", "<i4", (4,)),
+    ("neuronios", "<i4", (MAX_CAMADAS,)),
+    ("entradas", "<f8", (6,)),
+    ("ativacoes", "<f8", (MAX_ATIVACOES,)),
+    ("curva", "<i4", (TAMANHO_CURVA,)),
+])
+
+class PublicadorEstado:
+    """Lado do treino: cria a memória compartilhada e publica os retratos. Cada retrato é escrito na metade
+    que não está sendo mostrada e só então vira a atual; o número de sequência de cada metade fica ímpar
+    durante a escrita, para o leitor descartar uma cópia feita no meio dela."""
+    def __init__(self, nome:str=NOME_MEMORIA, intervalo:float=1/60):
+        """Cria a memória compartilhada (apagando uma que tenha sobrado de um treino interrompido)."""
+        try:
+            antiga = shared_memory.SharedMemory(nome)
+            antiga.close()
+            antiga.unlink()
+        except FileNotFoundError:
+            pass
+
+        self.memoria = shared_memory.SharedMemory(nome, create=True, size=CABECALHO.itemsize + 2 * ESTADO.itemsize)
+        self.cabecalho = np.ndarray((), CABECALHO, buffer=self.memoria.buf)
+        self.estados = np.ndarray((2,), ESTADO, buffer=self.memoria.buf, offset=CABECALHO.itemsize)
+        self.estados[:] = np.zeros(2, ESTADO)
+        self.cabecalho["magico"] = MAGICO_ESTADO
+        self.intervalo = intervalo
+        self.ultima_publicacao = 0.0
+        self.passos = 0
+        self.inicio_passos = time.perf_counter()
+
+    def observa(self, treinador, env, saida:np.ndarray):
+        """Observador do Treinador (chamado a cada passo do ambiente): publica um retrato se já passou o intervalo."""
+        self.passos += 1
+        agora = time.perf_counter()
+        if agora - self.ultima_publicacao < self.intervalo:
+            return
+
+        passos_por_segundo = self.passos / (agora - self.inicio_passos)
+        self.passos = 0
+        self.inicio_passos = agora
+        self.ultima_publicacao = agora
+        self.publica(treinador, env, saida, passos_por_segundo)
+
+    def publica(self, treinador, env, saida:np.ndarray, passos_por_segundo:float):
+        """Escreve o retrato do jogo líder (o elite na primeira pista enquanto ele vive, senão o primeiro vivo)."""
+        vivos = np.flatnonzero(env.vivo)
+        lider = 0 if env.vivo[0] or not len(vivos) else int(vivos[0])
+        cursos = env.num_envs // treinador.tamanho
+        individuo, curso = divmod(lider, cursos)
+
+        """Ativações do líder calculadas de novo só para ele, camada por camada"""
+        neuronios = treinador.populacao.neuronios
+        x = env.observacoes[lider].copy()
+        ativacoes = []
+        for pesos, bias in zip(treinador.populacao.pesos, treinador.populacao.bias):
+            x = np.maximum(x @ pesos[individuo] + bias[individuo], 0)
+            ativacoes.append(x)
+        ativacoes = np.concatenate(ativacoes)[:MAX_ATIVACOES]
+
+        curva = treinador.rede.lista_pontos[-(TAMANHO_CURVA - 1):] + [int(env.pontos.max())]
+        posicoes = (env.inicio[lider] + np.arange(OBSTACULOS_TELA)) % OBSTACULOS_TELA
+        acao = int(acoes_da_saida(saida[individuo, curso])[0])
+
+        indice = 1 - int(self.cabecalho["atual"])
+        estados = self.estados
+        estados["sequencia"][indice] += 1
+
+        estados["geracao"][indice] = treinador.rede.geracao
+        estados["pontos"][indice] = env.pontos[lider]
+        estados["vivos"][indice] = len(vivos)
+        estados["populacao"][indice] = env.num_envs
+        estados["velocidade"][indice] = env.cenario_velocidade[lider]
+        estados["camadas"][indice] = len(neuronios)
+        estados["tamanho_curva"][indice] = len(curva)
+        estados["melhor_fitness"][indice] = treinador.melhor.fitness if treinador.melhor else 0
+        estados["passos_por_segundo"][indice] = passos_por_segundo
+        estados["obstaculos"][indice] = np.stack([
+            env.obstaculo_x[lider, posicoes],
+            env.obstaculo_base[lider, posicoes] - env.obstaculo_altura[lider, posicoes],
+            env.obstaculo_largura[lider, posicoes],
+            env.obstaculo_altura[lider, posicoes],
+            env.obstaculo_tipo[lider, posicoes],
+        ], axis=1)
+        estados["dino"][indice] = (env.dino_y[lider], env.dino_altura[lider], acao, lider)
+        estados["neuronios"][indice, :len(neuronios)] = neuronios[:MAX_CAMADAS]
+        estados["entradas"][indice] = env.observacoes[lider]
+        estados["ativacoes"][indice, :len(ativacoes)] = ativacoes
+        estados["curva"][indice, :len(curva)] = curva
+
+        estados["sequencia"][indice] += 1
+        self.cabecalho["atual"] = indice
+        self.cabecalho["publicacoes"] += 1
+
+    def fecha(self):
+        """Libera e apaga a memória compartilhada."""
+        self.cabecalho = None
+        self.estados = None
+        self.memoria.close()
+        self.memoria.unlink()
+
+class LeitorEstado:
+    """Lado do visualizador: abre a memória compartilhada já criada pelo treino e copia o retrato atual."""
+    def __init__(self, nome:str=NOME_MEMORIA):
+        """Abre a memória compartilhada. Levanta FileNotFoundError se nenhum treino estiver publicando."""
+        self.memoria = shared_memory.SharedMemory(nome)
+        # Quem cria e apaga a memória é o treino; sem isso o Python apagaria a memória ao fechar o visualizador
+        resource_tracker.unregister(self.memoria._name, "shared_memory")
+        self.cabecalho = np.ndarray((), CABECALHO, buffer=self.memoria.buf)
+        self.estados = np.ndarray((2,), ESTADO, buffer=self.memoria.buf, offset=CABECALHO.itemsize)
+        if bytes(self.cabecalho["magico"]) != MAGICO_ESTADO:
+            self.fecha()
+            raise FileNotFoundError(f"memória compartilhada {nome} não é de um treino do Dino I.A.")
+
+    def publicacoes(self) -> int:
+        """Quantidade de retratos publicados até agora (para saber se o treino continua rodando)."""
+        return int(self.cabecalho["publicacoes"])
+
+    def le(self):
+        """Copia o retrato atual, tentando de novo se ele for reescrito durante a cópia. Retorna None se não
+        conseguir uma cópia inteira ou se nada tiver sido publicado ainda."""
+        for _ in range(10):
+            indice = int(self.cabecalho["atual"])
+            sequencia = int(self.estados["sequencia"][indice])
+            if sequencia == 0 or sequencia % 2:
+                continue
+            copia = self.estados[indice:indice+1].copy()[0]
+            if int(self.estados["sequencia"][indice]) == sequencia:
+                return copia
+        return None
+
+    def fecha(self):
+        """Desconecta da memória compartilhada sem apagá-la."""
+        self.cabecalho = None
+        self.estados = None
+        self.memoria.close()
+
+def desenha_estado(tela, recursos, estado, fps_visualizador:float):
+    """Desenha o retrato: chão, obstáculos, dino líder, textos, curva de pontos e a rede do líder."""
+    import pygame
+    PRETO = (0,0,0)
+    CINZA = (200,200,200)
+    VERMELHO = (255,0,0)
+    AZUL = (0,0,255)
+
+    pontos = int(estado["pontos"])
+    pygame.draw.line(tela, PRETO, (0, ALTURA_TELA - 10), (LARGURA_TELA, ALTURA_TELA - 10), 2)
+
+    for x, topo, largura, altura, tipo in estado["obstaculos"].tolist():
+        if tipo == TIPO_PTEROSSAURO:
+            tela.blit(recursos.frames("pterossauro")[(pontos // 6) % 2], (x, topo))
+        else:
+            indice_cacto = next(i for i, (l, a) in enumerate(TAMANHOS_CACTO.tolist()) if l == largura and a == altura)
+            tela.blit(recursos.frames("cacto")[indice_cacto], (x, topo))
+
+    dino_y, dino_altura, acao, jogo = estado["dino"].tolist()
+    frames_dino = recursos.frames_dino(CINZA)
+    if dino_altura == DINO_ALTURA_AGACHADO:
+        imagem = frames_dino[4 + (pontos // 6) % 2]
+    elif dino_y + dino_altura < ALTURA_TELA - 15:
+        imagem = frames_dino[1]
+    else:
+        imagem = frames_dino[2 + (pontos // 6) % 2]
+    tela.blit(imagem, (DINO_X, dino_y))
+
+    textos = [
+        (f"geracao: {estado['geracao']}", (450,350)),
+        (f"vivos: {estado['vivos']}/{estado['populacao']}", (650,350)),
+        (f"velocidade: {estado['velocidade']}", (850,350)),
+        (f"treino: {estado['passos_por_segundo']:,.0f} passos/s", (450,380)),
+        (f"melhor fitness: {estado['melhor_fitness']:g}", (650,380)),
+        (f"jogo {jogo}: {NOMES_ACOES[acao]}", (850,380)),
+        (f"visualizador: {fps_visualizador:.1f} fps", (850,20)),
+    ]
+    for texto, posicao in textos:
+        tela.blit(recursos.fonte(15).render(texto, True, PRETO), posicao)
+    tela.blit(recursos.fonte(30).render(f"pontos: {pontos}", True, AZUL), (130,320))
+
+    """Curva de pontos de cada geração"""
+    origem_x, origem_y, largura, altura = 10, 10, 400, 300
+    pygame.draw.rect(tela, PRETO, (origem_x, origem_y, largura, altura), 2)
+    curva = estado["curva"][:int(estado["tamanho_curva"])]
+    if len(curva) > 1:
+        escala = max(1, int(curva.max())) / (altura - 10)
+        passo = largura / (len(curva) - 1)
+        linha = [(origem_x + indice * passo, origem_y + altura - valor / escala) for indice, valor in enumerate(curva.tolist())]
+        pygame.draw.lines(tela, AZUL, False, linha)
+
+    """Rede do líder, com a cor de cada neurônio pela ativação"""
+    neuronios = estado["neuronios"][:int(estado["camadas"])].tolist()
+    valores = [estado["entradas"].tolist()]
+    posicao = 0
+    for camada in neuronios[1:]:
+        valores.append(estado["ativacoes"][posicao:posicao + camada].tolist())
+        posicao += camada
+
+    maior_camada = max(neuronios)
+    espaco_y = min(40, 280 / maior_camada)
+    espaco_x = min(100, 280 / (len(neuronios) - 1))
+    raio = max(2, min(10, int(espaco_y / 2) - 1))
+    posicoes = []
+    for indice_camada, camada in enumerate(neuronios):
+        x = 640 + indice_camada * espaco_x
+        y_inicial = 50 + (maior_camada - camada) * espaco_y / 2
+        posicoes.append([(x, y_inicial + neuronio * espaco_y) for neuronio in range(camada)])
+
+    for indice_camada in range(1, len(neuronios)):
+        for neuronio, atual in enumerate(posicoes[indice_camada]):
+            cor = VERMELHO if valores[indice_camada][neuronio] else CINZA
+            for anterior in posicoes[indice_camada - 1]:
+                pygame.draw.line(tela, cor, anterior, atual, 1)
+
+    for indice_camada, camada in enumerate(posicoes):
+        for neuronio, centro in enumerate(camada):
+            vermelho = min(max(valores[indice_camada][neuronio] / 100, 0), 1) * 255
+            pygame.draw.circle(tela, (vermelho,0,0), centro, raio)
+            if indice_camada == 0:
+                texto = recursos.fonte(15).render(f"{valores[0][neuronio]:g}", True, PRETO)
+                tela.blit(texto, (centro[0] - 60, centro[1] - 6))
+
+def roda_visualizador(nome:str=NOME_MEMORIA, fps:int=60):
+    """Janela do visualizador: conecta à memória do treino (esperando ele começar, se preciso), desenha o retrato
+    mais recente a cada frame e reconecta se o treino for reiniciado. Fechar a janela só desconecta."""
+    import pygame
+    from recursos import GerenciadorRecursos, resource_path
+
+    pygame.display.init()
+    pygame.font.init()
+    tela = pygame.display.set_mode((LARGURA_TELA, ALTURA_TELA))
+    pygame.display.set_caption("Dino I.A. - visualizador")
+    pygame.display.set_icon(pygame.image.load(resource_path("icon.png")))
+
+    recursos = GerenciadorRecursos(mudo=True)
+    recursos.carrega()
+    relogio = pygame.time.Clock()
+
+    leitor = None
+    publicacoes = -1
+    ultima_novidade = time.perf_counter()
+    estado = None
+
+    while True:
+        for event in pygame.event.get():
+            if event.type == pygame.QUIT:
+                if leitor:
+                    leitor.fecha()
+                pygame.quit()
+                return
+
+        """Conecta (ou reconecta, se o treino ficou parado por 2 segundos) à memória compartilhada"""
+        agora = time.perf_counter()
+        if leitor is None or agora - ultima_novidade > 2:
+            if leitor:
+                leitor.fecha()
+                leitor = None
+            try:
+                leitor = LeitorEstado(nome)
+            except FileNotFoundError:
+                estado = None
+            ultima_novidade = agora
+
+        if leitor:
+            if leitor.publicacoes() != publicacoes:
+                publicacoes = leitor.publicacoes()
+                ultima_novidade = agora
+                copia = leitor.le()
+                if copia is not None:
+                    estado = copia
+
+        tela.fill((255,255,255))
+        if estado is None:
+            texto = recursos.fonte(30).render("aguardando o treino...", True, (0,0,0))
+            tela.blit(texto, (LARGURA_TELA / 2 - texto.get_width() / 2, ALTURA_TELA / 2))
+        else:
+            desenha_estado(tela, recursos, estado, relogio.get_fps())
+
+        pygame.display.flip()
+        relogio.tick(fps)
+
+def roda_treino(args):
+    """Treina sem tela publicando o estado na memória compartilhada, até o número de gerações pedido ou Ctrl+C."""
+    from evolucao import Treinador
+    from dino_IA import carrega_json, neuronios_salvos, Individuo
+
+    neuronios = [6] + args.camadas + [2]
+    individuo_inicial = None
+    geracao = 0
+    dados = carrega_json(args.checkpoint) if args.checkpoint else None
+    if dados:
+        neuronios = neuronios_salvos(dados)
+        geracao = dados["rede"]["geracao"]
+        individuo_inicial = Individuo(dados["individuo"]["pesos"], dados["individuo"]["bias"])
+        individuo_inicial.fitness = dados["individuo"]["fitness"]
+
+    """O retrato tem espaço fixo para as camadas e as ativações da rede; uma rede maior não caberia nele"""
+    if len(neuronios) > MAX_CAMADAS or sum(neuronios[1:]) > MAX_ATIVACOES:
+        raise SystemExit(f"a rede {neuronios} não cabe no retrato do visualizador: no máximo {MAX_CAMADAS} camadas "
+                         f"e {MAX_ATIVACOES} neurônios fora da entrada")
+
+    treinador = Treinador(neuronios, args.populacao, individuo_inicial=individuo_inicial, geracao=geracao,
+                          cursos=args.cursos, agregacao=args.agregacao, precisao=args.precisao,
+                          eventos=args.eventos)
+    publicador = PublicadorEstado(args.nome)
+    treinador.observador = publicador.observa
+
+    visualizador = None
+    if args.com_visualizador:
+        visualizador = subprocess.Popen([sys.executable, os.path.abspath(__file__), "ve", "--nome", args.nome])
+
+    try:
+        while args.geracoes == 0 or treinador.rede.geracao < geracao + args.geracoes:
+            estatisticas = treinador.executa_geracao()
+            print(f"geracao {estatisticas['geracao']}: melhor fitness {estatisticas['melhor_fitness']:g}, "
+                  f"pontos {estatisticas['pontos']}, {estatisticas['frames_por_segundo']:,.0f} frames/s")
+    except KeyboardInterrupt:
+        pass
+    finally:
+        if args.saida and treinador.melhor is not None:
+            treinador.salva(args.saida)
+        publicador.fecha()
+        if visualizador:
+            visualizador.terminate()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Treino sem tela e visualizador em processos separados.")
+    parser.add_argument("modo", choices=["treina", "ve"])
+    parser.add_argument("--nome", default=NOME_MEMORIA, help="nome da memória compartilhada")
+    parser.add_argument("--populacao", type=int, default=500)
+    parser.add_argument("--camadas", type=int, nargs="+", default=[6])
+    parser.add_argument("--cursos", type=int, default=1)
+    parser.add_argument("--agregacao", choices=["media", "minimo", "cvar"], default="media")
+    parser.add_argument("--precisao", choices=["float64", "float16", "int8"], default="float64", help="precisão dos pesos na avaliação")
+    parser.add_argument("--eventos", action="store_true", help="pula de uma vez os frames sem decisão nova (mesmo resultado)")
+    parser.add_argument("--geracoes", type=int, default=0, help="gerações a treinar (0 = até Ctrl+C)")
+    parser.add_argument("--checkpoint", default=None, help="save.json usado para começar o treino")
+    parser.add_argument("--saida", default="save.json", help="onde o melhor é salvo no fim do treino")
+    parser.add_argument("--com-visualizador", action="store_true", help="abre o visualizador em outro processo")
+    args = parser.parse_args()
+
+    if args.modo == "ve":
+        roda_visualizador(args.nome)
+    else:
+        roda_treino(args)